@@ -0,0 +1,160 @@
+"""Process-wide admission control for generations sharing one GPU.
+
+At most ``max_concurrent`` generations run at once. Waiting requests are ordered by
+reasoning effort (``low`` first), then by how recently their session was last
+served, so one busy session can't starve the others. Waiting time slowly raises a
+request's priority so ``high`` effort requests are never starved either.
+
+A side-by-side comparison is admitted as one ticket holding a slot per stream (at most
+``max_concurrent``), so its columns start together instead of one after another.
+Each stream gives its slot back as it finishes.
+"""
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_CONCURRENT = 2
+EFFORT_PRIORITY = {"low": 0, "medium": 1, "high": 2}
+# Seconds of waiting that make up for one effort level of priority
+AGING_SECONDS = 20.0
+# Completed generation durations used for wait estimates
+DURATION_SAMPLES = 50
+DEFAULT_DURATION_ESTIMATE = 30.0
+
+
+class Ticket:
+    """A request's place in the admission queue."""
+
+    def __init__(self, seq, session_id, priority, enqueued_at, slots=1):
+        self.seq = seq
+        self.session_id = session_id
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+        self.slots = slots
+        self.admitted_at = None
+        self.released = False
+
+    @property
+    def queue_wait(self):
+        return None if self.admitted_at is None else self.admitted_at - self.enqueued_at
+
+
+class AdmissionController:
+    """Bound concurrent generations and hand out slots fairly across sessions."""
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, clock=time.monotonic):
+        self.max_concurrent = max_concurrent
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._active = set()
+        self._last_served = {}
+        self._durations = deque(maxlen=DURATION_SAMPLES)
+        self._seq = itertools.count()
+
+    def _used(self):
+        return sum(ticket.slots for ticket in self._active)
+
+    def _order_key(self, ticket, now):
+        # Whole priority classes: a request moves up one per AGING_SECONDS waited, and within
+        # a class the session served longest ago goes first
+        aged = math.ceil(ticket.priority - (now - ticket.enqueued_at) / AGING_SECONDS)
+        return aged, self._last_served.get(ticket.session_id, float("-inf")), ticket.seq
+
+    def _admit_waiting(self):
+        # Called with the lock held: fill free slots in fairness order
+        now = self.clock()
+        while self._waiting:
+            ticket = min(self._waiting, key=lambda t: self._order_key(t, now))
+            # The next ticket waits for enough slots; smaller ones behind it don't jump ahead
+            if self._used() + ticket.slots > self.max_concurrent:
+                break
+            self._waiting.remove(ticket)
+            ticket.admitted_at = now
+            self._active.add(ticket)
+            self._last_served[ticket.session_id] = now
+        self._forget_idle_sessions(now)
+        self._cond.notify_all()
+
+    def _forget_idle_sessions(self, now):
+        # Called with the lock held: a session with no tickets that was served more than an
+        # aging window ago counts as not recently served, so its entry can go
+        live = {ticket.session_id for ticket in self._waiting} | {ticket.session_id for ticket in self._active}
+        for session_id in [s for s, served in self._last_served.items()
+                           if s not in live and now - served > AGING_SECONDS]:
+            del self._last_served[session_id]
+
+    def enqueue(self, session_id, reasoning_effort="medium", slots=1):
+        """Join the queue for ``slots`` concurrent streams; the ticket may be admitted immediately."""
+        with self._cond:
+            ticket = Ticket(next(self._seq), session_id, EFFORT_PRIORITY.get(reasoning_effort, 1), self.clock(),
+                            max(1, min(slots, self.max_concurrent)))
+            self._waiting.append(ticket)
+            self._admit_waiting()
+            return ticket
+
+    def wait(self, ticket, timeout=None):
+        """Block until the ticket is admitted; ``False`` if the timeout ran out first."""
+        with self._cond:
+            return self._cond.wait_for(lambda: ticket.admitted_at is not None or ticket.released, timeout)
+
+    def release(self, ticket, slots=None):
+        """Give the slots back (or leave the queue). Safe to call more than once.
+
+        ``slots`` gives back only that many, e.g. as each stream of a comparison ends.
+        """
+        with self._cond:
+            if ticket.released:
+                return
+            if slots is not None and slots < ticket.slots:
+                ticket.slots -= slots
+                self._admit_waiting()
+                return
+            ticket.released = True
+            if ticket in self._active:
+                self._active.discard(ticket)
+                self._durations.append(self.clock() - ticket.admitted_at)
+            elif ticket in self._waiting:
+                self._waiting.remove(ticket)
+            self._admit_waiting()
+
+    def position(self, ticket):
+        """Number of waiting requests that would be admitted before this one."""
+        with self._cond:
+            if ticket not in self._waiting:
+                return 0
+            now = self.clock()
+            key = self._order_key(ticket, now)
+            return sum(1 for other in self._waiting if self._order_key(other, now) < key)
+
+    def estimated_wait(self, ticket):
+        """Rough seconds until admission, from recent generation durations."""
+        with self._cond:
+            if ticket not in self._waiting:
+                return 0.0
+            average = sum(self._durations) / len(self._durations) if self._durations else DEFAULT_DURATION_ESTIMATE
+            now = self.clock()
+            remaining = sorted(max(average - (now - t.admitted_at), 0.0) for t in self._active for _ in range(t.slots))
+        ahead = self.position(ticket)
+        # The first slot to free up starts the queue moving; each later round takes one average duration
+        first_free = remaining[0] if remaining else 0.0
+        return first_free + math.floor(ahead / self.max_concurrent) * average
+
+    def snapshot(self):
+        with self._cond:
+            return {"active": self._used(), "waiting": len(self._waiting), "max_concurrent": self.max_concurrent}
+
+
+def held_stream(controller, ticket, stream):
+    """Yield from ``stream`` and free the ticket's slot when it ends or is closed."""
+    try:
+        yield from stream
+    finally:
+        controller.release(ticket)
+
+
+def controller_from_env():
+    return AdmissionController(int(os.environ.get("GPT_OSS_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT)))
@@ -0,0 +1,141 @@
+"""Run several chat streams at once on a shared asyncio event loop.
+
+Used for side-by-side comparisons (the same prompt at several reasoning efforts, or
+on several models). One background thread runs the event loop for the whole process
+with a pooled ``AsyncClient`` per router backend. The Streamlit script thread only drains a
+queue of chunks tagged with the stream they belong to, so N streams take about as
+long as the slowest of them rather than their sum. Backends are picked by the shared
+``BackendRouter``, so comparison streams count toward its load and health tracking
+and stay on the conversation's backend. With admission control the group
+is admitted as one multi-slot ticket, so its streams start together.
+"""
+import asyncio
+import queue
+import threading
+import time
+
+from admission import EFFORT_PRIORITY
+from ollama_client import client_settings_from_env, create_async_client
+
+_DONE = object()
+
+
+class MultiStream:
+    """Handle on a group of concurrent streams started by ``AsyncStreamEngine``."""
+
+    def __init__(self, engine, count, cancel_token, clock):
+        self.engine = engine
+        self.count = count
+        self.cancel_token = cancel_token
+        self.clock = clock
+        self.queue = queue.Queue()
+        self.finished = set()
+        self.errors = {}
+        self.queue_waits = {}
+        self.futures = []
+        self.admission = None
+        self.ticket = None
+        # Streams not yet ended; only the event loop thread changes it
+        self.running = count
+
+    def batches(self, max_batch=64, poll_interval=0.1):
+        """Yield lists of ``(index, received_at, chunk)`` until every stream has ended."""
+        done = 0
+        while done < self.count and not self.cancel_token.is_set():
+            try:
+                item = self.queue.get(timeout=poll_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while True:
+                if item[2] is _DONE:
+                    done += 1
+                else:
+                    batch.append(item)
+                if len(batch) >= max_batch:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                yield batch
+
+    def cancel(self):
+        """Stop every stream that is still running; their HTTP responses are closed."""
+        self.cancel_token.set()
+        for future in self.futures:
+            future.cancel()
+        # Streams cancelled before they started never give their slots back themselves
+        if self.ticket is not None:
+            self.admission.release(self.ticket)
+
+    def join(self, timeout=None):
+        for future in self.futures:
+            try:
+                future.result(timeout)
+            except BaseException:
+                pass
+
+
+class AsyncStreamEngine:
+    """Event loop thread plus an async client for each of ``router``'s backends."""
+
+    def __init__(self, router, client_factory=None, clock=time.monotonic):
+        self.router = router
+        self.clock = clock
+        factory = client_factory or (lambda host: create_async_client(host, **client_settings_from_env()))
+        self.clients = {backend.host: factory(backend.host) for backend in router.backends}
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="ollama-async", daemon=True)
+        self._thread.start()
+
+    def stream_many(self, requests, cancel_token, admission=None, session_id=None, conversation_id=None):
+        """Start one chat stream per request and return a ``MultiStream`` to read them.
+
+        Each request holds ``chat()`` keyword arguments plus an optional
+        ``reasoning_effort``. With an ``admission`` controller the group waits for one
+        ticket with a slot per stream, queued at the priority of its highest effort,
+        since the comparison lasts as long as its longest stream. ``conversation_id``
+        keeps the streams on the conversation's backend, as for a single answer.
+        """
+        streams = MultiStream(self, len(requests), cancel_token, self.clock)
+        if admission:
+            effort = max((request.get("reasoning_effort", "medium") for request in requests),
+                         key=lambda effort: EFFORT_PRIORITY.get(effort, 1))
+            streams.admission = admission
+            streams.ticket = admission.enqueue(session_id, effort, slots=len(requests))
+        for index, request in enumerate(requests):
+            coroutine = self._run(streams, index, conversation_id, dict(request))
+            streams.futures.append(asyncio.run_coroutine_threadsafe(coroutine, self.loop))
+        return streams
+
+    async def _run(self, streams, index, conversation_id, request):
+        request.pop("reasoning_effort", None)
+        ticket, stream = streams.ticket, None
+        try:
+            if ticket is not None:
+                await asyncio.to_thread(streams.admission.wait, ticket)
+                streams.queue_waits[index] = ticket.queue_wait
+            stream = self.router.astream_chat(self.clients, conversation_id, **request)
+            async for chunk in stream:
+                if streams.cancel_token.is_set():
+                    break
+                streams.queue.put((index, self.clock(), chunk))
+            else:
+                streams.finished.add(index)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            streams.errors[index] = e
+        finally:
+            if stream is not None:
+                await stream.aclose()
+            streams.running -= 1
+            if ticket is not None and streams.running < ticket.slots:
+                # Hand slots the remaining streams don't need to waiting requests
+                streams.admission.release(ticket, slots=ticket.slots - streams.running)
+            streams.queue.put((index, self.clock(), _DONE))
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,160 @@
+"""Run a set of prompts through the chat pipeline without the UI.
+
+Each prompt is sent with the same system prompt, request payload and streaming path
+the app uses, and one JSON result per prompt is written with the thinking, answer,
+time to first token, decode speed and thinking length:
+
+    python batch_runner.py prompts.jsonl --effort high --concurrency 4 -o results.jsonl
+    python batch_runner.py --examples --mock          # the UI's example prompts, mock server
+    python batch_runner.py --examples --tools         # let the model call the built-in tools
+
+Input lines are objects with a ``prompt`` and optionally ``id``, ``model`` and
+``reasoning_effort``; other fields are copied to the result. The command-line model
+and effort apply where a line doesn't set its own.
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from example_prompts import example_records
+from instrumentation import TurnMetrics, percentile
+from request_builder import build_request_messages, generation_options, system_message, think_option
+from router import BackendRouter, hosts_from_env
+from tool_runtime import executor_from_env, tool_loop
+from tools import default_registry
+
+DEFAULT_MODEL = "gpt-oss:20b"
+DEFAULT_CONCURRENCY = 4
+
+
+def load_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_prompt(router, record, model, reasoning_effort, options=None, executor=None):
+    """Stream one prompt and return its result record; with ``executor`` the model may call tools."""
+    model = record.get("model", model)
+    reasoning_effort = record.get("reasoning_effort", reasoning_effort)
+    messages = build_request_messages([system_message(), {"role": "user", "content": record["prompt"]}])
+    result = dict(record, id=record.get("id") or uuid.uuid4().hex, model=model, reasoning_effort=reasoning_effort)
+
+    def chat(turn_messages, tools=None):
+        return router.stream_chat(model=model, messages=turn_messages, think=think_option(model, reasoning_effort),
+                                  options=options, tools=tools)
+
+    metrics = TurnMetrics()
+    thinking, answer = [], []
+    try:
+        for chunk in tool_loop(chat, messages, executor) if executor else chat(messages):
+            metrics.observe(chunk)
+            message = chunk["message"]
+            if message.get("thinking"):
+                thinking.append(message["thinking"])
+            if message.get("content"):
+                answer.append(message["content"])
+    except Exception as e:
+        result["error"] = repr(e)
+
+    turn = metrics.as_dict()
+    result.update(
+        thinking="".join(thinking),
+        answer="".join(answer),
+        elapsed=time.monotonic() - metrics.started_at,
+        ttft_thinking=turn.get("ttft_thinking"),
+        ttft_answer=turn.get("ttft_answer"),
+        tokens=turn["tokens"],
+        tokens_per_second=turn.get("tokens_per_second"),
+        thinking_tokens=turn["thinking_tokens"],
+        thinking_chars=sum(len(part) for part in thinking),
+        prompt_tokens=turn.get("prompt_eval_count"),
+    )
+    return result
+
+
+def run_batch(router, records, model=DEFAULT_MODEL, reasoning_effort="medium", concurrency=DEFAULT_CONCURRENCY,
+              options=None, executor=None):
+    """Yield results in input order while up to ``concurrency`` prompts stream at once."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        yield from pool.map(lambda record: run_prompt(router, record, model, reasoning_effort, options, executor),
+                            records)
+
+
+def summarize(results, wall_time):
+    ok = [r for r in results if "error" not in r]
+
+    def pcts(key):
+        values = [r[key] for r in ok if r.get(key) is not None]
+        if not values:
+            return "-"
+        return f"p50 {percentile(values, 50):.2f}s / p95 {percentile(values, 95):.2f}s"
+
+    rates = [r["tokens_per_second"] for r in ok if r.get("tokens_per_second")]
+    lines = [
+        f"{len(results)} prompts in {wall_time:.1f}s, {len(results) - len(ok)} failed",
+        f"first thinking token  {pcts('ttft_thinking')}",
+        f"first answer token    {pcts('ttft_answer')}",
+        f"total time            {pcts('elapsed')}",
+    ]
+    if rates:
+        lines.append(f"decode speed          mean {sum(rates) / len(rates):.1f} tok/s")
+    if ok:
+        lines.append(f"thinking length       mean {sum(r['thinking_tokens'] for r in ok) / len(ok):.0f} tokens")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run prompts through the GPT-OSS chat pipeline without the UI.")
+    parser.add_argument("input", nargs="?", help="JSONL file of prompts")
+    parser.add_argument("--examples", action="store_true", help="run the UI's example prompts")
+    parser.add_argument("-o", "--output", help="write results here instead of stdout")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--effort", default="medium", choices=["low", "medium", "high"])
+    parser.add_argument("--num-ctx", type=int, help="context window (Ollama num_ctx)")
+    parser.add_argument("--num-predict", type=int, help="cap on thinking plus answer tokens (Ollama num_predict)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--tools", action="store_true", help="offer the built-in tools to the model")
+    parser.add_argument("--host", action="append", help="Ollama host (repeatable); default OLLAMA_HOSTS/OLLAMA_HOST")
+    parser.add_argument("--mock", action="store_true", help="run against an in-process mock Ollama server")
+    args = parser.parse_args(argv)
+
+    if bool(args.input) == args.examples:
+        parser.error("give a prompts file or --examples")
+    records = example_records() if args.examples else load_records(args.input)
+
+    server = None
+    if args.mock:
+        from mock_ollama import MockOllamaServer
+        server = MockOllamaServer().start()
+        hosts = [server.url]
+    else:
+        hosts = args.host or hosts_from_env()
+
+    router = BackendRouter(hosts)
+    executor = executor_from_env(default_registry()) if args.tools else None
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    results = []
+    start = time.monotonic()
+    try:
+        options = generation_options(args.num_ctx, args.num_predict)
+        for result in run_batch(router, records, args.model, args.effort, args.concurrency, options, executor):
+            results.append(result)
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+    finally:
+        router.close()
+        if executor:
+            executor.close()
+        if output is not sys.stdout:
+            output.close()
+        if server:
+            server.stop()
+    print(summarize(results, time.monotonic() - start), file=sys.stderr)
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Simulate many sessions submitting prompts to one GPU, with and without admission control.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_admission --sessions 12 --max-concurrent 2
+
+The mock server slows every stream down as more run at once, more than linearly,
+the way a single Ollama server thrashes under load. Each session submits one prompt
+with a random reasoning effort. TTFT is measured from submission, so it includes
+queue wait.
+"""
+import argparse
+import random
+import threading
+import time
+
+from admission import AdmissionController, held_stream
+from instrumentation import percentile
+from mock_ollama import MockOllamaServer, SyntheticResponder
+from ollama_client import create_client, stream_chat
+
+MODEL = "gpt-oss:20b"
+# Thinking tokens per effort level, so low effort requests really are shorter
+EFFORT_TOKENS = {"low": 40, "medium": 120, "high": 300}
+
+
+class ContendedResponder:
+    """Synthetic responses whose token rate collapses with concurrent streams."""
+
+    def __init__(self, token_delay, thrash_exponent):
+        self.token_delay = token_delay
+        self.thrash_exponent = thrash_exponent
+        self.server = None
+
+    def __call__(self, request):
+        # The benchmark passes the effort level as the system prompt
+        effort = request["messages"][0]["content"]
+        responder = SyntheticResponder(EFFORT_TOKENS.get(effort, 120), 40, ttft=0.02, token_delay=self.token_delay)
+        for delay, chunk in responder(request):
+            if delay:
+                delay *= max(self.server.active_streams, 1) ** self.thrash_exponent
+            yield delay, chunk
+
+
+def run(host, sessions, max_concurrent, seed):
+    controller = AdmissionController(max_concurrent)
+    client = create_client(host, max_connections=sessions, max_keepalive=sessions)
+    rng = random.Random(seed)
+    efforts = [rng.choice(list(EFFORT_TOKENS)) for _ in range(sessions)]
+    results, tokens = [], [0]
+    lock = threading.Lock()
+
+    def session(index):
+        effort = efforts[index]
+        submitted = time.perf_counter()
+        ticket = controller.enqueue(f"session-{index}", effort)
+        controller.wait(ticket)
+        queue_wait = time.perf_counter() - submitted
+        messages = [{"role": "system", "content": effort}, {"role": "user", "content": f"prompt {index}"}]
+        first, count = None, 0
+        try:
+            for chunk in held_stream(controller, ticket, stream_chat(client, model=MODEL, messages=messages, think=True)):
+                if chunk["message"].get("thinking") or chunk["message"].get("content"):
+                    count += 1
+                    if first is None:
+                        first = time.perf_counter() - submitted
+        finally:
+            controller.release(ticket)
+        with lock:
+            tokens[0] += count
+            results.append((effort, queue_wait, first, time.perf_counter() - submitted))
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, tokens[0], results
+
+
+def report(label, elapsed, tokens, results):
+    def pcts(values):
+        return f"{percentile(values, 50):6.2f} / {percentile(values, 95):6.2f} s"
+
+    print(label)
+    print(f"  throughput:       {tokens / elapsed:,.0f} tok/s ({elapsed:.2f}s wall)")
+    print(f"  queue wait p50/95 {pcts([r[1] for r in results])}")
+    print(f"  TTFT p50/95       {pcts([r[2] for r in results if r[2] is not None])}")
+    print(f"  completion p50/95 {pcts([r[3] for r in results])}")
+    low = [r[3] for r in results if r[0] == "low"]
+    if low:
+        print(f"  low effort completion p50 {percentile(low, 50):.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=12)
+    parser.add_argument("--max-concurrent", type=int, default=2)
+    parser.add_argument("--token-delay", type=float, default=0.002, help="per-token delay with one stream")
+    parser.add_argument("--thrash-exponent", type=float, default=1.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    responder = ContendedResponder(args.token_delay, args.thrash_exponent)
+    with MockOllamaServer(responder=responder) as server:
+        responder.server = server
+        print(f"{args.sessions} sessions, one submission each\n")
+        report("no admission control", *run(server.url, args.sessions, args.sessions, args.seed))
+        report(f"admission control (max {args.max_concurrent} concurrent)",
+               *run(server.url, args.sessions, args.max_concurrent, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""GPU requests and latency when many sessions send the same prompt at once.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_coalesce --sessions 16 --spread 2
+
+Every session sends an identical request within ``--spread`` seconds, like a room
+full of people clicking the same example button. Without coalescing each one is a
+separate generation competing for the generation slots. With ``SingleFlight``,
+requests that arrive while an identical one is streaming join it instead.
+"""
+import argparse
+import random
+import threading
+import time
+
+from admission import AdmissionController, held_stream
+from instrumentation import percentile
+from mock_ollama import MockOllamaServer, SyntheticResponder
+from ollama_client import create_client, stream_chat
+from single_flight import SingleFlight
+
+MODEL = "gpt-oss:20b"
+MESSAGES = [{"role": "user", "content": "Solve the train problem step by step."}]
+
+
+def run(server, sessions, spread, max_concurrent, coalesce):
+    client = create_client(server.url)
+    controller = AdmissionController(max_concurrent)
+    flights = SingleFlight()
+    durations = []
+    requests_before = server.total_requests
+
+    def start(ticket):
+        return held_stream(controller, ticket, stream_chat(client, model=MODEL, messages=MESSAGES, think=True))
+
+    def session(index, delay):
+        time.sleep(delay)
+        began = time.perf_counter()
+        stream, leading = flights.subscribe("prompt") if coalesce else (None, False)
+        ticket = None
+        if stream is None:
+            ticket = controller.enqueue(index)
+            controller.wait(ticket)
+            if coalesce:
+                stream, leading = flights.subscribe("prompt", lambda: start(ticket))
+            else:
+                stream, leading = start(ticket), True
+        if not leading and ticket is not None:
+            controller.release(ticket)
+        for _ in stream:
+            pass
+        durations.append(time.perf_counter() - began)
+
+    rng = random.Random(0)
+    threads = [threading.Thread(target=session, args=(i, rng.uniform(0, spread))) for i in range(sessions)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "generations": server.total_requests - requests_before,
+        "wall": time.perf_counter() - began,
+        "p50": percentile(durations, 50),
+        "p95": percentile(durations, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--spread", type=float, default=2.0, help="seconds over which the requests arrive")
+    parser.add_argument("--max-concurrent", type=int, default=2)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with MockOllamaServer(responder=SyntheticResponder(200, 80, ttft=0.1, token_delay=args.token_delay)) as server:
+        print(f"{'':<12} {'generations':>11} {'wall':>8} {'p50':>8} {'p95':>8}")
+        for label, coalesce in (("separate", False), ("coalesced", True)):
+            result = run(server, args.sessions, args.spread, args.max_concurrent, coalesce)
+            print(f"{label:<12} {result['generations']:>11} {result['wall']:>7.2f}s "
+                  f"{result['p50']:>7.2f}s {result['p95']:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Wall time of a side-by-side comparison: streams one after another versus concurrently.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_compare --efforts low,medium,high [--max-concurrent 2]
+
+Sends the same prompt at each reasoning effort to a local mock Ollama server, first
+one stream at a time through the synchronous client, then all at once through the
+asyncio engine used by the comparison view, admitted by the same admission controller
+as the app. The comparison is one ticket, so every column should start without
+waiting for another to finish.
+"""
+import argparse
+import time
+
+from admission import DEFAULT_MAX_CONCURRENT, AdmissionController
+from async_engine import AsyncStreamEngine
+from mock_ollama import MockOllamaServer, SyntheticResponder
+from ollama_client import create_client, stream_chat
+from request_builder import system_message
+from router import BackendRouter
+from streaming import CancelToken
+
+MODEL = "gpt-oss:20b"
+# Medium-effort reasoning length; the mock scales it by the requested effort level
+THINKING_TOKENS = 180
+
+
+def requests_for(efforts):
+    return [{"model": MODEL, "messages": [system_message(), {"role": "user", "content": "Compare us"}],
+             "think": effort, "reasoning_effort": effort} for effort in efforts]
+
+
+def run_sequential(host, efforts):
+    client = create_client(host)
+    durations = []
+    for request in requests_for(efforts):
+        request.pop("reasoning_effort")
+        start = time.perf_counter()
+        for chunk in stream_chat(client, **request):
+            pass
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run_concurrent(engine, efforts, controller):
+    start = time.perf_counter()
+    streams = engine.stream_many(requests_for(efforts), CancelToken(), controller, "bench")
+    durations = [None] * len(efforts)
+    for batch in streams.batches():
+        for index, _, chunk in batch:
+            if chunk.get("done"):
+                durations[index] = time.perf_counter() - start
+    streams.join()
+    return time.perf_counter() - start, durations, streams.queue_waits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--efforts", default="low,medium,high", help="comma-separated efforts to compare")
+    parser.add_argument("--token-delay", type=float, default=0.004)
+    parser.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT)
+    args = parser.parse_args()
+    efforts = args.efforts.split(",")
+
+    with MockOllamaServer(responder=SyntheticResponder(THINKING_TOKENS, 60, ttft=0.05, token_delay=args.token_delay)) as server:
+        durations = run_sequential(server.url, efforts)
+        engine = AsyncStreamEngine(BackendRouter([server.url]))
+        controller = AdmissionController(args.max_concurrent)
+        wall, concurrent, waits = run_concurrent(engine, efforts, controller)
+        engine.close()
+
+    print(f"{'effort':<8} {'alone':>8} {'in parallel':>12} {'queue wait':>11}")
+    for index, (effort, alone, together) in enumerate(zip(efforts, durations, concurrent)):
+        print(f"{effort:<8} {alone:>7.2f}s {together:>11.2f}s {waits.get(index, 0.0):>10.3f}s")
+    print(f"\nsequential total {sum(durations):.2f}s, concurrent wall {wall:.2f}s, slowest single stream {max(durations):.2f}s")
+    print(f"slots in use afterwards: {controller.snapshot()['active']} of {args.max_concurrent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Websocket bytes and browser frame times for a long reasoning trace, markdown vs deltas.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_delta [--thinking-tokens 20000] [--speed 20] [--browser]
+
+A synthetic trace (or ``--fixture``) is replayed by the mock Ollama server into the
+real ``chat_ui.py``, once re-rendering the whole reasoning as markdown
+(``GPT_OSS_DELTA_STREAMING=0``) and once through the delta component.
+
+By default the turn runs in Streamlit's AppTest harness and every ForwardMsg the
+script produces is measured: the bytes handed to the websocket, before Streamlit
+merges updates the browser hasn't picked up yet. ``--browser`` instead starts
+``streamlit run`` and drives headless Chromium with Playwright
+(``pip install playwright && playwright install chromium``), counting the websocket
+frames actually received and sampling ``requestAnimationFrame`` intervals and long
+tasks while the answer streams.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.bench_render import synthetic_stream
+from instrumentation import percentile
+from mock_ollama import MockOllamaServer
+from stream_fixtures import FixtureResponder, load_fixture, parse_speed
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chat_ui.py")
+MODES = (("markdown", "0"), ("delta", "1"))
+PROMPT = "Delta streaming benchmark"
+
+FRAME_SAMPLER = """() => {
+    window.__benchFrames = [];
+    window.__benchLongTasks = [];
+    let last = performance.now();
+    const tick = (now) => {
+        window.__benchFrames.push(now - last);
+        last = now;
+        requestAnimationFrame(tick);
+    };
+    requestAnimationFrame(tick);
+    new PerformanceObserver((list) => {
+        window.__benchLongTasks.push(...list.getEntries().map((entry) => entry.duration));
+    }).observe({ type: "longtask" });
+}"""
+
+
+def is_thinking_update(msg):
+    """Whether a ForwardMsg redraws the live reasoning block, in either mode."""
+    if msg.WhichOneof("type") != "delta" or msg.delta.WhichOneof("type") != "new_element":
+        return False
+    element = msg.delta.new_element
+    kind = element.WhichOneof("type")
+    return kind == "bidi_component" or (kind == "markdown" and "thinking-container" in element.markdown.body)
+
+
+def summarize_updates(sizes, thinking_tokens):
+    tenth = max(len(sizes) // 10, 1)
+    return {
+        "updates": len(sizes),
+        "thinking_kb": sum(sizes) / 1024,
+        "bytes_per_token": sum(sizes) / thinking_tokens,
+        "first_tenth_avg_bytes": sum(sizes[:tenth]) / tenth if sizes else 0.0,
+        "last_tenth_avg_bytes": sum(sizes[-tenth:]) / tenth if sizes else 0.0,
+    }
+
+
+def measure_apptest(flag, thinking_tokens):
+    """Bytes the script hands to the websocket during one turn."""
+    os.environ["GPT_OSS_DELTA_STREAMING"] = flag
+    app = AppTest.from_file(APP, default_timeout=600)
+    app.run()
+    total, thinking = [], []
+
+    def before_enqueue(msg):
+        size = msg.ByteSize()
+        total.append(size)
+        if is_thinking_update(msg):
+            thinking.append(size)
+
+    ForwardMsgQueue.on_before_enqueue_msg(before_enqueue)
+    start = time.perf_counter()
+    try:
+        app.chat_input[0].set_value(PROMPT).run()
+    finally:
+        ForwardMsgQueue.on_before_enqueue_msg(None)
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    result = {"turn_seconds": time.perf_counter() - start, "turn_kb": sum(total) / 1024}
+    result.update(summarize_updates(thinking, thinking_tokens))
+    return result
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/_stcore/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Streamlit did not start at {url}")
+
+
+def measure_browser(flag, ollama_url, timeout):
+    """Websocket frames and frame timing seen by headless Chromium during one turn."""
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        sys.exit("--browser needs Playwright: pip install playwright && playwright install chromium")
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, OLLAMA_HOST=ollama_url, GPT_OSS_DELTA_STREAMING=flag)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(url)
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch()
+            page = browser.new_page(viewport={"width": 1280, "height": 900})
+            frames = []
+            page.on("websocket", lambda ws: ws.on("framereceived", lambda payload: frames.append(len(payload))))
+            page.goto(url)
+            chat_input = page.wait_for_selector('[data-testid="stChatInputTextArea"]', timeout=timeout * 1000)
+            page.wait_for_load_state("networkidle")
+            page.evaluate(FRAME_SAMPLER)
+            del frames[:]
+            start = time.perf_counter()
+            chat_input.fill(PROMPT)
+            chat_input.press("Enter")
+            page.get_by_text("Reasoning complete").wait_for(timeout=timeout * 1000)
+            elapsed = time.perf_counter() - start
+            frame_times = page.evaluate("window.__benchFrames")
+            long_tasks = page.evaluate("window.__benchLongTasks")
+            browser.close()
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "turn_seconds": elapsed,
+        "ws_frames": len(frames),
+        "ws_kb": sum(frames) / 1024,
+        "frame_p50_ms": percentile(frame_times, 50),
+        "frame_p95_ms": percentile(frame_times, 95),
+        "frame_max_ms": max(frame_times, default=0.0),
+        "frames_over_50ms": sum(1 for t in frame_times if t > 50),
+        "long_tasks_ms": sum(long_tasks),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", help="recorded stream to replay instead of a synthetic trace")
+    parser.add_argument("--thinking-tokens", type=int, default=20000)
+    parser.add_argument("--content-tokens", type=int, default=400)
+    parser.add_argument("--speed", default="20", help="replay speed: recorded, burst, stall or a factor")
+    parser.add_argument("--browser", action="store_true", help="measure in headless Chromium (needs Playwright)")
+    parser.add_argument("--timeout", type=float, default=900.0, help="seconds to wait for the turn in --browser mode")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture) if args.fixture else synthetic_stream(args.thinking_tokens, args.content_tokens)
+    thinking_tokens = sum(1 for chunk in fixture if chunk["message"].get("thinking"))
+    # No history database or recorded fixtures, and no model warm-up of the replayed trace
+    os.environ["GPT_OSS_CONVERSATION_DB"] = ""
+    os.environ["GPT_OSS_WARM_MODELS"] = ""
+    os.environ.pop("GPT_OSS_RECORD_DIR", None)
+    responder = FixtureResponder([fixture], speed=parse_speed(args.speed))
+    results = {}
+    with MockOllamaServer(responder=responder) as server:
+        os.environ["OLLAMA_HOST"] = server.url
+        for label, flag in MODES:
+            if args.browser:
+                results[label] = measure_browser(flag, server.url, args.timeout)
+            else:
+                results[label] = measure_apptest(flag, thinking_tokens)
+
+    print(f"{thinking_tokens:,} thinking tokens, {'browser' if args.browser else 'AppTest'}")
+    keys = list(results["markdown"])
+    print(f"{'':<24}" + "".join(f"{label:>14}" for label in results))
+    for key in keys:
+        print(f"{key:<24}" + "".join(
+            f"{values[key]:>14,.1f}" if isinstance(values[key], float) else f"{values[key]:>14,}"
+            for values in results.values()
+        ))
+
+
+if __name__ == "__main__":
+    main()
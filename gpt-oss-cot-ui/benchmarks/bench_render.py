@@ -0,0 +1,115 @@
+"""Replay a long recorded stream through the old and the throttled rendering paths.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_render [--fixture stream.jsonl]
+
+Fixtures are recorded with ``stream_fixtures.py``. Without one a synthetic
+high-effort stream is generated.
+"""
+import argparse
+import random
+import time
+
+from render import RenderScheduler, thinking_block
+from stream_fixtures import load_fixture
+
+
+class FakePlaceholder:
+    """Stand-in for st.empty() that serializes what would go over the websocket."""
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+    def markdown(self, body, **kwargs):
+        self.calls += 1
+        self.bytes += len(body.encode("utf-8"))
+
+
+class SimulatedClock:
+    """Clock driven by the recorded chunk offsets so the replay runs at full speed."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def synthetic_stream(thinking_tokens=6000, content_tokens=1500, tokens_per_second=60.0, seed=0):
+    """Generate a stream shaped like a high reasoning effort answer."""
+    rng = random.Random(seed)
+    words = ["the", "train", "speed", "so", "we", "compute", "distance", "then", "check",
+             "miles", "hours", "25%", "faster", "total", "answer", "is", "wait", "let's"]
+    chunks, t = [], 0.0
+    for field, count in (("thinking", thinking_tokens), ("content", content_tokens)):
+        for _ in range(count):
+            t += rng.expovariate(tokens_per_second)
+            chunks.append({"t": t, "message": {"role": "assistant", field: " " + rng.choice(words)}, "done": False})
+    chunks.append({"t": t, "message": {"role": "assistant", "content": ""}, "done": True})
+    return chunks
+
+
+def replay_naive(chunks):
+    """The original loop: re-render the whole buffer on every chunk."""
+    thinking_box, response_box = FakePlaceholder(), FakePlaceholder()
+    thinking_content, response_content, steps = "", "", 0
+    for chunk in chunks:
+        message = chunk["message"]
+        if message.get("thinking"):
+            thinking_content += message["thinking"]
+            steps += 1
+            thinking_box.markdown(thinking_block(thinking_content, steps), unsafe_allow_html=True)
+        if message.get("content"):
+            response_content += message["content"]
+            response_box.markdown(response_content)
+    return thinking_box, response_box
+
+
+def replay_scheduled(chunks, interval, max_chunks):
+    """The throttled loop used by process_thinking_stream."""
+    clock = SimulatedClock()
+    thinking_box, response_box = FakePlaceholder(), FakePlaceholder()
+    steps = 0
+    thinking = RenderScheduler(thinking_box, formatter=lambda text: thinking_block(text, steps),
+                               interval=interval, max_chunks=max_chunks, clock=clock,
+                               unsafe_allow_html=True)
+    response = RenderScheduler(response_box, interval=interval, max_chunks=max_chunks, clock=clock)
+    for chunk in chunks:
+        clock.now = chunk.get("t", clock.now)
+        message = chunk["message"]
+        if message.get("thinking"):
+            steps += 1
+            thinking.append(message["thinking"])
+        if message.get("content"):
+            response.append(message["content"])
+    thinking.flush()
+    response.flush()
+    return thinking_box, response_box
+
+
+def report(label, replay):
+    start = time.perf_counter()
+    thinking_box, response_box = replay()
+    elapsed = time.perf_counter() - start
+    calls = thinking_box.calls + response_box.calls
+    pushed = thinking_box.bytes + response_box.bytes
+    print(f"{label:<12} render calls: {calls:>7,}  bytes pushed: {pushed:>14,}  wall time: {elapsed * 1000:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", help="recorded stream (JSONL)")
+    parser.add_argument("--interval", type=float, default=0.075, help="flush interval in seconds")
+    parser.add_argument("--max-chunks", type=int, default=32, help="flush after this many chunks")
+    args = parser.parse_args()
+
+    chunks = load_fixture(args.fixture) if args.fixture else synthetic_stream()
+    print(f"Replaying {len(chunks):,} chunks")
+    report("before", lambda: replay_naive(chunks))
+    report("after", lambda: replay_scheduled(chunks, args.interval, args.max_chunks))
+
+
+if __name__ == "__main__":
+    main()
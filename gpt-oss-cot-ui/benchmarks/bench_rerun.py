@@ -0,0 +1,102 @@
+"""Time a full Streamlit rerun of the chat page as the conversation grows.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_rerun --turns 10,50,100,200
+
+Loads a synthetic history into the app with Streamlit's AppTest harness and times
+reruns in three modes: the default window of recent messages, the full history, and
+the full history with every reasoning expander open (close to what every rerun cost
+before thinking blocks were rendered lazily). Markdown KB is the text on the page;
+sent KB estimates what a rerun actually transfers once Streamlit's forward-message
+cache replaces unchanged elements above ``global.minCachedMessageSize`` with a
+hash reference.
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import time
+import uuid
+
+from streamlit import config
+from streamlit.testing.v1 import AppTest
+
+from request_builder import system_message
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chat_ui.py")
+# The default window never needs more than this many messages
+FULL_HISTORY = 10 ** 6
+# Approximate size of a hash reference message
+REFERENCE_BYTES = 64
+
+
+def synthetic_history(turns, thinking_words=400, answer_words=150):
+    messages = [system_message()]
+    for turn in range(turns):
+        messages.append({"id": uuid.uuid4().hex, "role": "user",
+                         "content": f"Question {turn}: explain step {turn} in detail."})
+        messages.append({
+            "id": uuid.uuid4().hex,
+            "role": "assistant",
+            "content": " ".join(f"answer{turn}-{i}" for i in range(answer_words)),
+            "thinking": " ".join(f"thought{turn}-{i}" for i in range(thinking_words)),
+            "response_time": 1.0,
+        })
+    return messages
+
+
+def element_digests(app):
+    """Map each markdown element's content hash to its size."""
+    digests = {}
+    for element in app.markdown:
+        data = element.proto.SerializeToString(deterministic=True)
+        digests[hashlib.md5(data).hexdigest()] = len(data)
+    return digests
+
+
+def sent_bytes(previous, current):
+    """Bytes a rerun transfers when the browser already holds the previous run's elements."""
+    threshold = config.get_option("global.minCachedMessageSize")
+    return sum(REFERENCE_BYTES if size >= threshold and digest in previous else size
+               for digest, size in current.items())
+
+
+def time_reruns(turns, mode, repeat):
+    app = AppTest.from_file(APP, default_timeout=120)
+    messages = synthetic_history(turns)
+    app.session_state["messages"] = messages
+    if mode != "window":
+        app.session_state["history_limit"] = FULL_HISTORY
+    if mode == "expanded":
+        for message in messages:
+            if message["role"] == "assistant":
+                app.session_state[f"thinking_{message['id']}"] = True
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    previous = element_digests(app)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        app.run()
+        samples.append(time.perf_counter() - start)
+    markdown_bytes = sum(len(element.value.encode("utf-8")) for element in app.markdown)
+    return statistics.median(samples), markdown_bytes, sent_bytes(previous, element_digests(app))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", default="10,50,100,200", help="comma-separated history lengths")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'turns':>6}  {'mode':<9} {'rerun ms':>9} {'markdown KB':>12} {'sent KB':>9}")
+    for turns in (int(value) for value in args.turns.split(",")):
+        for mode in ("window", "full", "expanded"):
+            elapsed, markdown_bytes, sent = time_reruns(turns, mode, args.repeat)
+            print(f"{turns:>6}  {mode:<9} {elapsed * 1000:>9.1f} {markdown_bytes / 1024:>12.1f} {sent / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Exercise the backend router against local mock Ollama servers.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_router --sessions 12 --turns 4
+
+Starts three mock backends, one of them twice as slow, and runs concurrent
+multi-turn conversations through one router. Halfway through, one fast backend
+goes down and later comes back. The report shows how requests were spread, whether
+every conversation stayed on one backend, and when the dead host was ejected and
+re-added.
+"""
+import argparse
+import threading
+import time
+from collections import defaultdict
+
+from mock_ollama import MockOllamaServer, SyntheticResponder
+from router import BackendRouter
+
+MODEL = "gpt-oss:20b"
+
+
+def start_backends(token_delays, port=0):
+    return [MockOllamaServer(port=port, responder=SyntheticResponder(60, 20, ttft=0.01, token_delay=delay)).start()
+            for delay in token_delays]
+
+
+def run_conversations(router, sessions, turns, placements, errors, outage=None):
+    def conversation(index):
+        conversation_id = f"conversation-{index}"
+        messages = [{"role": "user", "content": f"Question {index}"}]
+        for turn in range(turns):
+            if outage and index == 0 and turn == turns // 2:
+                outage()
+            try:
+                stream = router.stream_chat(conversation_id=conversation_id, model=MODEL, messages=messages, think=True)
+                for chunk in stream:
+                    pass
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            placements[conversation_id].append(router.backend_for(conversation_id))
+            messages.append({"role": "assistant", "content": "..."})
+            messages.append({"role": "user", "content": f"Follow-up {turn}"})
+
+    threads = [threading.Thread(target=conversation, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=12)
+    parser.add_argument("--turns", type=int, default=4)
+    args = parser.parse_args()
+
+    servers = start_backends([0.002, 0.002, 0.004])
+    hosts = [server.url for server in servers]
+    router = BackendRouter(hosts, eject_after=1, eject_seconds=0.5, health_interval=0.25, retries=2)
+
+    events = []
+    done = threading.Event()
+
+    def monitor():
+        # Log health transitions as the router sees them
+        previous = {host: True for host in hosts}
+        while not done.wait(0.05):
+            for backend in router.snapshot():
+                if backend["healthy"] != previous[backend["host"]]:
+                    previous[backend["host"]] = backend["healthy"]
+                    action = "re-added" if backend["healthy"] else "ejected"
+                    events.append(f"{time.strftime('%X')} router {action} {backend['host']}")
+
+    threading.Thread(target=monitor, daemon=True).start()
+
+    def outage():
+        down = servers[0]
+        port = down.server_address[1]
+        down.stop()
+        events.append(f"{time.strftime('%X')} stopped {hosts[0]}")
+
+        def restore():
+            time.sleep(1.5)
+            servers[0] = MockOllamaServer(port=port, responder=SyntheticResponder(60, 20, ttft=0.01, token_delay=0.002)).start()
+            events.append(f"{time.strftime('%X')} restarted {hosts[0]}")
+
+        threading.Thread(target=restore, daemon=True).start()
+
+    placements, errors = defaultdict(list), []
+    start = time.perf_counter()
+    try:
+        run_conversations(router, args.sessions, args.turns, placements, errors, outage)
+        elapsed = time.perf_counter() - start
+        # Give the health probe time to bring the restarted backend back
+        time.sleep(2.5)
+    finally:
+        done.set()
+        router.close()
+        for server in servers:
+            server.stop()
+
+    print(f"{args.sessions} conversations x {args.turns} turns in {elapsed:.2f}s\n")
+    for backend in router.snapshot():
+        state = "healthy" if backend["healthy"] else "ejected"
+        rate = f"{backend['tokens_per_second']:.0f} tok/s" if backend["tokens_per_second"] else "-"
+        print(f"  {backend['host']:<28} requests {backend['requests']:>4}  {rate:>10}  {state}")
+    moved = sum(1 for hosts_used in placements.values() if len(set(hosts_used)) > 1)
+    print(f"\nconversations that changed backend: {moved} (only expected for ones pinned to the stopped host)")
+    for event in events:
+        print(f"  {event}")
+    if errors:
+        # Streams already running on the stopped host can't fail over mid-answer
+        print(f"interrupted streams: {len(errors)} (first: {errors[0]})")
+
+
+if __name__ == "__main__":
+    main()
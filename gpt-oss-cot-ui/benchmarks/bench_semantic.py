@@ -0,0 +1,97 @@
+"""Semantic cache lookup latency against cache size, brute force vs the coarse index.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_semantic [--sizes 1000,10000,100000,200000] [--dim 768]
+
+The cache is filled with synthetic embeddings clustered around topics, the way real
+question embeddings are, in a temporary directory. Queries are stored questions with
+a little noise added, standing in for rewordings. Every size is looked up with one
+matrix-vector product over all rows; sizes above the cache's index threshold are also
+looked up through the IVF index, reporting how often it finds the same best row
+(recall) and how long the index took to build. The memory-mapped vector file is also
+reopened to time a restart.
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from instrumentation import percentile
+from semantic_cache import DEFAULT_IVF_THRESHOLD, DEFAULT_NPROBE, SemanticCache, normalize
+
+SCOPE = "0" * 64
+TOPICS = 2000
+BATCH = 50_000
+
+
+def clustered_vectors(rng, count, dim, centers):
+    topics = rng.integers(len(centers), size=count)
+    return normalize(centers[topics] + rng.standard_normal((count, dim), dtype=np.float32) * (0.8 / np.sqrt(dim)))
+
+
+def fill(cache, rng, size, dim, centers):
+    added = cache.snapshot()["entries"]
+    while added < size:
+        count = min(BATCH, size - added)
+        vectors = clustered_vectors(rng, count, dim, centers)
+        cache.add_many(vectors, [SCOPE] * count, [""] * count, [{}] * count)
+        added += count
+
+
+def time_lookups(cache, queries):
+    durations, rows = [], []
+    for query in queries:
+        start = time.perf_counter()
+        row, _ = cache.search(query, [SCOPE])[0]
+        durations.append(time.perf_counter() - start)
+        rows.append(row)
+    return durations, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,200000", help="comma-separated cache sizes")
+    parser.add_argument("--dim", type=int, default=768, help="embedding size (768 for nomic-embed-text)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = normalize(rng.standard_normal((TOPICS, args.dim), dtype=np.float32))
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    print(f"dim {args.dim}, {args.queries} lookups per size, index above {DEFAULT_IVF_THRESHOLD:,} rows, "
+          f"nprobe {args.nprobe}")
+    print(f"{'entries':>10} {'MB':>7} {'brute p50':>10} {'p95':>8} {'ivf p50':>9} {'p95':>8} {'recall':>7} {'build':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        # Nothing is indexed automatically, so each size is timed both ways
+        cache = SemanticCache(directory, None, ivf_threshold=float("inf"), max_entries=sizes[-1], nprobe=args.nprobe)
+        for size in sizes:
+            fill(cache, rng, size, args.dim, centers)
+            rows = rng.choice(size, args.queries, replace=False)
+            queries = normalize(cache._vectors[rows] + rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+                                * (0.2 / np.sqrt(args.dim)))
+            brute, exact = time_lookups(cache, queries)
+            line = (f"{size:>10,} {size * args.dim * 4 / 1e6:>7.0f} {percentile(brute, 50) * 1e3:>8.2f}ms "
+                    f"{percentile(brute, 95) * 1e3:>6.2f}ms")
+            if size > DEFAULT_IVF_THRESHOLD:
+                start = time.perf_counter()
+                cache.build_index()
+                build = time.perf_counter() - start
+                indexed, found = time_lookups(cache, queries)
+                recall = np.mean([a == b for a, b in zip(exact, found)])
+                line += (f" {percentile(indexed, 50) * 1e3:>7.2f}ms {percentile(indexed, 95) * 1e3:>6.2f}ms"
+                         f" {recall:>7.1%} {build:>6.1f}s")
+                cache._index = None
+            print(line)
+        cache.close()
+
+        start = time.perf_counter()
+        reopened = SemanticCache(directory, None, ivf_threshold=float("inf"), max_entries=sizes[-1])
+        print(f"reopened {reopened.snapshot()['entries']:,} entries in {time.perf_counter() - start:.2f}s")
+        reopened.close()
+
+
+if __name__ == "__main__":
+    main()
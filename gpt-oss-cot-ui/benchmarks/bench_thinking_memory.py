@@ -0,0 +1,107 @@
+"""Memory held by the reasoning text of many long sessions, plain versus compressed.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_thinking_memory --sessions 50 --turns 40
+
+Builds the message lists of concurrent sessions whose turns carry ``high`` effort
+sized reasoning, then measures the Python heap they occupy (with tracemalloc) when
+the thinking is kept as plain strings, compressed by a ``ThinkingArchive``, and
+compressed under a memory cap that spills to disk. The text is drawn from a Zipf-like
+vocabulary so it compresses roughly like real prose rather than repeated filler.
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from thinking_archive import ThinkingArchive
+
+COMMON_WORDS = (
+    "the of and to a in is that it for as with be on not this are by we so if "
+    "then but which can step check answer value case need first next because "
+    "therefore let compute consider given since now sum number result approach"
+).split()
+
+
+def make_vocabulary(rng, size=5000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = COMMON_WORDS + ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+    # Zipf weights: the word of rank r is drawn with probability proportional to 1/r
+    cumulative, total = [], 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1 / rank
+        cumulative.append(total)
+    return words, cumulative
+
+
+def thinking_text(rng, vocabulary, words):
+    return " ".join(rng.choices(vocabulary[0], cum_weights=vocabulary[1], k=words))
+
+
+def build_sessions(sessions, turns, thinking_words, archive=None, seed=0):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    result = []
+    for _ in range(sessions):
+        messages = []
+        for turn in range(turns):
+            thinking = thinking_text(rng, vocabulary, thinking_words)
+            messages.append({"role": "user", "content": f"Question {turn}"})
+            messages.append({
+                "role": "assistant",
+                "content": thinking_text(rng, vocabulary, thinking_words // 8),
+                "thinking": archive.compress(thinking) if archive else thinking,
+                "response_time": 1.0,
+            })
+        result.append(messages)
+    return result
+
+
+def measure(label, sessions, turns, thinking_words, archive=None):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = build_sessions(sessions, turns, thinking_words, archive)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    line = f"{label:<28} {current / 2 ** 20:>9.1f} MB  built in {elapsed:5.2f}s"
+    if archive:
+        stats = archive.stats()
+        line += f"  (resident {stats['memory_bytes'] / 2 ** 20:.1f} MB, spilled {stats['spilled_bytes'] / 2 ** 20:.1f} MB)"
+        # Cost of opening one reasoning block, from memory and from the spill file
+        sample = [message["thinking"] for messages in data for message in messages[1::2]]
+        for name, item in (("newest", sample[-1]), ("oldest", sample[0])):
+            start = time.perf_counter()
+            str(item)
+            line += f"\n{'':<28} open {name}: {(time.perf_counter() - start) * 1000:.2f} ms"
+    print(line)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--thinking-words", type=int, default=1500, help="words of reasoning per answer")
+    parser.add_argument("--cap-mb", type=float, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.turns} turns, {args.thinking_words} reasoning words per turn\n")
+    measure("plain strings", args.sessions, args.turns, args.thinking_words)
+    measure("compressed, no cap", args.sessions, args.turns, args.thinking_words, ThinkingArchive(2 ** 62))
+    archive = ThinkingArchive(int(args.cap_mb * 2 ** 20))
+    data = measure(f"compressed, {args.cap_mb:g} MB cap", args.sessions, args.turns, args.thinking_words, archive)
+    # Half the sessions end; their spilled reasoning is reclaimed when the next turn is stored
+    before = archive.stats()["spill_file_bytes"]
+    del data[: len(data) // 2]
+    archive.compress(" ".join(["step"] * args.thinking_words))
+    stats = archive.stats()
+    print(f"{'':<28} half the sessions ended: spill file {before / 2 ** 20:.1f} -> "
+          f"{stats['spill_file_bytes'] / 2 ** 20:.1f} MB ({stats['compactions']} compactions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Multi-tool turn latency: tool calls run one after another versus concurrently.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_tools [--rounds 5]
+
+A round mixes I/O-bound calls (sleeps, standing in for searches and page fetches)
+with CPU-bound ones (busy loops in the worker processes). Each round is timed on
+its own and inside a full tool-calling turn against the mock server. Concurrently,
+a round should cost about its slowest call instead of the sum. CPU-bound calls only
+overlap with each other when there are cores to spare.
+
+The sandbox limits are checked too: a call that never returns, one that allocates
+too much, and how many worker processes served all the CPU-bound calls.
+"""
+import argparse
+import os
+import time
+
+from instrumentation import percentile
+from mock_ollama import MockOllamaServer, SyntheticResponder, ToolCallResponder
+from ollama_client import create_client, stream_chat
+from tool_runtime import CPU, IO, Tool, ToolExecutor, ToolRegistry, tool_loop
+from tools import run_python
+
+MODEL = "gpt-oss:20b"
+MESSAGES = [{"role": "user", "content": "Look these up and compute the totals."}]
+CALLS = [
+    ("lookup", {"seconds": 0.2}),
+    ("lookup", {"seconds": 0.4}),
+    ("lookup", {"seconds": 0.8}),
+    ("crunch", {"seconds": 0.3}),
+    ("crunch", {"seconds": 0.2}),
+]
+
+
+def lookup(seconds):
+    time.sleep(seconds)
+    return f"waited {seconds}s"
+
+
+def crunch(seconds):
+    end = time.process_time() + seconds
+    count = 0
+    while time.process_time() < end:
+        count += 1
+    return f"{count} iterations on pid {os.getpid()}"
+
+
+def registry():
+    return ToolRegistry([
+        Tool("lookup", lookup, "Wait, like a slow web request.", kind=IO),
+        Tool("crunch", crunch, "Spin the CPU.", kind=CPU),
+        Tool("run_python", run_python, "Run Python code.", kind=CPU, timeout=1.0, memory_mb=64),
+    ])
+
+
+class SequentialExecutor(ToolExecutor):
+    """The same pools, but one call at a time."""
+
+    def run(self, calls, scope=None):
+        results = []
+        for call in calls:
+            results.extend(super().run([call], scope))
+        return results
+
+
+def as_calls(pairs):
+    return [{"name": name, "arguments": arguments} for name, arguments in pairs]
+
+
+def time_rounds(executor, rounds):
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        executor.run(as_calls(CALLS))
+        durations.append(time.perf_counter() - start)
+    return percentile(durations, 50)
+
+
+def time_turn(executor, server):
+    client = create_client(server.url)
+
+    def chat(messages, tools):
+        return stream_chat(client, model=MODEL, messages=messages, think=True, tools=tools)
+
+    start = time.perf_counter()
+    for _ in tool_loop(chat, MESSAGES, executor):
+        pass
+    return time.perf_counter() - start
+
+
+def check_limits(executor):
+    results = executor.run(as_calls([
+        ("run_python", {"code": "while True: pass"}),
+        ("run_python", {"code": "data = bytearray(512 * 1024 * 1024)"}),
+    ]))
+    pids = {executor.run(as_calls([("crunch", {"seconds": 0.01})]))[0]["content"].split()[-1] for _ in range(10)}
+    return results, pids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--cpu-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    slowest = max(arguments["seconds"] for _, arguments in CALLS)
+    total = sum(arguments["seconds"] for _, arguments in CALLS)
+    print(f"{len(CALLS)} calls per round, slowest {slowest:.2f}s, sum {total:.2f}s, {os.cpu_count()} CPU(s)")
+    responder = ToolCallResponder(CALLS, SyntheticResponder(100, 40, ttft=0.05, token_delay=0.002))
+    with MockOllamaServer(responder=responder) as server:
+        print(f"{'':<12} {'round p50':>10} {'turn':>8}")
+        for label, executor_class in (("sequential", SequentialExecutor), ("concurrent", ToolExecutor)):
+            executor = executor_class(registry(), cpu_workers=args.cpu_workers).warm()
+            try:
+                round_time = time_rounds(executor, args.rounds)
+                turn_time = time_turn(executor, server)
+                print(f"{label:<12} {round_time:>9.2f}s {turn_time:>7.2f}s")
+                # Reported for the concurrent run, which comes last
+                snapshot = executor.snapshot()
+            finally:
+                executor.close()
+
+    for name, stats in snapshot["tools"].items():
+        print(f"  {name:<8} {stats['calls']:>3} calls, p50 {stats['p50']:.2f}s / p95 {stats['p95']:.2f}s")
+    for kind, usage in snapshot["pools"].items():
+        print(f"  {kind} pool: {usage['workers']} workers, at most {usage['peak']} calls in flight")
+
+    executor = ToolExecutor(registry(), cpu_workers=args.cpu_workers)
+    try:
+        results, pids = check_limits(executor)
+        for result in results:
+            print(f"  limit check: {result['outcome']} after {result['seconds']:.2f}s: {result['content']}")
+        print(f"  10 CPU calls served by {len(pids)} worker process(es), {executor.restarts} pool restart(s)")
+    finally:
+        executor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Cost of the tracing spans, off and on: per span and per rerun of the real app.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.bench_tracing [--spans 200000] [--reruns 30]
+
+The span cost is timed in a tight loop outside any trace (tracing off) and inside
+one (tracing on). Then ``chat_ui.py`` runs in Streamlit's AppTest harness with a
+short conversation, once with ``GPT_OSS_TRACING`` unset and once with it set,
+rerunning the script ``--reruns`` times after a turn against the mock server.
+"""
+import argparse
+import os
+import time
+
+from streamlit.testing.v1 import AppTest
+
+import tracing
+from benchmarks.bench_delta import APP
+from instrumentation import percentile
+from mock_ollama import MockOllamaServer, SyntheticResponder
+
+
+def span_cost(count):
+    start = time.perf_counter()
+    for _ in range(count):
+        with tracing.span("phase"):
+            pass
+    return (time.perf_counter() - start) / count
+
+
+def time_reruns(enabled, reruns):
+    os.environ["GPT_OSS_TRACING"] = "1" if enabled else ""
+    app = AppTest.from_file(APP, default_timeout=120)
+    app.run()
+    app.chat_input[0].set_value("Tracing benchmark").run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    durations = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        durations.append(time.perf_counter() - start)
+    tracer = app.session_state["tracer"] if "tracer" in app.session_state else None
+    spans = len(tracer.traces[-1].spans) if tracer else 0
+    return percentile(durations, 50), percentile(durations, 95), spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spans", type=int, default=200_000)
+    parser.add_argument("--reruns", type=int, default=30)
+    args = parser.parse_args()
+
+    off = span_cost(args.spans)
+    with tracing.SessionTracer(history=1).trace("bench"):
+        on = span_cost(args.spans)
+    print(f"span off {off * 1e9:,.0f} ns, on {on * 1e9:,.0f} ns")
+
+    os.environ["GPT_OSS_CONVERSATION_DB"] = ""
+    os.environ["GPT_OSS_WARM_MODELS"] = ""
+    os.environ.pop("GPT_OSS_RECORD_DIR", None)
+    with MockOllamaServer(responder=SyntheticResponder(200, 80, ttft=0.01, token_delay=0.0005)) as server:
+        os.environ["OLLAMA_HOST"] = server.url
+        print(f"{'':<12} {'rerun p50':>10} {'p95':>8} {'spans':>6}")
+        for label, enabled in (("tracing off", False), ("tracing on", True)):
+            p50, p95, spans = time_reruns(enabled, args.reruns)
+            print(f"{label:<12} {p50 * 1e3:>8.1f}ms {p95 * 1e3:>6.1f}ms {spans:>6}")
+
+
+if __name__ == "__main__":
+    main()
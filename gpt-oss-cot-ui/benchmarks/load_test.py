@@ -0,0 +1,95 @@
+"""Concurrent-session throughput of the shared Ollama client against a mock server.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.load_test --sessions 16 --turns 5
+
+Each session is a thread that sends ``--turns`` streaming chats back to back, the
+way concurrent Streamlit sessions do. The same load is run with a fresh client per
+request and with the shared pooled client. Pass ``--host`` to target a real server.
+"""
+import argparse
+import threading
+import time
+
+from instrumentation import percentile
+from mock_ollama import MockOllamaServer, SyntheticResponder
+from ollama_client import create_client, stream_chat
+
+MODEL = "gpt-oss:20b"
+
+
+def run_load(sessions, turns, get_client):
+    ttfts, errors, tokens = [], [], [0]
+    lock = threading.Lock()
+
+    def session(index):
+        messages = [{"role": "user", "content": f"Session {index}: explain the train problem."}]
+        for _ in range(turns):
+            client = get_client()
+            start = time.perf_counter()
+            first, count = None, 0
+            try:
+                for chunk in stream_chat(client, model=MODEL, messages=messages, think=True):
+                    if chunk["message"].get("thinking") or chunk["message"].get("content"):
+                        count += 1
+                        if first is None:
+                            first = time.perf_counter() - start
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            with lock:
+                tokens[0] += count
+                if first is not None:
+                    ttfts.append(first)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, len(ttfts), tokens[0], ttfts, errors
+
+
+def report(label, result):
+    elapsed, requests, tokens, ttfts, errors = result
+    print(f"{label}")
+    print(f"  requests: {requests:,} in {elapsed:.2f}s  ({requests / elapsed:,.1f} req/s, {tokens / elapsed:,.0f} tok/s)")
+    if ttfts:
+        print(f"  TTFT p50/p95: {percentile(ttfts, 50) * 1000:,.1f} / {percentile(ttfts, 95) * 1000:,.1f} ms")
+    if errors:
+        print(f"  errors: {len(errors)} (first: {errors[0]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--pool-size", type=int, default=32)
+    parser.add_argument("--host", help="existing Ollama server; a mock is started otherwise")
+    parser.add_argument("--thinking-tokens", type=int, default=200)
+    parser.add_argument("--content-tokens", type=int, default=80)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    server = None
+    host = args.host
+    if host is None:
+        responder = SyntheticResponder(args.thinking_tokens, args.content_tokens, ttft=0.02, token_delay=args.token_delay)
+        server = MockOllamaServer(responder=responder).start()
+        host = server.url
+
+    try:
+        print(f"{args.sessions} sessions x {args.turns} turns against {host}\n")
+        report("fresh client per request", run_load(args.sessions, args.turns, lambda: create_client(host)))
+        shared = create_client(host, max_connections=args.pool_size, max_keepalive=args.pool_size)
+        report("shared pooled client", run_load(args.sessions, args.turns, lambda: shared))
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
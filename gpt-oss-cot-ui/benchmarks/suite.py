@@ -0,0 +1,179 @@
+"""CPU-only benchmark suite for the UI's streaming path, suitable for CI.
+
+Run from the gpt-oss-cot-ui directory:
+
+    python -m benchmarks.suite [--fixture stream.jsonl] [--speed 10] [--json results.json]
+
+Everything runs against a local mock Ollama server replaying a recorded stream (or a
+synthetic high-effort one) through Streamlit's AppTest harness, so the real
+``chat_ui.py`` code is exercised without a GPU:
+
+- render: one turn replayed in a burst, timing the turn and counting placeholder redraws
+- memory: heap growth over several turns in one session (tracemalloc)
+- concurrency: several sessions sending a prompt at once, with their queue waits
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from streamlit.testing.v1 import AppTest
+
+import render
+from benchmarks.bench_render import synthetic_stream
+from instrumentation import percentile
+from mock_ollama import MockOllamaServer
+from stream_fixtures import BURST, FixtureResponder, load_fixture, parse_speed
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chat_ui.py")
+
+
+def track_renderers():
+    """Collect every RenderScheduler the app creates from now on."""
+    created = []
+    original = render.RenderScheduler.__init__
+
+    def init(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        created.append(self)
+
+    render.RenderScheduler.__init__ = init
+    return created
+
+
+def new_session():
+    app = AppTest.from_file(APP, default_timeout=300)
+    app.run()
+    return app
+
+
+def send(app, prompt):
+    app.chat_input[0].set_value(prompt).run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+
+
+def bench_render(responder, renderers):
+    responder.speed = BURST
+    app = new_session()
+    del renderers[:]
+    start = time.perf_counter()
+    send(app, "Render benchmark")
+    elapsed = time.perf_counter() - start
+    return {
+        "turn_seconds": elapsed,
+        "render_calls": sum(r.render_calls for r in renderers),
+        "bytes_pushed": sum(r.bytes_pushed for r in renderers),
+    }
+
+
+def bench_memory(responder, speed, turns):
+    responder.speed = speed
+    app = new_session()
+    tracemalloc.start()
+    samples = []
+    try:
+        for turn in range(turns):
+            send(app, f"Memory benchmark turn {turn}")
+            samples.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+    return {
+        "turns": turns,
+        "heap_after_first_turn_kb": samples[0] / 1024,
+        "heap_after_last_turn_kb": samples[-1] / 1024,
+        "growth_per_turn_kb": (samples[-1] - samples[0]) / max(turns - 1, 1) / 1024,
+    }
+
+
+def bench_concurrency(responder, speed, sessions):
+    responder.speed = speed
+    apps = [new_session() for _ in range(sessions)]
+    durations, queue_waits, errors = [], [], []
+
+    def run(app, index):
+        start = time.perf_counter()
+        try:
+            send(app, f"Concurrency benchmark {index}")
+        except Exception as e:
+            errors.append(repr(e))
+            return
+        durations.append(time.perf_counter() - start)
+        turns = app.session_state["session_stats"].get("turns", [])
+        if turns and turns[-1].get("queue_wait") is not None:
+            queue_waits.append(turns[-1]["queue_wait"])
+
+    # AppTest installs and removes a stand-in runtime around each run, so a session that
+    # finishes first leaves the others' end-of-run cleanup without one; that is harmless
+    default_hook = threading.excepthook
+
+    def excepthook(args):
+        if "Runtime hasn't been created" not in str(args.exc_value):
+            default_hook(args)
+
+    threads = [threading.Thread(target=run, args=(app, i)) for i, app in enumerate(apps)]
+    threading.excepthook = excepthook
+    # For the same reason the delta component, which needs the runtime to mount, can't be
+    # used here; this section measures queueing, so the sessions render plain markdown
+    delta_streaming = os.environ.get("GPT_OSS_DELTA_STREAMING")
+    os.environ["GPT_OSS_DELTA_STREAMING"] = "0"
+    start = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        threading.excepthook = default_hook
+        if delta_streaming is None:
+            os.environ.pop("GPT_OSS_DELTA_STREAMING")
+        else:
+            os.environ["GPT_OSS_DELTA_STREAMING"] = delta_streaming
+    return {
+        "sessions": sessions,
+        "wall_seconds": time.perf_counter() - start,
+        "turn_p50_seconds": percentile(durations, 50),
+        "turn_p95_seconds": percentile(durations, 95),
+        "queue_wait_p95_seconds": percentile(queue_waits, 95),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", action="append", help="recorded stream to replay (repeatable)")
+    parser.add_argument("--speed", default="10", help="replay speed for memory/concurrency: recorded, stall or a factor")
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=6)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    fixtures = [load_fixture(path) for path in args.fixture] if args.fixture else [
+        synthetic_stream(thinking_tokens=1500, content_tokens=400)
+    ]
+    # Keep the suite self-contained: no history database or recorded fixtures
+    os.environ["GPT_OSS_CONVERSATION_DB"] = ""
+    os.environ.pop("GPT_OSS_RECORD_DIR", None)
+    responder = FixtureResponder(fixtures)
+    renderers = track_renderers()
+    with MockOllamaServer(responder=responder) as server:
+        os.environ["OLLAMA_HOST"] = server.url
+        results = {
+            "render": bench_render(responder, renderers),
+            "memory": bench_memory(responder, parse_speed(args.speed), args.turns),
+            "concurrency": bench_concurrency(responder, parse_speed(args.speed), args.sessions),
+        }
+
+    for section, values in results.items():
+        print(section)
+        for key, value in values.items():
+            print(f"  {key:<26} {value:,.3f}" if isinstance(value, float) else f"  {key:<26} {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
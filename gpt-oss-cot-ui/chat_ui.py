@@ -1,10 +1,54 @@
 import re
+import atexit
 import base64
 import streamlit as st
-from ollama import chat
+import os
 import time
+import uuid
 import json
 from datetime import datetime
+from admission import controller_from_env, held_stream
+from async_engine import AsyncStreamEngine
+from context_window import CONTEXT_STRATEGIES, DEFAULT_CONTEXT_BUDGET, fit_to_budget
+from conversation_store import ConversationStore
+from delta_stream import live_thinking_renderer
+from example_prompts import REASONING_EXAMPLES, TOOL_EXAMPLES
+from instrumentation import TurnMetrics, record_turn, summarize_turns
+import metrics_export
+from model_lifecycle import lifecycle_from_env
+from render import RenderScheduler, history_thinking_html
+from request_builder import (build_request_messages, finish_reasoning_messages, generation_options, system_message,
+                             think_option)
+from response_cache import ResponseCache, cache_key, record_stream, replay_stream
+from semantic_cache import semantic_cache_from_env, scope_key
+from router import router_from_env
+from single_flight import SingleFlight
+from stream_fixtures import fixture_path, record_fixture
+from streaming import CancelToken, LatencyTracker, StreamConsumer, budgeted_stream, cancellation_savings
+from thinking_archive import archive_from_env
+from tool_runtime import executor_from_env, tool_loop
+from tools import default_registry
+import tracing
+
+# Replay pacing for cached answers: None is instant, otherwise a multiple of the recorded speed
+CACHE_REPLAY_SPEEDS = {"Instant": None, "Recorded speed": 1.0, "4x": 4.0}
+# Messages rendered in full on each rerun; "load more" reveals this many earlier ones at a time
+HISTORY_PAGE_SIZE = 20
+# Conversations offered for resuming in the sidebar
+RECENT_CONVERSATIONS = 10
+# Most answers generated side by side for one prompt
+MAX_COMPARE_COLUMNS = 4
+# Browser cookie naming whose saved conversations a session may list and resume
+OWNER_COOKIE = "gpt_oss_owner"
+OWNER_COOKIE_DAYS = 365
+OWNER_COOKIE_JS = """
+export default function (component) {
+    const { data } = component;
+    if (data && !document.cookie.split("; ").some((c) => c.startsWith(`${data.name}=`))) {
+        document.cookie = `${data.name}=${data.value}; path=/; max-age=${data.max_age}; SameSite=Strict`;
+    }
+}
+"""
 
 # Set Streamlit page configuration
 st.set_page_config(
@@ -17,20 +61,6 @@ st.set_page_config(
 # Custom CSS for enhanced UI
 def load_custom_css():
     st.markdown("""
-    <script>
-        function scrollToBottom() {
-            const chatContainer = document.querySelector('.chat-container');
-            if (chatContainer) {
-                chatContainer.scrollTop = chatContainer.scrollHeight;
-                
-                // Also scroll the main streamlit iframe
-                window.scrollTo(0, document.body.scrollHeight);
-            }
-        }
-        
-        // Call scrollToBottom periodically to handle dynamic content
-        setInterval(scrollToBottom, 1000);
-    </script>
     <style>
     /* Main theme colors */
     :root {
@@ -250,6 +280,59 @@ def create_sidebar():
             help="Higher effort = better reasoning but slower response"
         )
         
+        # Answer each prompt several ways at once
+        if st.toggle("⚖️ Compare Side by Side", key="compare_mode",
+                     help="Generate answers at other reasoning efforts or on other models in parallel"):
+            st.multiselect("Also compare efforts", ["low", "medium", "high"], default=["high"], key="compare_efforts")
+            st.text_input("Also compare models", key="compare_models", placeholder="e.g. gpt-oss:120b",
+                          help="Comma-separated Ollama model names, run at the selected effort")
+        
+        # History sent to the model each turn
+        st.number_input(
+            "Context Budget (tokens)",
+            min_value=1024,
+            max_value=131072,
+            value=DEFAULT_CONTEXT_BUDGET,
+            step=1024,
+            key="context_budget",
+            help="Older turns beyond this budget are trimmed or summarized before each request"
+        )
+        st.selectbox(
+            "When Over Budget",
+            CONTEXT_STRATEGIES,
+            format_func=str.capitalize,
+            key="context_strategy"
+        )
+        
+        # Sampling limits passed to Ollama with every request
+        with st.expander("⚙️ Generation Options"):
+            st.number_input("Context Window (num_ctx)", min_value=0, max_value=131072, value=0, step=1024,
+                            key="num_ctx",
+                            help="Tokens the model attends to; 0 keeps the model default. Keep it above the context budget")
+            st.number_input("Max Output Tokens (num_predict)", min_value=0, max_value=131072, value=0, step=256,
+                            key="num_predict", help="Cap on thinking plus answer tokens; 0 for no limit")
+            st.number_input("Thinking Budget (tokens)", min_value=0, max_value=131072, value=0, step=256,
+                            key="thinking_budget",
+                            help="Cut reasoning off after this many tokens and answer from it; 0 for no limit")
+        
+        # Response cache
+        if st.toggle("⚡ Cache Responses", key="use_response_cache",
+                     help="Answer repeated prompts (e.g. the examples) from cache instead of regenerating"):
+            st.selectbox(
+                "Cached Replay Speed",
+                list(CACHE_REPLAY_SPEEDS),
+                key="cache_replay_speed"
+            )
+            if st.toggle("🧲 Match Similar Prompts", key="use_semantic_cache",
+                         help="Also answer reworded questions from cache, by embedding similarity"):
+                st.slider("Similarity Threshold", 0.80, 0.99, value=get_semantic_cache().threshold, step=0.01,
+                          key="semantic_threshold")
+        
+        # Let the model call web search, a calculator, Python and workspace files
+        if st.toggle("🔧 Tools", key="use_tools",
+                     help="Offer the built-in tools to the model; independent calls run in parallel"):
+            tool_runtime_status(get_tool_executor())
+        
         # Model specifications for 20B - compact version
         st.markdown("### 📊 Model Info")
         col1, col2 = st.columns(2)
@@ -266,13 +349,86 @@ def create_sidebar():
             stats = st.session_state.session_stats
             st.metric("Messages", stats.get("messages", 0))
             st.metric("Thinking Steps", stats.get("thinking_steps", 0))
-            st.metric("Avg Response Time", f"{stats.get('avg_response_time', 0):.1f}s")
+            st.metric("Avg UI Lag", f"{stats.get('avg_ui_lag', 0) * 1000:.0f}ms",
+                      help="Time between a token arriving from Ollama and appearing on screen")
+            
+            # Latency percentiles across this session's turns
+            turns = stats.get("turns", [])
+            if turns:
+                st.markdown("#### ⏱️ Latency (p50 / p95)")
+                for label, key, scale, unit in [
+                    ("Response Time", "response_time", 1, "s"),
+                    ("Queue Wait", "queue_wait", 1, "s"),
+                    ("First Thinking Token", "ttft_thinking", 1, "s"),
+                    ("First Answer Token", "ttft_answer", 1, "s"),
+                    ("Prefill", "prompt_eval_duration", 1e-6, "ms"),
+                    ("Model Load", "load_duration", 1e-9, "s"),
+                ]:
+                    p50, p95 = summarize_turns(turns, key)
+                    if p50 is not None:
+                        precision = 0 if unit == "ms" else 2
+                        st.metric(label, f"{p50 * scale:,.{precision}f} / {p95 * scale:,.{precision}f}{unit}")
+                # Per-turn inter-token percentiles, median across turns
+                itl_p50, itl_p95 = summarize_turns(turns, "itl_p50")[0], summarize_turns(turns, "itl_p95")[0]
+                if itl_p50 is not None:
+                    st.metric("Inter-Token Latency", f"{itl_p50 * 1000:,.0f} / {itl_p95 * 1000:,.0f}ms")
+                p50, p95 = summarize_turns(turns, "tokens_per_second")
+                if p50 is not None:
+                    st.metric("Decode Speed", f"{p50:,.1f} / {p95:,.1f} tok/s")
+                
+                # What each effort level has cost so far, to show the speed trade-off
+                by_effort = {}
+                for turn in turns:
+                    if turn.get("reasoning_effort") and turn.get("thinking_tokens") is not None:
+                        by_effort.setdefault(turn["reasoning_effort"], []).append(turn)
+                if by_effort:
+                    st.markdown("#### 🎚️ By Reasoning Effort (median)")
+                    for effort in ["low", "medium", "high"]:
+                        if effort in by_effort:
+                            effort_turns = by_effort[effort]
+                            thinking_tokens = summarize_turns(effort_turns, "thinking_tokens")[0]
+                            response_time = summarize_turns(effort_turns, "response_time")[0]
+                            st.caption(f"**{effort.capitalize()}** · {thinking_tokens:,.0f} thinking tokens · "
+                                       f"{response_time:.1f}s · {len(effort_turns)} turn{'s' if len(effort_turns) != 1 else ''}")
+            if stats.get("prompt_turns"):
+                st.metric("Prompt Tokens (last turn)", f"{stats['last_prompt_tokens']:,}",
+                          help=f"Average {stats['total_prompt_tokens'] / stats['prompt_turns']:,.0f} tokens per turn; "
+                               "tokens served from the KV cache are not counted in Prefill")
+            if stats.get("cache_hits"):
+                st.metric("Cache Hits", stats["cache_hits"])
+            if stats.get("coalesced"):
+                st.metric("Shared Answers", stats["coalesced"])
+            if stats.get("cancellations"):
+                st.metric("Stopped Responses", stats["cancellations"])
+                st.metric("GPU Time Saved", f"{stats.get('gpu_seconds_saved', 0):.1f}s",
+                          help=f"Estimated from average answer length: ~{stats.get('tokens_saved', 0):.0f} tokens not generated")
+        
+        # Generation slots shared by everyone using this server
+        queue = get_admission_controller().snapshot()
+        st.caption(f"🎛️ Generation slots: {queue['active']}/{queue['max_concurrent']} busy · {queue['waiting']} queued")
+        
+        # Whether the model is loaded, so a slow first answer isn't a surprise
+        multiple_hosts = len(get_router().backends) > 1
+        for state in get_model_lifecycle().snapshot():
+            st.caption(model_status(state, multiple_hosts))
+        
+        # Backend health when routing across several Ollama hosts
+        backends = get_router().snapshot()
+        if len(backends) > 1:
+            st.markdown("### 🖧 Backends")
+            for backend in backends:
+                rate = f"{backend['tokens_per_second']:.0f} tok/s" if backend["tokens_per_second"] else "no data"
+                icon = "🟢" if backend["healthy"] else "🔴"
+                st.caption(f"{icon} {backend['host']} · {backend['in_flight']} active · {rate}")
         
         # Clear chat button
         if st.button("🗑️ Clear Chat History", type="secondary"):
-            st.session_state.messages = [
-                {"role": "system", "content": f"You are GPT-OSS, an advanced open-weight reasoning model. Use {reasoning_effort} reasoning effort. Show your thinking process clearly."}
-            ]
+            st.session_state.messages = [system_message()]
+            st.session_state.context_start = 0
+            st.session_state.pop("history_limit", None)
+            st.session_state.stored_start = 0
+            st.session_state.conversation_id = uuid.uuid4().hex
+            st.query_params.pop("conversation", None)
             st.session_state.session_stats = {
                 "messages": 0,
                 "thinking_steps": 0,
@@ -281,150 +437,537 @@ def create_sidebar():
             }
             st.rerun()
         
+        # Earlier conversations saved by the conversation store
+        store = get_conversation_store()
+        if store:
+            conversations = store.conversations(owner_id(), RECENT_CONVERSATIONS)
+            if conversations:
+                with st.expander("💬 Recent Conversations"):
+                    for conversation in conversations:
+                        updated = datetime.fromtimestamp(conversation["updated"]).strftime("%b %d %H:%M")
+                        st.button(f"{conversation['title'] or 'Untitled'} · {updated}",
+                                  key=f"resume_{conversation['id']}",
+                                  disabled=conversation["id"] == st.session_state.conversation_id,
+                                  on_click=resume_conversation, args=(conversation["id"],))
+        
+        # Where the time of each rerun goes: CSS, sidebar, history, prefill, rendering
+        if st.toggle("🩺 Trace Reruns", key="tracing", value=tracing.enabled_from_env(),
+                     help="Time every phase of this session's reruns and streaming turns"):
+            tracing_panel(st.session_state.get("tracer"))
+        
         st.markdown('</div>', unsafe_allow_html=True)
         
         return model_choice, reasoning_effort
 
-def process_thinking_stream(stream, model_choice):
-    """Process streaming response with enhanced thinking visualization."""
-    thinking_content = ""
-    response_content = ""
+def model_status(state, show_host=False):
+    """One-line load state of a model for the sidebar."""
+    name = f"{state['model']} @ {state['host']}" if show_host else state["model"]
+    if state["warming"]:
+        status = f"⏳ {name} loading..."
+    elif state["loaded"]:
+        expires_in = state["expires_in"]
+        status = f"🔥 {name} warm" + (f" · unloads in {expires_in / 60:.0f} min" if expires_in is not None else "")
+    elif state["error"]:
+        status = f"⚠️ {name} unreachable"
+    else:
+        status = f"🧊 {name} cold · first answer waits for the model to load"
+    if state["last_load_seconds"] is not None:
+        status += f" · last load {state['last_load_seconds']:.1f}s (avg {state['mean_load_seconds']:.1f}s)"
+    return status
+
+def tool_runtime_status(executor):
+    """Sidebar lines for the tool pools and each tool's latency."""
+    snapshot = executor.snapshot()
+    pools = snapshot["pools"]
+    st.caption(f"Threads {pools['io']['running']}/{pools['io']['workers']} busy · "
+               f"processes {pools['cpu']['running']}/{pools['cpu']['workers']} busy · "
+               f"{pools['io']['queued'] + pools['cpu']['queued']} queued")
+    for name in executor.registry.names():
+        stats = snapshot["tools"].get(name)
+        if stats:
+            errors = f" · {stats['errors']} failed" if stats["errors"] else ""
+            st.caption(f"`{name}` · {stats['calls']} call{'s' if stats['calls'] != 1 else ''} · "
+                       f"p50 {stats['p50']:.2f}s / p95 {stats['p95']:.2f}s{errors}")
+        else:
+            st.caption(f"`{name}`")
+
+def tracing_panel(tracer):
+    """Per-rerun breakdown of this session's recent traces, with profiling and export."""
+    if tracer is None or not tracer.traces:
+        st.caption("Timings appear from the next rerun on")
+        return
+    with st.expander(f"🩺 Last {len(tracer.traces)} Reruns"):
+        traces = list(tracer.traces)
+        rows = tracing.rerun_rows(traces)
+        st.dataframe(rows, hide_index=True)
+        choice = st.selectbox("Breakdown", range(len(rows)), key="trace_choice",
+                              format_func=lambda i: f"{rows[i]['started']} · {rows[i]['total ms']:.0f} ms")
+        st.dataframe(tracing.breakdown_rows(traces[-1 - choice]), hide_index=True)
+        
+        profilers = tracing.available_profilers()
+        profiler = st.selectbox("Profiler", profilers, key="profiler") if len(profilers) > 1 else profilers[0]
+        col1, col2 = st.columns(2)
+        # Clicking reruns the app, so "rerun" profiles that rerun and "turn" the next answer
+        col1.button("⏱ Profile Rerun", on_click=request_profile, args=(tracer, profiler, "rerun"))
+        col2.button("⏱ Profile Next Turn", on_click=request_profile, args=(tracer, profiler, "turn"),
+                    disabled=bool(tracer.profile_next))
+        if st.button("💾 Export OTLP JSON"):
+            st.caption(f"Saved {len(traces)} traces to `{tracer.export()}`")
+        if tracer.profile_next:
+            st.caption(f"Profiling the next {tracer.profile_next[1]} with {tracer.profile_next[0]}")
+        if tracer.last_profile:
+            if tracer.last_profile["path"]:
+                st.caption(f"Profile saved to `{tracer.last_profile['path']}`")
+            st.code(tracer.last_profile["summary"], language=None)
+
+def request_profile(tracer, profiler, scope):
+    tracer.profile_next = (profiler, scope)
+
+def enable_tools():
+    st.session_state.use_tools = True
+
+def cancel_generation():
+    """Stop button callback: abort the generation that is currently streaming."""
+    cancel_token = st.session_state.get("cancel_token")
+    if cancel_token:
+        cancel_token.cancel()
+
+def compact_message(message):
+    """Swap a message's reasoning for its compressed form before it is kept in session state."""
+    # Messages saved before ids were assigned get one for this session
+    message.setdefault("id", uuid.uuid4().hex)
+    if message.get("thinking"):
+        message["thinking"] = get_thinking_archive().compress(message["thinking"])
+    return message
+
+def append_message(message):
+    """Add a message to the conversation and queue it for the conversation store."""
+    # Keys the message's widgets, which must not move when earlier messages are loaded
+    message.setdefault("id", uuid.uuid4().hex)
+    store = get_conversation_store()
+    if store:
+        store.append(st.session_state.conversation_id, message, owner_id())
+        # Reloading the page brings the conversation back
+        if st.query_params.get("conversation") != st.session_state.conversation_id:
+            st.query_params["conversation"] = st.session_state.conversation_id
+    st.session_state["messages"].append(compact_message(message))
+
+def save_assistant_message(thinking_content, response_content, response_time, **extra):
+    """Append an assistant turn to the conversation."""
+    append_message({
+        "role": "assistant", 
+        "content": response_content, 
+        "thinking": thinking_content,
+        "response_time": response_time,
+        **extra
+    })
+
+def owner_id():
+    """This browser's owner id in the conversation store, from its cookie if it has one."""
+    if "owner_id" not in st.session_state:
+        cookie = st.context.cookies.get(OWNER_COOKIE)
+        valid = isinstance(cookie, str) and re.fullmatch(r"[0-9a-f]{32}", cookie)
+        st.session_state.owner_id = cookie if valid else uuid.uuid4().hex
+    return st.session_state.owner_id
+
+def resume_conversation(conversation_id):
+    """Load the latest page of one of this browser's stored conversations; returns whether it could.
+
+    Older messages load on demand.
+    """
+    store = get_conversation_store()
+    # Include messages this session queued that aren't written yet
+    store.flush()
+    if not store.message_count(conversation_id) or store.owner(conversation_id) != owner_id():
+        return False
+    start = max(store.message_count(conversation_id) - HISTORY_PAGE_SIZE, 0)
+    st.session_state.messages = [system_message()] + [
+        compact_message(message) for message in store.iter_messages(conversation_id, start)
+    ]
+    st.session_state.stored_start = start
+    st.session_state.conversation_id = conversation_id
+    st.session_state.context_start = 0
+    st.session_state.pop("history_limit", None)
+    st.query_params["conversation"] = conversation_id
+    return True
+
+def record_cancellation(tokens_generated, elapsed):
+    """Track how much generation work stopping early saved."""
+    stats = st.session_state.session_stats
+    expected_tokens = stats.get("total_tokens", 0) / stats["messages"] if stats.get("messages") else 0
+    tokens_saved, seconds_saved = cancellation_savings(tokens_generated, elapsed, expected_tokens)
+    stats["cancellations"] = stats.get("cancellations", 0) + 1
+    stats["tokens_saved"] = stats.get("tokens_saved", 0) + tokens_saved
+    stats["gpu_seconds_saved"] = stats.get("gpu_seconds_saved", 0) + seconds_saved
+
+def sync_system_message():
+    """Make sure the history starts with the current system message, leaving it untouched otherwise.
+    
+    Rewriting it only when it actually differs (e.g. a conversation saved with an
+    older prompt) keeps the prompt prefix byte-stable across turns so Ollama can
+    reuse its KV cache.
+    """
+    messages = st.session_state["messages"]
+    if messages and messages[0]["role"] == "system":
+        if messages[0]["content"] != system_message()["content"]:
+            messages[0] = system_message()
+    else:
+        messages.insert(0, system_message())
+
+def build_context():
+    """Select the part of the history that fits the context budget for this turn."""
+    messages, prompt_tokens, st.session_state.context_start = fit_to_budget(
+        st.session_state["messages"],
+        st.session_state.get("context_budget", DEFAULT_CONTEXT_BUDGET),
+        st.session_state.get("context_strategy", "trim"),
+        keep_from=st.session_state.get("context_start", 0)
+    )
+    
+    stats = st.session_state.session_stats
+    stats["last_prompt_tokens"] = prompt_tokens
+    stats["total_prompt_tokens"] = stats.get("total_prompt_tokens", 0) + prompt_tokens
+    stats["prompt_turns"] = stats.get("prompt_turns", 0) + 1
+    return build_request_messages(messages)
+
+def process_thinking_stream(stream, model_choice, reasoning_effort="medium", cache_hit=False, queue_wait=None,
+                            coalesced=False):
+    """Process streaming response with enhanced thinking visualization and save it to the chat.
+
+    Cache replays and ``coalesced`` turns, which follow another session's generation,
+    are kept out of the generation metrics: only the session that generated counts it.
+    """
     start_time = time.time()
+    generated = not (cache_hit or coalesced)
     
     # Initialize session state for processing status
     if 'processing_complete' not in st.session_state:
         st.session_state.processing_complete = False
     
+    if "session_stats" not in st.session_state:
+        st.session_state.session_stats = {
+            "messages": 0,
+            "thinking_steps": 0,
+            "avg_response_time": 0,
+            "total_response_time": 0
+        }
+    
     # Create containers for real-time updates
     thinking_container = st.empty()
     response_container = st.empty()
     stop_button = st.empty()
     
-    # Add stop button
-    if stop_button.button("🛑 Stop Response", key="stop_generation"):
-        st.session_state.stop_generation = True
-        return thinking_content, response_content, time.time() - start_time
+    # The stop button reruns the script; its callback and the interrupted loop both cancel the token
+    cancel_token = CancelToken()
+    st.session_state.cancel_token = cancel_token
+    stop_button.button("🛑 Stop Response", key="stop_button", on_click=cancel_generation)
     
-    # Initialize stop flag if not exists
-    if 'stop_generation' not in st.session_state:
-        st.session_state.stop_generation = False
-    
-    with st.status("🧠 GPT-OSS is thinking...", expanded=True) as status:
+    stream_span = tracing.span("stream", cache_hit=cache_hit, coalesced=coalesced)
+    with st.status("🧠 GPT-OSS is thinking...", expanded=True) as status, stream_span:
         thinking_steps = 0
         
-        for chunk in stream:
-            # Check if stop button was clicked
-            if st.session_state.stop_generation:
-                st.session_state.stop_generation = False  # Reset for next time
-                break
-                
-            # Handle thinking content
-            if chunk["message"].get("thinking"):
-                thinking_content += chunk["message"]["thinking"]
-                thinking_steps += 1
-                
-                # Update thinking display in real-time
-                thinking_container.markdown(f"""
-                <div class="thinking-container">
-                    <div class="thinking-header thinking-animation">
-                        🧠 Chain-of-Thought Reasoning (Step {thinking_steps})
-                    </div>
-                    <div class="thinking-content">
-                        {thinking_content}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Handle response content
-            if chunk["message"].get("content"):
-                response_content += chunk["message"]["content"]
+        # Batch redraws; the reasoning goes to the browser as appended text only
+        thinking_renderer = live_thinking_renderer(thinking_container, lambda: thinking_steps)
+        response_renderer = RenderScheduler(response_container)
+        
+        # Read the Ollama stream on a worker thread and render it here in batches
+        metrics = TurnMetrics()
+        consumer = StreamConsumer(stream, cancel_token=cancel_token).start()
+        latency = LatencyTracker()
+        
+        completed = False
+        try:
+            for batch in consumer.batches():
+                batch_started = time.perf_counter()
+                render_calls = thinking_renderer.render_calls + response_renderer.render_calls
+                for received_at, chunk in batch:
+                    latency.received(received_at)
+                    metrics.observe(chunk, received_at)
+                    
+                    # Handle thinking content
+                    if chunk["message"].get("thinking"):
+                        thinking_steps += 1
+                        thinking_renderer.append(chunk["message"]["thinking"])
+                    
+                    # Handle response content
+                    if chunk["message"].get("content"):
+                        response_renderer.append(chunk["message"]["content"])
                 
-                # Update response display in real-time
-                response_container.markdown(response_content)
+                if thinking_renderer.render_calls + response_renderer.render_calls != render_calls:
+                    latency.displayed()
+                stream_span.accumulate("render_seconds", time.perf_counter() - batch_started)
+            completed = True
+        finally:
+            cancelled = not consumer.finished and consumer.error is None
+            # Closes the HTTP stream if it is still open so Ollama stops generating
+            consumer.cancel()
+            if not completed:
+                # The script was interrupted by a rerun (e.g. the stop button): keep the partial turn
+                elapsed = time.time() - start_time
+                if generated:
+                    record_cancellation(metrics.tokens, elapsed)
+                    metrics_export.observe_turn(model_choice, reasoning_effort, metrics.as_dict(), elapsed, cancelled=True)
+                save_assistant_message(thinking_renderer.text, response_renderer.text, elapsed,
+                                       cancelled=True, metrics=metrics.as_dict())
+        
+        if consumer.error:
+            if generated:
+                metrics_export.observe_error(model_choice, reasoning_effort, consumer.error)
+            raise consumer.error
+        
+        stop_button.empty()
+        
+        # Push whatever is still buffered
+        thinking_renderer.flush()
+        response_renderer.flush()
+        latency.displayed()
+        thinking_content = thinking_renderer.text
+        response_content = response_renderer.text
+        if tracing.active():
+            tracing.record_turn_phases(stream_span, metrics.as_dict(), metrics.clock() - metrics.started_at)
+            stream_span.set(render_calls=thinking_renderer.render_calls + response_renderer.render_calls,
+                            ui_lag_ms=latency.mean_lag * 1000)
         
         # Final status update
         response_time = time.time() - start_time
+        if cancelled:
+            if generated:
+                record_cancellation(metrics.tokens, response_time)
+                metrics_export.observe_turn(model_choice, reasoning_effort, metrics.as_dict(), response_time,
+                                            cancelled=True)
+            save_assistant_message(thinking_content, response_content, response_time,
+                                   cancelled=True, metrics=metrics.as_dict())
+            status.update(label=f"🛑 Response stopped ({response_time:.1f}s)", state="error", expanded=False)
+            return thinking_content, response_content, response_time
+        
         status.update(
-            label=f"✅ Reasoning complete! ({response_time:.1f}s, {thinking_steps} thinking steps)", 
+            label=f"⚡ Served from cache ({response_time:.1f}s, {thinking_steps} thinking steps)" if cache_hit else
+                  f"🔗 Shared answer complete ({response_time:.1f}s, {thinking_steps} thinking steps)" if coalesced else
+                  f"✅ Reasoning complete! ({response_time:.1f}s, {thinking_steps} thinking steps, "
+                  f"UI lag {latency.mean_lag * 1000:.0f}ms avg / {latency.max_lag * 1000:.0f}ms max)", 
             state="complete", 
             expanded=False
         )
-        
-        # Add auto-scroll after response is complete
-        st.markdown("""
-            <script>
-                function scrollToChatInput() {
-                    const chatInput = document.querySelector('.stChatInputContainer');
-                    if (chatInput) {
-                        chatInput.scrollIntoView({ behavior: 'smooth', block: 'center' });
-                    }
-                }
-                setTimeout(scrollToChatInput, 1000);
-            </script>
-        """, unsafe_allow_html=True)
+
     
     # Update session statistics
-    if "session_stats" not in st.session_state:
-        st.session_state.session_stats = {
-            "messages": 0,
-            "thinking_steps": 0,
-            "avg_response_time": 0,
-            "total_response_time": 0
-        }
+    stats = st.session_state.session_stats
+    if cache_hit:
+        # Replays say nothing about model latency, so keep them out of the timing stats
+        stats["cache_hits"] = stats.get("cache_hits", 0) + 1
+        metrics_export.observe_cache_hit(model_choice, reasoning_effort)
+        save_assistant_message(thinking_content, response_content, response_time, cache_hit=True)
+        return thinking_content, response_content, response_time
+    if coalesced:
+        # Joined mid-stream: the timings are the other session's, and its turn already counted the tokens
+        stats["coalesced"] = stats.get("coalesced", 0) + 1
+        save_assistant_message(thinking_content, response_content, response_time, coalesced=True)
+        return thinking_content, response_content, response_time
+    
+    turn_metrics = record_turn_stats(metrics, thinking_steps, response_time, latency.mean_lag, queue_wait, reasoning_effort)
+    metrics_export.observe_turn(model_choice, reasoning_effort, turn_metrics, response_time)
     
+    save_assistant_message(thinking_content, response_content, response_time, metrics=turn_metrics)
+    return thinking_content, response_content, response_time
+
+def record_turn_stats(metrics, thinking_steps, response_time, ui_lag, queue_wait=None, reasoning_effort=None):
+    """Add a completed turn to the session statistics and return its metrics."""
     stats = st.session_state.session_stats
     stats["messages"] += 1
     stats["thinking_steps"] += thinking_steps
     stats["total_response_time"] += response_time
     stats["avg_response_time"] = stats["total_response_time"] / stats["messages"]
+    stats["total_ui_lag"] = stats.get("total_ui_lag", 0) + ui_lag
+    stats["avg_ui_lag"] = stats["total_ui_lag"] / stats["messages"]
+    turn_metrics = metrics.as_dict()
+    turn_metrics["response_time"] = response_time
+    if queue_wait is not None:
+        turn_metrics["queue_wait"] = queue_wait
+    if reasoning_effort:
+        turn_metrics["reasoning_effort"] = reasoning_effort
+    stats["total_tokens"] = stats.get("total_tokens", 0) + turn_metrics.get("eval_count", metrics.tokens)
+    record_turn(stats.setdefault("turns", []), turn_metrics)
+    return turn_metrics
+
+def compare_targets(model_choice, reasoning_effort):
+    """(model, effort) pairs to answer the next prompt with; the selected pair comes first."""
+    targets = [(model_choice, reasoning_effort)]
+    if st.session_state.get("compare_mode"):
+        targets += [(model_choice, effort) for effort in st.session_state.get("compare_efforts", [])]
+        models = st.session_state.get("compare_models", "").split(",")
+        targets += [(model.strip(), reasoning_effort) for model in models if model.strip()]
+    # Drop repeats, keeping the order
+    return list(dict.fromkeys(targets))[:MAX_COMPARE_COLUMNS]
+
+def process_comparison(targets):
+    """Stream the prompt to every target at once, each in its own column, and save the first as the answer."""
+    history = [message for message in build_context() if message["role"] != "system"]
+    lifecycle = get_model_lifecycle()
+    options = current_generation_options()
+    requests = [
+        {"model": model, "messages": [system_message()] + history, "think": think_option(model, effort),
+         "options": options, "reasoning_effort": effort, "keep_alive": lifecycle.begin_request(model)}
+        for model, effort in targets
+    ]
     
-    return thinking_content, response_content, response_time
+    views = []
+    for column, (model, effort) in zip(st.columns(len(targets)), targets):
+        with column:
+            st.caption(f"**{model}** · {effort} effort")
+            view = {"status": st.empty(), "metrics": TurnMetrics(), "steps": 0, "elapsed": None}
+            view["thinking"] = live_thinking_renderer(st.empty(), lambda view=view: view["steps"])
+            view["response"] = RenderScheduler(st.empty())
+            view["status"].caption("🧠 Thinking...")
+        views.append(view)
+    stop_button = st.empty()
+    
+    cancel_token = CancelToken()
+    st.session_state.cancel_token = cancel_token
+    stop_button.button("🛑 Stop Responses", key="stop_button", on_click=cancel_generation)
+    
+    start = time.monotonic()
+    latency = LatencyTracker()
+    streams = get_async_engine().stream_many(requests, cancel_token, get_admission_controller(),
+                                             st.session_state.session_id, st.session_state.conversation_id)
+    for model, effort in targets:
+        metrics_export.observe_request(model, effort)
+    completed = False
+    try:
+        for batch in streams.batches():
+            render_calls = sum(view["thinking"].render_calls + view["response"].render_calls for view in views)
+            for index, received_at, chunk in batch:
+                view = views[index]
+                latency.received(received_at)
+                view["metrics"].observe(chunk, received_at)
+                if chunk["message"].get("thinking"):
+                    view["steps"] += 1
+                    view["thinking"].append(chunk["message"]["thinking"])
+                if chunk["message"].get("content"):
+                    view["response"].append(chunk["message"]["content"])
+                if chunk.get("done"):
+                    view["elapsed"] = received_at - start
+                    view["thinking"].flush()
+                    view["response"].flush()
+            if sum(view["thinking"].render_calls + view["response"].render_calls for view in views) != render_calls:
+                latency.displayed()
+        completed = True
+    finally:
+        # Closes any stream still open so Ollama stops generating
+        streams.cancel()
+        if not completed:
+            elapsed = time.monotonic() - start
+            primary = views[0]
+            record_cancellation(sum(view["metrics"].tokens for view in views), elapsed)
+            save_assistant_message(primary["thinking"].text, primary["response"].text, elapsed,
+                                   cancelled=True, metrics=primary["metrics"].as_dict())
+    
+    for index, error in streams.errors.items():
+        metrics_export.observe_error(*targets[index], error)
+    if len(streams.errors) == len(views):
+        raise streams.errors[0]
+    stop_button.empty()
+    
+    results = []
+    for index, (view, (model, effort)) in enumerate(zip(views, targets)):
+        view["thinking"].flush()
+        view["response"].flush()
+        elapsed = view["elapsed"] or time.monotonic() - start
+        cancelled = index not in streams.finished
+        metrics = view["metrics"]
+        metrics_export.observe_turn(model, effort, metrics.as_dict(), elapsed, cancelled=cancelled)
+        if index in streams.errors:
+            view["status"].error(f"❌ {streams.errors[index]}")
+        elif cancelled:
+            view["status"].caption(f"🛑 Stopped ({elapsed:.1f}s)")
+        else:
+            view["status"].caption(f"✅ {elapsed:.1f}s · {metrics.tokens} tokens · {metrics.tokens_per_second or 0:.0f} tok/s")
+        results.append({"model": model, "reasoning_effort": effort, "content": view["response"].text,
+                        "response_time": elapsed, "tokens": metrics.tokens})
+    
+    primary = views[0]
+    if 0 not in streams.finished:
+        # The main answer failed: keep whatever it produced and the working alternatives
+        save_assistant_message(primary["thinking"].text, primary["response"].text, results[0]["response_time"],
+                               cancelled=True, metrics=primary["metrics"].as_dict(), comparison=results[1:])
+        return
+    turn_metrics = record_turn_stats(primary["metrics"], primary["steps"], results[0]["response_time"],
+                                     latency.mean_lag, streams.queue_waits.get(0), targets[0][1])
+    save_assistant_message(primary["thinking"].text, primary["response"].text, results[0]["response_time"],
+                           metrics=turn_metrics, comparison=results[1:])
 
 def display_message(message):
     """Display a message with enhanced formatting."""
     role = "user" if message["role"] == "user" else "assistant"
+    # Messages put in session state some other way get an id here
+    message.setdefault("id", uuid.uuid4().hex)
     
     with st.chat_message(role):
         if role == "assistant":
             thinking_content = message.get("thinking", "")
-            display_assistant_message(message["content"], thinking_content)
+            display_assistant_message(message["content"], thinking_content, key=f"thinking_{message['id']}")
+            if message.get("comparison"):
+                display_comparison(message["comparison"], key=f"comparison_{message['id']}")
         else:
             st.markdown(message["content"])
 
-def display_assistant_message(content, thinking_content=None):
+def display_comparison(comparison, key):
+    """Show the other answers generated side by side with a message, once expanded."""
+    expander = st.expander(f"⚖️ Compared with {len(comparison)} other answer(s)", expanded=False, key=key,
+                           on_change="rerun")
+    with expander:
+        if expander.open:
+            for column, answer in zip(st.columns(len(comparison)), comparison):
+                with column:
+                    st.caption(f"**{answer['model']}** · {answer['reasoning_effort']} effort · "
+                               f"{answer['response_time']:.1f}s · {answer['tokens']} tokens")
+                    st.markdown(answer["content"])
+
+def display_assistant_message(content, thinking_content=None, key=None):
     """Display assistant message with enhanced thinking visualization."""
     # Display thinking content if present
-    if thinking_content and thinking_content.strip():
-        with st.expander("🧠 View Chain-of-Thought Reasoning", expanded=False):
-            st.markdown(f"""
-            <div class="thinking-content">
-                {thinking_content}
-            </div>
-            """, unsafe_allow_html=True)
+    # Stored reasoning may be compressed; it is only decompressed when the expander is open
+    if thinking_content and (not isinstance(thinking_content, str) or thinking_content.strip()):
+        # Tracking the open state lets the reasoning HTML be skipped until someone expands it
+        expander = st.expander("🧠 View Chain-of-Thought Reasoning", expanded=False, key=key, on_change="rerun")
+        with expander:
+            if expander.open:
+                st.markdown(history_thinking_html(str(thinking_content)), unsafe_allow_html=True)
     
     # Display main response
     if content:
         st.markdown(content)
-        
-    # Add auto-scroll script
-    st.markdown("""
-        <script>
-            function scroll_to_bottom() {
-                var chatHistory = document.querySelector('.stChatFloating');
-                if (chatHistory) {
-                    chatHistory.scrollTop = chatHistory.scrollHeight;
-                }
-            }
-            window.addEventListener('load', scroll_to_bottom);
-            scroll_to_bottom();
-        </script>
-        """, unsafe_allow_html=True)
+
+def show_earlier_messages():
+    limit = st.session_state.get("history_limit", HISTORY_PAGE_SIZE)
+    messages = st.session_state["messages"]
+    stored_start = st.session_state.get("stored_start", 0)
+    in_memory = sum(1 for m in messages if m["role"] != "system")
+    if stored_start and in_memory - limit < HISTORY_PAGE_SIZE:
+        # A resumed conversation: fetch the next page back from the store
+        start = max(stored_start - HISTORY_PAGE_SIZE, 0)
+        earlier = [compact_message(message) for message in
+                   get_conversation_store().iter_messages(st.session_state.conversation_id, start, stored_start)]
+        offset = 1 if messages and messages[0]["role"] == "system" else 0
+        messages[offset:offset] = earlier
+        st.session_state.stored_start = start
+        st.session_state.context_start = st.session_state.get("context_start", 0) + len(earlier)
+    st.session_state.history_limit = limit + HISTORY_PAGE_SIZE
 
 def display_chat_history():
-    """Display chat history with enhanced formatting."""
-    for message in st.session_state["messages"]:
-        if message["role"] != "system":
-            display_message(message)
+    """Display the most recent messages; older ones stay behind a "load more" button."""
+    messages = [message for message in st.session_state["messages"] if message["role"] != "system"]
+    hidden = max(len(messages) - st.session_state.get("history_limit", HISTORY_PAGE_SIZE), 0)
+    # Start the window on a user message so no answer is shown without its question
+    while hidden and messages[hidden]["role"] != "user":
+        hidden -= 1
+    # Messages of a resumed conversation still in the store count as hidden too
+    total_hidden = hidden + st.session_state.get("stored_start", 0)
+    if total_hidden:
+        st.button(f"⬆️ Load earlier messages ({total_hidden} hidden)", key="load_earlier_messages",
+                  on_click=show_earlier_messages)
+    
+    for message in messages[hidden:]:
+        display_message(message)
+
 
 def create_example_prompts():
     """Create example prompts to showcase GPT-OSS capabilities."""
@@ -434,70 +977,14 @@ def create_example_prompts():
     tab1, tab2 = st.tabs(["🧠 Reasoning", "🔧 Tool Use"])
     
     with tab1:
-        reasoning_examples = [
-            {
-                "title": "🧮 Advanced Math",
-                "prompt": "Solve this step by step: If a train travels 120 miles in 2 hours, then speeds up by 25% for the next 3 hours, how far does it travel in total?",
-                "icon": "🚂"
-            },
-            {
-                "title": "💻 Code Generation", 
-                "prompt": "Write a Python function that finds the longest palindromic substring in a given string. Include time complexity analysis.",
-                "icon": "🐍"
-            },
-            {
-                "title": "🔬 Scientific Reasoning",
-                "prompt": "Explain the process of photosynthesis and how it relates to climate change mitigation. Include the chemical equations.",
-                "icon": "🌱"
-            },
-            {
-                "title": "🧩 Logic Puzzle",
-                "prompt": "Three friends Alice, Bob, and Charlie have different colored shirts (red, blue, green). Alice doesn't wear red, Bob doesn't wear blue, and the person in green is taller than Alice. If Charlie is the shortest, what color shirt does each person wear?",
-                "icon": "🎯"
-            }
-        ]
-        
-        for i, example in enumerate(reasoning_examples):
+        for i, example in enumerate(REASONING_EXAMPLES):
             if st.button(f"{example['icon']} {example['title']}", key=f"reasoning_{i}"):
                 st.session_state.example_prompt = example['prompt']
                 st.rerun()
     
     with tab2:
-        tool_examples = [
-            {
-                "title": "🔍 Web Search",
-                "prompt": "Search for the latest news about artificial intelligence breakthroughs in 2025. Summarize the top 3 most important developments.",
-                "icon": "🌐"
-            },
-            {
-                "title": "🐍 Code Execution",
-                "prompt": "Write and execute Python code to calculate the first 10 Fibonacci numbers, then create a simple visualization showing their growth pattern.",
-                "icon": "⚡"
-            },
-            {
-                "title": "📊 Data Analysis",
-                "prompt": "Generate sample sales data for a fictional company and perform basic statistical analysis including mean, median, and trend analysis.",
-                "icon": "📈"
-            },
-            {
-                "title": "🔧 Multi-Tool Task",
-                "prompt": "Research the current weather in San Francisco, then write Python code to convert the temperature to different units and explain the weather patterns.",
-                "icon": "🛠️"
-            },
-            {
-                "title": "📝 File Operations",
-                "prompt": "Create a simple text file with a poem about AI, then read it back and analyze the literary devices used.",
-                "icon": "📄"
-            },
-            {
-                "title": "🧮 Calculator Tool",
-                "prompt": "Use calculation tools to solve this complex problem: What's the compound interest on $10,000 invested at 7% annually for 15 years, compounded monthly?",
-                "icon": "🔢"
-            }
-        ]
-        
-        for i, example in enumerate(tool_examples):
-            if st.button(f"{example['icon']} {example['title']}", key=f"tool_{i}"):
+        for i, example in enumerate(TOOL_EXAMPLES):
+            if st.button(f"{example['icon']} {example['title']}", key=f"tool_{i}", on_click=enable_tools):
                 st.session_state.example_prompt = example['prompt']
                 st.rerun()
     
@@ -519,15 +1006,209 @@ def create_example_prompts():
     - "Create a file with [content] and then analyze it"
     """)
 
+@st.cache_resource
+def get_response_cache():
+    """Get the response cache shared by all sessions in this process."""
+    db_path = os.environ.get("GPT_OSS_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite3"))
+    if db_path:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    return ResponseCache(db_path=db_path or None)
+
+@st.cache_resource
+def get_semantic_cache():
+    """Get the similar-prompt cache shared by all sessions; embeds on a healthy backend."""
+    router = get_router()
+    cache = semantic_cache_from_env(
+        lambda: next((b for b in router.backends if b.healthy), router.backends[0]).client)
+    atexit.register(cache.close)
+    return cache
+
+@st.cache_resource
+def get_conversation_store():
+    """Get the conversation store shared by all sessions, or ``None`` when disabled."""
+    db_path = os.environ.get("GPT_OSS_CONVERSATION_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "conversations.sqlite3"))
+    if not db_path:
+        return None
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    store = ConversationStore(db_path)
+    # Don't lose queued messages when the server shuts down
+    atexit.register(store.close)
+    return store
+
+@st.cache_resource
+def get_thinking_archive():
+    """Get the compressed reasoning storage shared by all sessions in this process."""
+    return archive_from_env()
+
+@st.cache_resource
+def get_single_flight():
+    """Get the table of running generations that identical requests can join."""
+    return SingleFlight()
+
+@st.cache_resource
+def get_admission_controller():
+    """Get the scheduler that limits concurrent generations across all sessions."""
+    return controller_from_env()
+
+def current_generation_options():
+    """Ollama options from the sidebar's generation settings."""
+    return generation_options(st.session_state.get("num_ctx"), st.session_state.get("num_predict"))
+
+def wait_for_admission(controller, ticket):
+    """Show the queue position until a generation slot frees up."""
+    if controller.wait(ticket, timeout=0):
+        return
+    queue_status = st.empty()
+    while not controller.wait(ticket, timeout=0.5):
+        queue_status.info(
+            f"⏳ Waiting for a free generation slot: #{controller.position(ticket) + 1} in queue, "
+            f"about {controller.estimated_wait(ticket):.0f}s"
+        )
+    queue_status.empty()
+
+def generate_response(model_choice, reasoning_effort):
+    """Stream the assistant's answer to the current history, serving repeats from the cache."""
+    targets = compare_targets(model_choice, reasoning_effort)
+    if len(targets) > 1:
+        with tracing.span("comparison", columns=len(targets)):
+            process_comparison(targets)
+        return
+    
+    with tracing.span("build_context"):
+        messages = build_context()
+    options = current_generation_options()
+    thinking_budget = st.session_state.get("thinking_budget")
+    executor = get_tool_executor() if st.session_state.get("use_tools") else None
+    
+    # Identifies the answer for the cache and for sharing it with identical requests
+    cache_options = dict(options or {}, thinking_budget=thinking_budget) if thinking_budget else options
+    if executor:
+        cache_options = dict(cache_options or {}, tools=executor.registry.names())
+    key = cache_key(model_choice, reasoning_effort, cache_options, messages)
+    
+    # Answers built on live tool results (searches, pages) aren't reused later
+    cache = None
+    if st.session_state.get("use_response_cache") and not executor:
+        cache = get_response_cache()
+        entry = cache.get(key)
+        if entry:
+            speed = CACHE_REPLAY_SPEEDS[st.session_state.get("cache_replay_speed", "Instant")]
+            process_thinking_stream(replay_stream(entry, speed), model_choice, reasoning_effort, cache_hit=True)
+            return
+    
+    # Then a reworded version of an earlier question with the same context and settings
+    semantic = None
+    if cache and st.session_state.get("use_semantic_cache"):
+        semantic = get_semantic_cache()
+        scope = scope_key(model_choice, reasoning_effort, cache_options, messages)
+        prompt = messages[-1].get("content", "")
+        try:
+            with tracing.span("embed"):
+                vector = semantic.embed([prompt])[0]
+        except Exception as e:
+            # e.g. the embedding model isn't pulled: exact matches only
+            st.caption(f"🧲 Similar-prompt matching unavailable: {e}")
+            semantic = None
+        else:
+            entry, similarity = semantic.lookup(vector, scope, st.session_state.get("semantic_threshold"))
+            if entry:
+                st.caption(f"🧲 Answered from a similar question ({similarity:.0%} match)")
+                speed = CACHE_REPLAY_SPEEDS[st.session_state.get("cache_replay_speed", "Instant")]
+                process_thinking_stream(replay_stream(entry, speed), model_choice, reasoning_effort, cache_hit=True)
+                return
+    
+    def start_generation():
+        metrics_export.observe_request(model_choice, reasoning_effort)
+        chat = get_chat_model(model_choice)
+        conversation_id = st.session_state.conversation_id
+        if executor:
+            # Run the tools the model asks for and send their results back until it answers
+            stream = tool_loop(lambda turn_messages, tools: chat(turn_messages, conversation_id, reasoning_effort,
+                                                                 options, tools), messages, executor,
+                               scope=conversation_id)
+        else:
+            stream = chat(messages, conversation_id, reasoning_effort, options)
+        if thinking_budget:
+            # The follow-up that answers from cut-off reasoning needs little thinking of its own
+            stream = budgeted_stream(stream, thinking_budget, lambda thinking: chat(
+                finish_reasoning_messages(messages, thinking), conversation_id, "low", options))
+        # The generation frees its slot when it ends, even if this session stops reading first
+        stream = held_stream(controller, ticket, stream)
+        if cache:
+            stream = record_stream(stream, cache, key)
+        if semantic:
+            stream = record_stream(stream, semantic.recorder(vector, scope, prompt), key)
+        # Save live streams as replay fixtures for the benchmarks
+        if os.environ.get("GPT_OSS_RECORD_DIR"):
+            stream = record_fixture(stream, fixture_path(os.environ["GPT_OSS_RECORD_DIR"], reasoning_effort))
+        return stream
+    
+    # Follow an identical generation another session already has running instead of using the GPU again
+    flights = get_single_flight()
+    stream, leading = flights.subscribe(key)
+    controller = get_admission_controller()
+    ticket = None
+    try:
+        if stream is None:
+            # Queue for a generation slot before touching the GPU
+            ticket = controller.enqueue(st.session_state.session_id, reasoning_effort)
+            with tracing.span("admission_wait"):
+                wait_for_admission(controller, ticket)
+            stream, leading = flights.subscribe(key, start_generation)
+        if not leading:
+            st.caption("🔗 Sharing an identical answer already being generated")
+            metrics_export.observe_coalesced(model_choice, reasoning_effort)
+        process_thinking_stream(stream, model_choice, reasoning_effort,
+                                queue_wait=ticket.queue_wait if leading else None, coalesced=not leading)
+    finally:
+        # Covers a rerun that interrupts us while still queued, and an identical
+        # generation that started while we queued
+        if ticket is not None and not leading:
+            controller.release(ticket)
+
+@st.cache_resource
+def get_router():
+    """Get the backend router (and its pooled clients) shared by all sessions in this process."""
+    return router_from_env()
+
+@st.cache_resource
+def get_async_engine():
+    """Get the event loop and async clients that run side-by-side comparisons on the shared backends."""
+    return AsyncStreamEngine(get_router())
+
+@st.cache_resource
+def get_model_lifecycle():
+    """Get the manager that warms models and keeps them loaded; warming starts on first use."""
+    return lifecycle_from_env(get_router()).start()
+
+@st.cache_resource
+def get_tool_executor():
+    """Get the thread and process pools that run tool calls for every session."""
+    executor = executor_from_env(default_registry(), on_result=metrics_export.observe_tool_call)
+    metrics_export.watch_tool_pools(executor)
+    atexit.register(executor.close)
+    return executor.warm()
+
 @st.cache_resource
 def get_chat_model(model_name):
-    """Get a cached instance of the chat model."""
-    return lambda messages: chat(
-        model=model_name,
-        messages=messages,
-        stream=True,
-        think=True,
-    )
+    """Get a streaming chat function bound to the shared backends."""
+    router = get_router()
+    lifecycle = get_model_lifecycle()
+    
+    def chat(messages, conversation_id=None, reasoning_effort="medium", options=None, tools=None):
+        keep_alive = lifecycle.begin_request(model_name)
+        stream = router.stream_chat(
+            conversation_id=conversation_id,
+            model=model_name,
+            messages=messages,
+            think=think_option(model_name, reasoning_effort),
+            options=options,
+            tools=tools,
+            keep_alive=keep_alive,
+        )
+        return lifecycle.track(stream, model_name, keep_alive, conversation_id)
+    
+    return chat
 
 def handle_user_input(model_choice, reasoning_effort):
     """Handle user input with enhanced processing."""
@@ -537,28 +1218,15 @@ def handle_user_input(model_choice, reasoning_effort):
         user_input = st.session_state.example_prompt
         delattr(st.session_state, 'example_prompt')
     
-    # Regular chat input with auto-scroll script
+    # Regular chat input
     if not user_input:
-        st.markdown("""
-            <script>
-                function scrollToBottom() {
-                    window.scrollTo(0, document.body.scrollHeight);
-                }
-                setTimeout(scrollToBottom, 500);
-            </script>
-        """, unsafe_allow_html=True)
         user_input = st.chat_input("Ask GPT-OSS anything... 🚀")
     
     if user_input:
-        # Add reasoning effort instruction to system message
-        system_msg = f"You are GPT-OSS, an advanced open-weight reasoning model. Use {reasoning_effort} reasoning effort. Show your thinking process clearly and be thorough in your analysis."
-        
-        # Update system message if it exists
-        if st.session_state["messages"] and st.session_state["messages"][0]["role"] == "system":
-            st.session_state["messages"][0]["content"] = system_msg
+        sync_system_message()
         
         # Add user message
-        st.session_state["messages"].append({"role": "user", "content": user_input})
+        append_message({"role": "user", "content": user_input})
         
         # Display user message
         with st.chat_message("user"):
@@ -566,26 +1234,18 @@ def handle_user_input(model_choice, reasoning_effort):
         
         # Generate and display assistant response
         with st.chat_message("assistant"):
-            chat_model = get_chat_model(model_choice)
-            stream = chat_model(st.session_state["messages"])
-            
-            thinking_content, response_content, response_time = process_thinking_stream(stream, model_choice)
-            
-            # Save the complete response
-            st.session_state["messages"].append({
-                "role": "assistant", 
-                "content": response_content, 
-                "thinking": thinking_content,
-                "response_time": response_time
-            })
+            generate_response(model_choice, reasoning_effort)
 
 def main():
     """Main application function."""
-    load_custom_css()
-    create_header()
+    with tracing.span("load_custom_css"):
+        load_custom_css()
+    with tracing.span("create_header"):
+        create_header()
     
     # Sidebar configuration
-    model_choice, reasoning_effort = create_sidebar()
+    with tracing.span("create_sidebar"):
+        model_choice, reasoning_effort = create_sidebar()
     
     # Main content area
     col1, col2 = st.columns([3, 1])
@@ -599,36 +1259,38 @@ def main():
         chat_input_container = st.container()
         
         # First, show chat history
-        display_chat_history()
+        with tracing.span("display_chat_history"):
+            display_chat_history()
         
         # Then, show the chat input below history
         with chat_input_container:
             if not st.session_state.chat_input_disabled:
                 user_input = st.chat_input("Ask GPT-OSS anything... 🚀")
+                # Example buttons queue their prompt for this run
+                user_input = user_input or st.session_state.pop("example_prompt", None)
                 if user_input:
                     st.session_state.chat_input_disabled = True
-                    st.session_state.messages.append({"role": "user", "content": user_input})
+                    sync_system_message()
+                    append_message({"role": "user", "content": user_input})
                     with st.chat_message("user"):
                         st.markdown(user_input)
                     
                     # Generate and display assistant response
-                    with st.chat_message("assistant"):
-                        chat_model = get_chat_model(model_choice)
-                        stream = chat_model(st.session_state["messages"])
-                        thinking_content, response_content, response_time = process_thinking_stream(stream, model_choice)
-                        st.session_state["messages"].append({
-                            "role": "assistant", 
-                            "content": response_content, 
-                            "thinking": thinking_content,
-                            "response_time": response_time
-                        })
-                    st.session_state.chat_input_disabled = False
+                    try:
+                        with st.chat_message("assistant"):
+                            turn_span = tracing.span("turn", model=model_choice, reasoning_effort=reasoning_effort)
+                            with turn_span, tracing.profiled("turn"):
+                                generate_response(model_choice, reasoning_effort)
+                    finally:
+                        # Re-enable input even if the stop button interrupted the run
+                        st.session_state.chat_input_disabled = False
                     st.rerun()
     
     with col2:
         st.markdown('<div class="sidebar-container">', unsafe_allow_html=True)
         # Example prompts
-        create_example_prompts()
+        with tracing.span("create_example_prompts"):
+            create_example_prompts()
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Model information
@@ -650,11 +1312,12 @@ def main():
         - Strong coding capabilities
         """)
 
-if __name__ == "__main__":
+def init_session():
+    """Session state, conversation resume and process-wide services for this rerun."""
     # Initialize session state
     if "messages" not in st.session_state:
         st.session_state["messages"] = [
-            {"role": "system", "content": "You are GPT-OSS, an advanced open-weight reasoning model. Use medium reasoning effort. Show your thinking process clearly."}
+            system_message()
         ]
     
     if "session_stats" not in st.session_state:
@@ -665,4 +1328,37 @@ if __name__ == "__main__":
             "total_response_time": 0
         }
     
-    main()
+    # Identifies this browser session for fair queuing
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    
+    # Keeps every turn of this conversation on the same Ollama backend
+    if "conversation_id" not in st.session_state:
+        st.session_state.conversation_id = uuid.uuid4().hex
+        # A reloaded page picks its conversation back up from the store
+        resumed = st.query_params.get("conversation")
+        if resumed and not (get_conversation_store() and resume_conversation(resumed)):
+            # Another browser's conversation, or one that isn't stored
+            st.query_params.pop("conversation", None)
+    
+    # Saved conversations belong to this browser; the cookie keeps that across reloads
+    if get_conversation_store() and st.context.cookies.get(OWNER_COOKIE) != owner_id():
+        st.components.v2.component(OWNER_COOKIE, js=OWNER_COOKIE_JS)(
+            data={"name": OWNER_COOKIE, "value": owner_id(), "max_age": OWNER_COOKIE_DAYS * 86400}, key="owner_cookie")
+    
+    metrics_export.configure_from_env()
+    # Start loading the model before anyone asks it something
+    get_model_lifecycle()
+
+if __name__ == "__main__":
+    # Opt-in timing of every rerun, shown in the sidebar's debug panel
+    tracer = None
+    if st.session_state.get("tracing", tracing.enabled_from_env()):
+        if "tracer" not in st.session_state:
+            st.session_state.tracer = tracing.SessionTracer()
+        tracer = st.session_state.tracer
+    
+    with tracing.trace(tracer, "rerun"), tracing.profiled("rerun"):
+        with tracing.span("init_session"):
+            init_session()
+        main()
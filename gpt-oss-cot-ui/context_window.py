@@ -0,0 +1,106 @@
+"""Keep the history sent to the model within a token budget."""
+
+# Rough average for English text with the gpt-oss tokenizer
+CHARS_PER_TOKEN = 4
+# Role markers and separators the chat template adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+DEFAULT_CONTEXT_BUDGET = 8192
+CONTEXT_STRATEGIES = ["trim", "summarize"]
+# Fraction of the budget to trim down to once the history overflows
+LOW_WATERMARK = 0.75
+
+SUMMARY_SNIPPET_CHARS = 160
+SUMMARY_MAX_MESSAGES = 16
+
+
+def estimate_tokens(text):
+    """Approximate the token count of a string without running a tokenizer."""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def message_tokens(message):
+    """Return the token estimate for a message, caching it on the message dict."""
+    tokens = message.get("tokens")
+    if tokens is None:
+        tokens = estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+        message["tokens"] = tokens
+    return tokens
+
+
+def _snippet(text):
+    text = " ".join((text or "").split())
+    if len(text) > SUMMARY_SNIPPET_CHARS:
+        text = text[:SUMMARY_SNIPPET_CHARS].rstrip() + "…"
+    return text
+
+
+def summarize_turns(messages):
+    """Build a compact system note standing in for turns that no longer fit."""
+    lines = ["Summary of earlier conversation (older turns omitted to save context):"]
+    for message in messages[-SUMMARY_MAX_MESSAGES:]:
+        if message["role"] == "user":
+            lines.append(f"- User asked: {_snippet(message['content'])}")
+        elif message["role"] == "assistant" and message.get("content"):
+            lines.append(f"  Answer: {_snippet(message['content'])}")
+    return {"role": "system", "content": "\n".join(lines)}
+
+
+def _trim_start(history, used, budget):
+    """Find the oldest message index that still fits, starting from the newest."""
+    start = len(history)
+    for i in range(len(history) - 1, -1, -1):
+        tokens = message_tokens(history[i])
+        if used + tokens > budget and start < len(history):
+            break
+        used += tokens
+        start = i
+
+    # Never open the kept window with a dangling assistant reply
+    while start < len(history) - 1 and history[start]["role"] != "user":
+        used -= message_tokens(history[start])
+        start += 1
+    return start, used
+
+
+def fit_to_budget(messages, budget=DEFAULT_CONTEXT_BUDGET, strategy="trim", keep_from=0):
+    """Select the messages to send this turn.
+
+    System messages at the head of the history are always kept, followed by as many
+    recent messages as fit in ``budget`` tokens. The newest message is always sent.
+    With the ``summarize`` strategy the dropped turns are replaced by a short note.
+
+    ``keep_from`` is the window start chosen on a previous turn. It is reused while
+    everything after it still fits, so the prompt prefix stays byte-identical and the
+    server can reuse its KV cache. Once it overflows, the window is re-cut down to
+    ``LOW_WATERMARK`` of the budget so several turns fit before the prefix moves again.
+
+    Returns the selected messages, their estimated prompt tokens and the window start
+    as an index into ``messages``.
+    """
+    head = 0
+    while head < len(messages) and messages[head]["role"] == "system":
+        head += 1
+    system, history = messages[:head], messages[head:]
+    system_tokens = sum(message_tokens(m) for m in system)
+
+    start = min(max(keep_from - head, 0), max(len(history) - 1, 0))
+    used = system_tokens + sum(message_tokens(m) for m in history[start:])
+    summary = summarize_turns(history[:start]) if start and strategy == "summarize" else None
+    if used + (message_tokens(summary) if summary else 0) > budget:
+        target = int(budget * LOW_WATERMARK)
+        start, used = _trim_start(history, system_tokens, target)
+        summary = None
+        if start and strategy == "summarize":
+            summary = summarize_turns(history[:start])
+            # Make room for the note by folding more of the oldest kept turns into it
+            while start < len(history) - 1 and used + message_tokens(summary) > target:
+                used -= message_tokens(history[start])
+                start += 1
+                summary = summarize_turns(history[:start])
+
+    if summary:
+        return system + [summary] + history[start:], used + message_tokens(summary), head + start
+    return system + history[start:], used, head + start
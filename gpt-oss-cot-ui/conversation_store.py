@@ -0,0 +1,167 @@
+"""Persistent conversation history in SQLite (WAL mode).
+
+Messages are queued and written by a background thread in batches, so saving never
+waits on the disk. A ``conversations`` table keeps each conversation's title, message
+count and last update, so listing recent conversations reads a few index rows no
+matter how long they are. Messages are read back a page at a time, so resuming a
+conversation only loads the part that is shown.
+
+Each conversation records the ``owner`` that started it (the app uses a browser
+cookie), and only that owner's conversations are listed. Conversations saved before
+owners were recorded have none and aren't listed for anyone.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_PAGE_SIZE = 100
+TITLE_LENGTH = 80
+
+_STOP = object()
+
+
+def conversation_title(message):
+    """Title a conversation after its first message."""
+    return " ".join((message.get("content") or "").split())[:TITLE_LENGTH]
+
+
+class ConversationStore:
+    """Append-only message log with a per-conversation index.
+
+    ``append`` only serializes the message and queues it; the writer thread inserts
+    whatever has queued up in one transaction. Reads use their own connection and
+    see everything written so far (call ``flush`` first to include queued messages).
+    """
+
+    def __init__(self, db_path, clock=time.time):
+        self.db_path = db_path
+        self.clock = clock
+        self.write_error = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._db = self._connect()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "id TEXT PRIMARY KEY, title TEXT, created REAL, updated REAL, message_count INTEGER, owner TEXT)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(conversations)")]
+        if "owner" not in columns:
+            self._db.execute("ALTER TABLE conversations ADD COLUMN owner TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS conversations_updated ON conversations (updated)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS conversations_owner ON conversations (owner, updated)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "conversation_id TEXT, seq INTEGER, created REAL, payload TEXT, "
+            "PRIMARY KEY (conversation_id, seq)) WITHOUT ROWID"
+        )
+        self._db.commit()
+        self._writer = threading.Thread(target=self._write_loop, name="conversation-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps the log consistent on a crash; syncing every commit isn't needed
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def append(self, conversation_id, message, owner=None):
+        """Queue a message for the end of a conversation; ``owner`` is kept from its first message."""
+        # Serialize now: the caller may keep mutating the dict (e.g. cached token counts)
+        payload = json.dumps(message, ensure_ascii=False)
+        self._queue.put((conversation_id, self.clock(), conversation_title(message), payload, owner))
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not _STOP]
+            try:
+                if records:
+                    self._write(db, records)
+            except sqlite3.Error as e:
+                # Keep the writer alive; the app keeps the conversation in memory regardless
+                self.write_error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(records) < len(batch):
+                db.close()
+                return
+
+    def _write(self, db, records):
+        with db:
+            for conversation_id, created, title, payload, owner in records:
+                row = db.execute("SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+                if row is None:
+                    db.execute(
+                        "INSERT INTO conversations (id, title, created, updated, message_count, owner) VALUES (?, ?, ?, ?, 0, ?)",
+                        (conversation_id, title, created, created, owner),
+                    )
+                    seq = 0
+                else:
+                    seq = row[0]
+                db.execute("INSERT INTO messages VALUES (?, ?, ?, ?)", (conversation_id, seq, created, payload))
+                db.execute(
+                    "UPDATE conversations SET message_count = ?, updated = ? WHERE id = ?",
+                    (seq + 1, created, conversation_id),
+                )
+
+    def flush(self):
+        """Block until every queued message is written."""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer thread."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        with self._lock:
+            self._db.close()
+
+    def conversations(self, owner, limit=20):
+        """``owner``'s most recently updated conversations, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, title, created, updated, message_count FROM conversations "
+                "WHERE owner = ? ORDER BY updated DESC LIMIT ?",
+                (owner, limit),
+            ).fetchall()
+        return [
+            {"id": row[0], "title": row[1], "created": row[2], "updated": row[3], "message_count": row[4]}
+            for row in rows
+        ]
+
+    def owner(self, conversation_id):
+        """Who started a conversation, or ``None``."""
+        with self._lock:
+            row = self._db.execute("SELECT owner FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return row[0] if row else None
+
+    def message_count(self, conversation_id):
+        with self._lock:
+            row = self._db.execute("SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return row[0] if row else 0
+
+    def iter_messages(self, conversation_id, start=0, stop=None, page_size=DEFAULT_PAGE_SIZE):
+        """Yield messages ``start`` to ``stop`` of a conversation, fetching a page at a time."""
+        seq = start
+        while stop is None or seq < stop:
+            limit = page_size if stop is None else min(page_size, stop - seq)
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT seq, payload FROM messages WHERE conversation_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                    (conversation_id, seq, limit),
+                ).fetchall()
+            if not rows:
+                return
+            for row_seq, payload in rows:
+                yield json.loads(payload)
+            seq = rows[-1][0] + 1
@@ -0,0 +1,193 @@
+"""Stream reasoning to the browser as appended text instead of the whole buffer.
+
+``st.empty().markdown(text)`` re-sends the full text on every redraw, so a long
+reasoning trace costs more bytes per token the longer it gets, and the browser
+re-parses and re-lays out the whole block each time. ``DeltaRenderer`` mounts a
+small custom component that is sent only what was appended since its last flushes.
+The component keeps one DOM text node per stream, appends to it, and follows the
+output with the scroll position while the reader is at the bottom, so no page-level
+scroll timer is needed.
+
+Streamlit merges queued updates to the same element, which can drop a delta when
+the browser falls behind. Each update therefore also repeats the text of the last
+``RESEND_WINDOW`` seconds and says where it starts; the component skips what it
+already has. The finished turn is rendered as markdown on the next rerun as usual.
+
+``GPT_OSS_DELTA_STREAMING=0`` goes back to re-rendering the whole text.
+"""
+import json
+import os
+import time
+import uuid
+from collections import deque
+
+import streamlit as st
+
+from render import DEFAULT_FLUSH_CHUNKS, DEFAULT_FLUSH_INTERVAL, RenderScheduler, thinking_block
+
+COMPONENT_NAME = "gpt_oss_delta_stream"
+# Text appended this long ago is sent again with each update, see above
+RESEND_WINDOW = 0.25
+THINKING_CLASSES = {
+    "container": "thinking-container",
+    "header": "thinking-header thinking-animation",
+    "body": "thinking-content",
+}
+
+COMPONENT_CSS = """
+.delta-stream-text {
+    white-space: pre-wrap;
+    overflow-wrap: anywhere;
+}
+"""
+
+COMPONENT_JS = """
+const streams = (window.__gptOssDeltaStreams ??= new Map());
+// Streams kept around for remounts; older ones are finished and rendered as markdown
+const MAX_STREAMS = 16;
+// Keep following the output while the reader is this close to the bottom
+const FOLLOW_SLACK = 80;
+
+function scroller(element) {
+    for (let node = element.parentElement; node; node = node.parentElement) {
+        const overflow = getComputedStyle(node).overflowY;
+        if ((overflow === "auto" || overflow === "scroll") && node.scrollHeight > node.clientHeight) {
+            return node;
+        }
+    }
+    return document.scrollingElement;
+}
+
+function open(data) {
+    const root = document.createElement("div");
+    root.className = data.container || "";
+    const header = document.createElement("div");
+    header.className = data.header || "";
+    const body = document.createElement("div");
+    body.className = `${data.body || ""} delta-stream-text`;
+    const text = document.createTextNode("");
+    body.appendChild(text);
+    if (data.label !== undefined) {
+        root.appendChild(header);
+    }
+    root.appendChild(body);
+    const stream = { root, header, text, length: 0, scroller: null };
+    streams.set(data.id, stream);
+    while (streams.size > MAX_STREAMS) {
+        streams.delete(streams.keys().next().value);
+    }
+    return stream;
+}
+
+export default function (component) {
+    const { data, parentElement } = component;
+    if (!data) {
+        return;
+    }
+    const stream = streams.get(data.id) ?? open(data);
+    if (stream.root.parentNode !== parentElement) {
+        // Streamlit remounted the element: move the existing text instead of rebuilding it
+        parentElement.appendChild(stream.root);
+        stream.scroller = null;
+    }
+    if (data.label !== undefined && stream.header.textContent !== data.label) {
+        stream.header.textContent = data.label;
+    }
+    if (data.offset > stream.length) {
+        // Updates were dropped; the complete text is rendered once the turn ends
+        stream.text.appendData(" … ");
+        stream.length = data.offset;
+    }
+    const fresh = data.delta.slice(stream.length - data.offset);
+    if (!fresh) {
+        return;
+    }
+    const box = (stream.scroller ??= scroller(parentElement));
+    const following = box.scrollHeight - box.scrollTop - box.clientHeight < FOLLOW_SLACK;
+    stream.text.appendData(fresh);
+    stream.length += fresh.length;
+    if (following) {
+        box.scrollTop = box.scrollHeight;
+    }
+}
+"""
+
+
+def compact(source):
+    """Drop comments and indentation: the component's code is sent with every update."""
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+def delta_streaming_enabled():
+    return os.environ.get("GPT_OSS_DELTA_STREAMING", "1") != "0"
+
+
+def delta_component():
+    """Return the component's mount function.
+
+    Registering the same definition again is a no-op, so this runs on every script
+    run rather than once per process; that also covers Streamlit restarting its
+    runtime, e.g. in tests.
+    """
+    return st.components.v2.component(COMPONENT_NAME, css=compact(COMPONENT_CSS), js=compact(COMPONENT_JS),
+                                      isolate_styles=False)
+
+
+def utf16_length(text):
+    """Length of ``text`` as JavaScript counts it."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+class DeltaRenderer(RenderScheduler):
+    """RenderScheduler that sends the component only recently appended text.
+
+    Flushes on the same time/size budget as ``RenderScheduler``. ``label`` is an
+    optional callable for the header text, evaluated on each flush.
+    """
+
+    def __init__(self, placeholder, label=None, classes=THINKING_CLASSES, resend_window=RESEND_WINDOW,
+                 interval=DEFAULT_FLUSH_INTERVAL, max_chunks=DEFAULT_FLUSH_CHUNKS, clock=time.monotonic):
+        super().__init__(placeholder, interval=interval, max_chunks=max_chunks, clock=clock)
+        self.label = label
+        self.classes = classes
+        self.resend_window = resend_window
+        self.stream_id = uuid.uuid4().hex
+        self._sent_chars = 0
+        self._sent_units = 0
+        # (flushed_at, chars, utf16_units) at the start of each recent flush
+        self._recent = deque()
+
+    def flush(self, force=False):
+        """Send the text appended since the start of the resend window."""
+        if not self._pending and not force:
+            return
+        text = self.text
+        now = self.clock()
+        while self._recent and now - self._recent[0][0] > self.resend_window:
+            self._recent.popleft()
+        _, start, offset = self._recent[0] if self._recent else (now, self._sent_chars, self._sent_units)
+        if text or self.label:
+            data = {"id": self.stream_id, "offset": offset, "delta": text[start:], **self.classes}
+            if self.label:
+                data["label"] = self.label()
+            # No key: the element id comes from the data, so each flush replaces the last one
+            with self.placeholder:
+                delta_component()(data=data)
+            self._recent.append((now, self._sent_chars, self._sent_units))
+            self._sent_units += utf16_length(text[self._sent_chars:])
+            self._sent_chars = len(text)
+            self.render_calls += 1
+            self.bytes_pushed += len(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        self._pending = 0
+        self._last_flush = now
+
+
+def live_thinking_renderer(placeholder, steps):
+    """Renderer for a live reasoning block, as deltas unless turned off.
+
+    ``steps`` returns the current thinking step count for the header.
+    """
+    if delta_streaming_enabled():
+        return DeltaRenderer(placeholder, label=lambda: f"🧠 Chain-of-Thought Reasoning (Step {steps()})")
+    return RenderScheduler(placeholder, formatter=lambda text: thinking_block(text, steps()), unsafe_allow_html=True)
@@ -0,0 +1,68 @@
+"""Example prompts shown as buttons in the UI and used as the default batch-run set."""
+
+REASONING_EXAMPLES = [
+    {
+        "title": "🧮 Advanced Math",
+        "prompt": "Solve this step by step: If a train travels 120 miles in 2 hours, then speeds up by 25% for the next 3 hours, how far does it travel in total?",
+        "icon": "🚂"
+    },
+    {
+        "title": "💻 Code Generation", 
+        "prompt": "Write a Python function that finds the longest palindromic substring in a given string. Include time complexity analysis.",
+        "icon": "🐍"
+    },
+    {
+        "title": "🔬 Scientific Reasoning",
+        "prompt": "Explain the process of photosynthesis and how it relates to climate change mitigation. Include the chemical equations.",
+        "icon": "🌱"
+    },
+    {
+        "title": "🧩 Logic Puzzle",
+        "prompt": "Three friends Alice, Bob, and Charlie have different colored shirts (red, blue, green). Alice doesn't wear red, Bob doesn't wear blue, and the person in green is taller than Alice. If Charlie is the shortest, what color shirt does each person wear?",
+        "icon": "🎯"
+    }
+]
+
+TOOL_EXAMPLES = [
+    {
+        "title": "🔍 Web Search",
+        "prompt": "Search for the latest news about artificial intelligence breakthroughs in 2025. Summarize the top 3 most important developments.",
+        "icon": "🌐"
+    },
+    {
+        "title": "🐍 Code Execution",
+        "prompt": "Write and execute Python code to calculate the first 10 Fibonacci numbers, then create a simple visualization showing their growth pattern.",
+        "icon": "⚡"
+    },
+    {
+        "title": "📊 Data Analysis",
+        "prompt": "Generate sample sales data for a fictional company and perform basic statistical analysis including mean, median, and trend analysis.",
+        "icon": "📈"
+    },
+    {
+        "title": "🔧 Multi-Tool Task",
+        "prompt": "Research the current weather in San Francisco, then write Python code to convert the temperature to different units and explain the weather patterns.",
+        "icon": "🛠️"
+    },
+    {
+        "title": "📝 File Operations",
+        "prompt": "Create a simple text file with a poem about AI, then read it back and analyze the literary devices used.",
+        "icon": "📄"
+    },
+    {
+        "title": "🧮 Calculator Tool",
+        "prompt": "Use calculation tools to solve this complex problem: What's the compound interest on $10,000 invested at 7% annually for 15 years, compounded monthly?",
+        "icon": "🔢"
+    }
+]
+
+EXAMPLE_SETS = {"reasoning": REASONING_EXAMPLES, "tools": TOOL_EXAMPLES}
+
+
+def example_records(sets=EXAMPLE_SETS):
+    """The examples as batch runner input records."""
+    return [
+        {"id": f"{name}-{i}", "title": example["title"], "prompt": example["prompt"]}
+        for name, examples in sets.items()
+        for i, example in enumerate(examples)
+    ]
@@ -0,0 +1,105 @@
+"""Per-turn latency measurements for streamed generations."""
+import math
+import time
+
+# Timings Ollama reports in the final chunk of a stream (durations in nanoseconds)
+SERVER_TIMING_FIELDS = (
+    "eval_count",
+    "eval_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "load_duration",
+    "total_duration",
+)
+
+# Per-turn metrics kept in session state for the sidebar percentiles
+MAX_TRACKED_TURNS = 500
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; ``None`` for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class TurnMetrics:
+    """Record token arrival times for one assistant turn.
+
+    Feed every chunk to ``observe`` with the time it was read off the HTTP stream;
+    ``as_dict`` then gives time to first thinking/answer token, inter-token latency
+    percentiles, decode speed and the server-side timings from the final chunk.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started_at = clock()
+        self.first_thinking_at = None
+        self.first_content_at = None
+        self.last_token_at = None
+        self.tokens = 0
+        self.thinking_tokens = 0
+        self.gaps = []
+        self.server = {}
+
+    def observe(self, chunk, received_at=None):
+        received_at = self.clock() if received_at is None else received_at
+        message = chunk["message"]
+        has_token = False
+        if message.get("thinking"):
+            has_token = True
+            self.thinking_tokens += 1
+            if self.first_thinking_at is None:
+                self.first_thinking_at = received_at
+        if message.get("content"):
+            has_token = True
+            if self.first_content_at is None:
+                self.first_content_at = received_at
+        if has_token:
+            if self.last_token_at is not None:
+                self.gaps.append(received_at - self.last_token_at)
+            self.last_token_at = received_at
+            self.tokens += 1
+        if chunk.get("done"):
+            self.server = {field: chunk.get(field) for field in SERVER_TIMING_FIELDS if chunk.get(field) is not None}
+
+    def _since_start(self, at):
+        return None if at is None else at - self.started_at
+
+    @property
+    def tokens_per_second(self):
+        """Decode speed, from the server counters when available."""
+        if self.server.get("eval_count") and self.server.get("eval_duration"):
+            return self.server["eval_count"] / (self.server["eval_duration"] / 1e9)
+        first = self.first_thinking_at if self.first_thinking_at is not None else self.first_content_at
+        if first is None or self.last_token_at is None or self.last_token_at <= first:
+            return None
+        return (self.tokens - 1) / (self.last_token_at - first)
+
+    def as_dict(self):
+        metrics = {
+            "ttft_thinking": self._since_start(self.first_thinking_at),
+            "ttft_answer": self._since_start(self.first_content_at),
+            "itl_p50": percentile(self.gaps, 50),
+            "itl_p95": percentile(self.gaps, 95),
+            "itl_p99": percentile(self.gaps, 99),
+            "tokens": self.tokens,
+            "thinking_tokens": self.thinking_tokens,
+            "tokens_per_second": self.tokens_per_second,
+        }
+        metrics.update(self.server)
+        return {key: value for key, value in metrics.items() if value is not None}
+
+
+def record_turn(turns, metrics):
+    """Append a turn's metrics to a bounded history list."""
+    turns.append(metrics)
+    del turns[:-MAX_TRACKED_TURNS]
+
+
+def summarize_turns(turns, key):
+    """Return ``(p50, p95)`` of one metric across recorded turns."""
+    values = [turn[key] for turn in turns if turn.get(key) is not None]
+    return percentile(values, 50), percentile(values, 95)
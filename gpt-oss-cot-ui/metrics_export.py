@@ -0,0 +1,275 @@
+"""Process-wide Prometheus metrics for inference traffic.
+
+Every Streamlit session in the process records into the same registry. Metrics are
+updated when a request is sent and when its turn ends, never per chunk, so the
+streaming loop pays nothing.
+Exposition is opt-in through environment variables:
+
+    GPT_OSS_METRICS_PORT=9464        serve /metrics over HTTP on this port
+    GPT_OSS_METRICS_TEXTFILE=path    rewrite this file for node_exporter's textfile collector
+    GPT_OSS_METRICS_INTERVAL=15      seconds between textfile rewrites
+"""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+TTFT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+DURATION_BUCKETS = (1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+TOOL_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names.
+
+    Exposed as ``<name>_total``, which the HELP and TYPE lines name as well.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name if name.endswith("_total") else f"{name}_total"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative histogram with a fixed set of label names."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class CallbackGauge:
+    """Gauge whose current values are read from a function when the metrics are rendered.
+
+    ``read()`` returns ``{label_values_tuple: value}``.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.read = None
+
+    def samples(self):
+        if self.read is None:
+            return
+        for key, value in sorted(self.read().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Atomically replace ``path`` with the current metrics."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+LABELS = ("model", "reasoning_effort")
+REQUESTS = REGISTRY.register(Counter("gptoss_requests", "Chat generations sent to Ollama.", LABELS))
+ERRORS = REGISTRY.register(Counter("gptoss_errors", "Chat generations that failed, by exception type.", LABELS + ("error",)))
+CACHE_HITS = REGISTRY.register(Counter("gptoss_cache_hits", "Answers served from the response cache.", LABELS))
+COALESCED = REGISTRY.register(Counter("gptoss_coalesced_requests", "Requests that joined an identical generation already running.", LABELS))
+CANCELLATIONS = REGISTRY.register(Counter("gptoss_cancellations", "Chat generations stopped before completion.", LABELS))
+PROMPT_TOKENS = REGISTRY.register(Counter("gptoss_prompt_tokens", "Prompt tokens evaluated by the server.", LABELS))
+COMPLETION_TOKENS = REGISTRY.register(Counter("gptoss_completion_tokens", "Thinking and answer tokens generated.", LABELS))
+TTFT = REGISTRY.register(Histogram("gptoss_time_to_first_token_seconds", "Time to the first thinking or answer token.", LABELS, TTFT_BUCKETS))
+QUEUE_WAIT = REGISTRY.register(Histogram("gptoss_queue_wait_seconds", "Time spent waiting for a generation slot.", LABELS, TTFT_BUCKETS))
+THINKING_TOKENS = REGISTRY.register(Histogram("gptoss_thinking_tokens", "Reasoning tokens generated per turn.", LABELS, TOKEN_BUCKETS))
+STREAM_DURATION = REGISTRY.register(Histogram("gptoss_stream_duration_seconds", "Wall time of a streamed generation.", LABELS, DURATION_BUCKETS))
+TOOL_CALLS = REGISTRY.register(Counter("gptoss_tool_calls", "Tool calls run for the model, by outcome.", ("tool", "outcome")))
+TOOL_DURATION = REGISTRY.register(Histogram("gptoss_tool_duration_seconds", "Time from submitting a tool call to its result.", ("tool",), TOOL_BUCKETS))
+TOOL_POOL = REGISTRY.register(CallbackGauge("gptoss_tool_pool_calls", "Tool calls running or queued in each pool.", ("pool", "state")))
+
+
+def observe_request(model, reasoning_effort):
+    """Count a generation as it is sent; its turn is recorded by ``observe_turn`` when it ends."""
+    REQUESTS.inc(model=model, reasoning_effort=reasoning_effort)
+
+
+def observe_error(model, reasoning_effort, error):
+    ERRORS.inc(model=model, reasoning_effort=reasoning_effort, error=type(error).__name__)
+
+
+def observe_turn(model, reasoning_effort, metrics, duration, cancelled=False):
+    """Record one finished (or stopped) generation from its TurnMetrics dict."""
+    labels = {"model": model, "reasoning_effort": reasoning_effort}
+    if cancelled:
+        CANCELLATIONS.inc(**labels)
+    if metrics.get("prompt_eval_count"):
+        PROMPT_TOKENS.inc(metrics["prompt_eval_count"], **labels)
+    COMPLETION_TOKENS.inc(metrics.get("eval_count", metrics.get("tokens", 0)), **labels)
+    first_token = [metrics[key] for key in ("ttft_thinking", "ttft_answer") if key in metrics]
+    if first_token:
+        TTFT.observe(min(first_token), **labels)
+    if "queue_wait" in metrics:
+        QUEUE_WAIT.observe(metrics["queue_wait"], **labels)
+    if not cancelled and "thinking_tokens" in metrics:
+        THINKING_TOKENS.observe(metrics["thinking_tokens"], **labels)
+    STREAM_DURATION.observe(duration, **labels)
+
+
+def observe_cache_hit(model, reasoning_effort):
+    CACHE_HITS.inc(model=model, reasoning_effort=reasoning_effort)
+
+
+def observe_coalesced(model, reasoning_effort):
+    COALESCED.inc(model=model, reasoning_effort=reasoning_effort)
+
+
+def observe_tool_call(tool, seconds, outcome):
+    TOOL_CALLS.inc(tool=tool, outcome=outcome)
+    TOOL_DURATION.observe(seconds, tool=tool)
+
+
+def watch_tool_pools(executor):
+    """Export the running and queued calls of a ToolExecutor's pools."""
+    TOOL_POOL.read = lambda: {
+        (pool, state): usage[state]
+        for pool, usage in executor.pool_usage().items()
+        for state in ("running", "queued")
+    }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, addr="0.0.0.0"):
+    """Serve the registry on ``/metrics`` from a daemon thread."""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_textfile_writer(path, interval=15.0):
+    """Rewrite a textfile-collector file every ``interval`` seconds."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            REGISTRY.write_textfile(path)
+
+    REGISTRY.write_textfile(path)
+    threading.Thread(target=run, name="metrics-textfile", daemon=True).start()
+    return stop
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def configure_from_env():
+    """Start the exporters selected by environment variables, once per process."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        port = os.environ.get("GPT_OSS_METRICS_PORT")
+        if port:
+            start_http_server(int(port))
+        textfile = os.environ.get("GPT_OSS_METRICS_TEXTFILE")
+        if textfile:
+            start_textfile_writer(textfile, float(os.environ.get("GPT_OSS_METRICS_INTERVAL", 15)))
@@ -0,0 +1,348 @@
+"""Local stand-in for an Ollama server, for benchmarks and load tests without a GPU.
+
+Speaks the streaming NDJSON protocol of ``POST /api/chat`` over keep-alive HTTP/1.1:
+
+    python mock_ollama.py --port 11435 --thinking-tokens 200 --content-tokens 80
+    python mock_ollama.py --port 11435 --fixture fixtures/quicksort.jsonl --speed 4
+
+Responses are produced by a *responder*: a callable taking the decoded request body
+and yielding ``(delay_seconds, chunk_dict)`` pairs. The default one synthesizes a
+thinking phase followed by an answer; ``--fixture`` replays recorded streams (see
+``stream_fixtures.py``) at their recorded pace, a multiple of it, or the ``burst``
+and ``stall`` worst cases.
+
+Model residency is simulated too: a model not used within its ``keep_alive`` takes
+``--load-time`` seconds to load again, reported as ``load_duration``, and
+``/api/ps`` lists the models currently loaded.
+
+``POST /api/embed`` returns hashed bag-of-words vectors, so rewordings sharing most
+of their words come out similar, as with a real embedding model.
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _timestamp(at=None):
+    moment = datetime.now(timezone.utc) if at is None else datetime.fromtimestamp(at, timezone.utc)
+    return moment.isoformat().replace("+00:00", "Z")
+
+
+# Ollama's default keep_alive, and the unit suffixes its duration strings use
+DEFAULT_KEEP_ALIVE = 300.0
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def keep_alive_seconds(value):
+    """Seconds from a request's ``keep_alive`` (number or ``"5m"``-style string); negative is forever."""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, str):
+        for unit in sorted(_DURATION_UNITS, key=len, reverse=True):
+            if value.endswith(unit):
+                return float(value[:-len(unit)]) * _DURATION_UNITS[unit]
+    return float(value)
+
+
+# Reasoning length at each ``think`` effort level, relative to ``thinking_tokens``
+EFFORT_SCALE = {"low": 0.25, "medium": 1.0, "high": 3.0}
+
+
+class SyntheticResponder:
+    """Generate a fixed-shape reasoning response at a steady token rate.
+
+    ``think`` effort levels scale the reasoning length and ``options.num_predict``
+    caps the total, like the real server.
+    """
+
+    def __init__(self, thinking_tokens=200, content_tokens=80, ttft=0.05, token_delay=0.005):
+        self.thinking_tokens = thinking_tokens
+        self.content_tokens = content_tokens
+        self.ttft = ttft
+        self.token_delay = token_delay
+
+    def __call__(self, request):
+        model = request.get("model", "gpt-oss:20b")
+        prompt_tokens = sum(len(m.get("content", "")) // 4 + 4 for m in request.get("messages", []))
+        think = request.get("think", True)
+        thinking_tokens = int(self.thinking_tokens * EFFORT_SCALE.get(think, 1.0)) if think else 0
+        content_tokens = self.content_tokens
+        limit = (request.get("options") or {}).get("num_predict")
+        if limit and limit > 0 and thinking_tokens + content_tokens > limit:
+            thinking_tokens = min(thinking_tokens, limit)
+            content_tokens = limit - thinking_tokens
+        delay = self.ttft
+        for i in range(thinking_tokens):
+            yield delay, {"model": model, "created_at": _timestamp(),
+                          "message": {"role": "assistant", "content": "", "thinking": f" step{i}"},
+                          "done": False}
+            delay = self.token_delay
+        for i in range(content_tokens):
+            yield delay, {"model": model, "created_at": _timestamp(),
+                          "message": {"role": "assistant", "content": f" word{i}"}, "done": False}
+            delay = self.token_delay
+        eval_count = thinking_tokens + content_tokens
+        yield 0, {"model": model, "created_at": _timestamp(),
+                  "message": {"role": "assistant", "content": ""},
+                  "done": True, "done_reason": "length" if content_tokens < self.content_tokens else "stop",
+                  "total_duration": int((self.ttft + eval_count * self.token_delay) * 1e9),
+                  "load_duration": 0,
+                  "prompt_eval_count": prompt_tokens,
+                  "prompt_eval_duration": int(self.ttft * 1e9),
+                  "eval_count": eval_count,
+                  "eval_duration": int(eval_count * self.token_delay * 1e9)}
+
+
+class ToolCallResponder:
+    """Ask for tool calls at the start of a turn, then answer like ``responder``.
+
+    ``calls`` are ``(name, arguments)`` pairs; only tools offered in the request are
+    called. Once the turn has tool results the request is passed to ``responder``.
+    """
+
+    def __init__(self, calls, responder=None, thinking_tokens=20, token_delay=0.005):
+        self.calls = list(calls)
+        self.responder = responder or SyntheticResponder()
+        self.thinking_tokens = thinking_tokens
+        self.token_delay = token_delay
+
+    def __call__(self, request):
+        messages = request.get("messages", [])
+        last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=0)
+        offered = {tool["function"]["name"] for tool in request.get("tools") or []}
+        calls = [(name, arguments) for name, arguments in self.calls if name in offered]
+        if not calls or any(m.get("role") == "tool" for m in messages[last_user:]):
+            yield from self.responder(request)
+            return
+        model = request.get("model", "gpt-oss:20b")
+        for i in range(self.thinking_tokens):
+            yield self.token_delay, {"model": model, "created_at": _timestamp(),
+                                     "message": {"role": "assistant", "content": "", "thinking": f" plan{i}"},
+                                     "done": False}
+        yield 0, {"model": model, "created_at": _timestamp(),
+                  "message": {"role": "assistant", "content": "",
+                              "tool_calls": [{"function": {"name": name, "arguments": arguments}}
+                                             for name, arguments in calls]},
+                  "done": False}
+        yield 0, {"model": model, "created_at": _timestamp(), "message": {"role": "assistant", "content": ""},
+                  "done": True, "done_reason": "stop", "eval_count": self.thinking_tokens + 1,
+                  "eval_duration": int(self.thinking_tokens * self.token_delay * 1e9)}
+
+
+def embed_text(text, dim=256):
+    """Unit vector of signed word-hash counts."""
+    vector = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+        vector[digest % dim] += 1.0 if digest >> 63 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self):
+        with self.server.lock:
+            self.server.connections.discard(self.connection)
+        super().finish()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json({"version": "0.0.0-mock"})
+        elif self.path == "/api/tags":
+            self._send_json({"models": [{"name": "gpt-oss:20b", "model": "gpt-oss:20b"}]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [
+                {"name": model, "model": model, "expires_at": _timestamp(expires_at) if expires_at else None}
+                for model, expires_at in self.server.loaded_models().items()
+            ]})
+        elif self.path == "/":
+            body = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/embed":
+            texts = request.get("input", "")
+            texts = [texts] if isinstance(texts, str) else texts
+            self._send_json({"model": request.get("model"), "embeddings": [embed_text(text) for text in texts]})
+            return
+        if self.path != "/api/chat":
+            self._send_json({"error": "not found"}, 404)
+            return
+
+        server = self.server
+        load = server.load_model(request.get("model", "gpt-oss:20b"), request.get("keep_alive"))
+        if load:
+            time.sleep(load)
+        if not request.get("messages"):
+            # An empty chat only loads the model
+            self._send_json({"model": request.get("model"), "created_at": _timestamp(),
+                             "message": {"role": "assistant", "content": ""},
+                             "done": True, "done_reason": "load", "load_duration": int(load * 1e9)})
+            return
+
+        with server.lock:
+            server.active_streams += 1
+            server.total_requests += 1
+        try:
+            chunks = server.responder(request)
+            if not request.get("stream", True):
+                content, thinking, final = [], [], {}
+                for delay, chunk in chunks:
+                    time.sleep(delay)
+                    if load and chunk.get("done"):
+                        chunk["load_duration"] = int(load * 1e9)
+                    content.append(chunk["message"].get("content", ""))
+                    thinking.append(chunk["message"].get("thinking", ""))
+                    final = chunk
+                final["message"] = {"role": "assistant", "content": "".join(content), "thinking": "".join(thinking)}
+                self._send_json(final)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for delay, chunk in chunks:
+                if delay:
+                    time.sleep(delay)
+                if load and chunk.get("done"):
+                    chunk["load_duration"] = int(load * 1e9)
+                line = json.dumps(chunk).encode("utf-8") + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client hung up, e.g. a cancelled generation
+            with server.lock:
+                server.aborted_requests += 1
+            self.close_connection = True
+        finally:
+            with server.lock:
+                server.active_streams -= 1
+
+
+class MockOllamaServer(ThreadingHTTPServer):
+    """Threaded mock server; use as a context manager to run it in the background."""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, responder=None, load_time=0.0):
+        super().__init__((host, port), _Handler)
+        self.responder = responder or SyntheticResponder()
+        self.load_time = load_time
+        self.loaded = {}  # model -> unload time, None for never
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.active_streams = 0
+        self.total_requests = 0
+        self.aborted_requests = 0
+        self._thread = None
+
+    def loaded_models(self):
+        now = time.time()
+        with self.lock:
+            for model, expires_at in list(self.loaded.items()):
+                if expires_at is not None and expires_at <= now:
+                    del self.loaded[model]
+            return dict(self.loaded)
+
+    def load_model(self, model, keep_alive):
+        """Mark ``model`` used now; return the seconds spent loading it (0 if it was resident)."""
+        load = 0.0 if model in self.loaded_models() else self.load_time
+        keep_alive = keep_alive_seconds(keep_alive)
+        with self.lock:
+            if keep_alive == 0:
+                self.loaded.pop(model, None)
+            else:
+                self.loaded[model] = None if keep_alive < 0 else time.time() + load + keep_alive
+        return load
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and drop open keep-alive connections, like a host going down."""
+        self.shutdown()
+        self.server_close()
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock Ollama server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--thinking-tokens", type=int, default=200)
+    parser.add_argument("--content-tokens", type=int, default=80)
+    parser.add_argument("--ttft", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="seconds between tokens")
+    parser.add_argument("--load-time", type=float, default=0.0, help="seconds to load a model that isn't resident")
+    parser.add_argument("--fixture", action="append", help="replay a recorded stream (repeatable)")
+    parser.add_argument("--speed", default="recorded", help="recorded, burst, stall or a speed-up factor")
+    args = parser.parse_args()
+
+    if args.fixture:
+        from stream_fixtures import FixtureResponder, load_fixture, parse_speed
+        responder = FixtureResponder([load_fixture(path) for path in args.fixture], parse_speed(args.speed))
+    else:
+        responder = SyntheticResponder(args.thinking_tokens, args.content_tokens, args.ttft, args.token_delay)
+    server = MockOllamaServer(args.host, args.port, responder, args.load_time)
+    print(f"Mock Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
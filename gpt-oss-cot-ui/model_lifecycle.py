@@ -0,0 +1,247 @@
+"""Keep chat models loaded between requests and track how long loads take.
+
+Ollama unloads a model ``keep_alive`` after its last request (five minutes by
+default), and the next request waits for the whole model to load again, reported as
+``load_duration``. ``ModelLifecycle``:
+
+- warms each model on every backend at startup with an empty chat request, which
+  loads it without generating anything
+- sends each request a ``keep_alive`` long enough to bridge the gaps between recent
+  requests, bounded by ``GPT_OSS_KEEP_ALIVE_MIN`` and ``GPT_OSS_KEEP_ALIVE_MAX``
+  (seconds; a negative maximum keeps models loaded indefinitely)
+- reloads a model before it expires while traffic is steady, and at the local times
+  in ``GPT_OSS_WARM_AT`` (e.g. ``08:30,13:00``) so the first user of the morning
+  doesn't wait for the load
+- tracks whether each model is loaded, from ``/api/ps``, and its recent load times
+
+``GPT_OSS_WARM_MODELS`` lists the models to manage (default ``gpt-oss:20b``).
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+DEFAULT_MODELS = ("gpt-oss:20b",)
+DEFAULT_MIN_KEEP_ALIVE = 300  # Ollama's own default
+DEFAULT_MAX_KEEP_ALIVE = 4 * 3600
+DEFAULT_REFRESH_INTERVAL = 60.0
+# keep_alive covers this multiple of the longest gap between recent requests
+GAP_FACTOR = 2.0
+# Request times remembered per model for the gap estimate
+TRAFFIC_SAMPLES = 20
+# This many requests within the window count as steady traffic worth staying loaded for
+BUSY_WINDOW = 3600.0
+BUSY_REQUESTS = 3
+# A reported load_duration above this means the model was actually loaded, not already resident
+COLD_LOAD_SECONDS = 0.5
+LOAD_SAMPLES = 20
+# How late a scheduled warm-up may still run, e.g. after a restart
+SCHEDULE_GRACE = 3600.0
+
+
+class ModelState:
+    """What is known about one model on one backend."""
+
+    def __init__(self, host, model):
+        self.host = host
+        self.model = model
+        self.loaded = None  # unknown until warmed, used or polled
+        self.expires_at = None  # wall-clock time; None while loaded means never
+        self.warming = False
+        self.error = None
+        self.loads = deque(maxlen=LOAD_SAMPLES)
+        self.last_load_at = None
+
+    def snapshot(self, now):
+        return {
+            "host": self.host,
+            "model": self.model,
+            "loaded": self.loaded,
+            "warming": self.warming,
+            "expires_in": None if self.expires_at is None else max(self.expires_at - now, 0.0),
+            "last_load_seconds": self.loads[-1] if self.loads else None,
+            "mean_load_seconds": sum(self.loads) / len(self.loads) if self.loads else None,
+            "loads": len(self.loads),
+            "error": self.error,
+        }
+
+
+class ModelLifecycle:
+    """Warm-up, adaptive keep_alive and load tracking for the router's backends."""
+
+    def __init__(self, router, models=DEFAULT_MODELS, min_keep_alive=DEFAULT_MIN_KEEP_ALIVE,
+                 max_keep_alive=DEFAULT_MAX_KEEP_ALIVE, refresh_interval=DEFAULT_REFRESH_INTERVAL,
+                 warm_at=(), clock=time.time):
+        self.router = router
+        self.models = list(models)
+        self.min_keep_alive = min_keep_alive
+        self.max_keep_alive = max_keep_alive
+        self.refresh_interval = refresh_interval
+        self.warm_at = list(warm_at)
+        self.clock = clock
+        self._requests = {}
+        self._states = {}
+        self._scheduled = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _state(self, host, model):
+        key = (host, model)
+        if key not in self._states:
+            self._states[key] = ModelState(host, model)
+        return self._states[key]
+
+    def keep_alive(self, model):
+        """Seconds to keep ``model`` loaded after a request, from recent traffic."""
+        if self.max_keep_alive < 0:
+            return -1
+        with self._lock:
+            times = list(self._requests.get(model, ()))
+        longest_gap = max((b - a for a, b in zip(times, times[1:])), default=0.0)
+        return int(min(max(GAP_FACTOR * longest_gap, self.min_keep_alive), self.max_keep_alive))
+
+    def begin_request(self, model):
+        """Note a request for ``model`` and return the ``keep_alive`` to send with it."""
+        keep_alive = self.keep_alive(model)
+        with self._lock:
+            self._requests.setdefault(model, deque(maxlen=TRAFFIC_SAMPLES)).append(self.clock())
+        return keep_alive
+
+    def _loaded(self, state, load_duration, keep_alive):
+        now = self.clock()
+        state.loaded = True
+        state.error = None
+        state.expires_at = None if keep_alive < 0 else now + keep_alive
+        load_seconds = (load_duration or 0) / 1e9
+        if load_seconds >= COLD_LOAD_SECONDS:
+            state.loads.append(load_seconds)
+            state.last_load_at = now
+
+    def track(self, stream, model, keep_alive, conversation_id=None):
+        """Pass a chat stream through, recording the load time its final chunk reports."""
+        try:
+            for chunk in stream:
+                if chunk.get("done"):
+                    host = self.router.backend_for(conversation_id) if conversation_id else None
+                    if host is None and len(self.router.backends) == 1:
+                        host = self.router.backends[0].host
+                    if host is not None:
+                        with self._lock:
+                            self._loaded(self._state(host, model), chunk.get("load_duration"), keep_alive)
+                yield chunk
+        finally:
+            stream.close()
+
+    def warm(self, backend, model):
+        """Load ``model`` on ``backend`` with an empty request, unless already in progress."""
+        with self._lock:
+            state = self._state(backend.host, model)
+            if state.warming:
+                return
+            state.warming = True
+        keep_alive = self.keep_alive(model)
+        try:
+            response = backend.client.chat(model=model, messages=[], keep_alive=keep_alive)
+        except Exception as e:
+            with self._lock:
+                state.error = repr(e)
+            return
+        finally:
+            with self._lock:
+                state.warming = False
+        with self._lock:
+            self._loaded(state, response.get("load_duration"), keep_alive)
+
+    def poll(self):
+        """Refresh loaded/expiry state from every healthy backend's ``/api/ps``."""
+        for backend in self.router.backends:
+            if not backend.healthy:
+                continue
+            try:
+                running = {model.model or model.name: model for model in backend.client.ps().models}
+            except Exception:
+                continue
+            with self._lock:
+                for (host, name), state in self._states.items():
+                    if host != backend.host:
+                        continue
+                    model = running.get(name)
+                    state.loaded = model is not None
+                    if model is None:
+                        state.expires_at = None
+                    elif model.expires_at is not None:
+                        state.expires_at = model.expires_at.timestamp()
+
+    def _busy(self, model, now):
+        with self._lock:
+            return sum(1 for t in self._requests.get(model, ()) if now - t < BUSY_WINDOW) >= BUSY_REQUESTS
+
+    def _schedule_due(self, now):
+        """Whether one of the ``warm_at`` times has just passed and not been handled yet."""
+        today = datetime.fromtimestamp(now)
+        due = False
+        for hour, minute in self.warm_at:
+            slot = today.replace(hour=hour, minute=minute, second=0, microsecond=0).timestamp()
+            if 0 <= now - slot < SCHEDULE_GRACE and self._scheduled.get((hour, minute)) != today.date():
+                self._scheduled[(hour, minute)] = today.date()
+                due = True
+        return due
+
+    def refresh(self):
+        """Reload models that are about to expire while they are in demand or scheduled."""
+        self.poll()
+        now = self.clock()
+        scheduled = self._schedule_due(now)
+        for backend in self.router.backends:
+            if not backend.healthy:
+                continue
+            for model in self.models:
+                with self._lock:
+                    state = self._state(backend.host, model)
+                    expiring = not state.loaded or (
+                        state.expires_at is not None and state.expires_at - now < 2 * self.refresh_interval
+                    )
+                if scheduled or (expiring and self._busy(model, now)):
+                    self.warm(backend, model)
+
+    def _run(self):
+        for backend in self.router.backends:
+            for model in self.models:
+                self.warm(backend, model)
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def start(self):
+        """Warm every model in the background, then keep refreshing."""
+        threading.Thread(target=self._run, name="model-lifecycle", daemon=True).start()
+        return self
+
+    def snapshot(self):
+        now = self.clock()
+        with self._lock:
+            return [state.snapshot(now) for state in self._states.values()]
+
+    def close(self):
+        self._stop.set()
+
+
+def parse_warm_times(value):
+    """``"08:30,13:00"`` -> ``[(8, 30), (13, 0)]``."""
+    times = []
+    for item in value.split(","):
+        if item.strip():
+            hour, minute = item.strip().split(":")
+            times.append((int(hour), int(minute)))
+    return times
+
+
+def lifecycle_from_env(router):
+    models = os.environ.get("GPT_OSS_WARM_MODELS", ",".join(DEFAULT_MODELS))
+    return ModelLifecycle(
+        router,
+        models=[model.strip() for model in models.split(",") if model.strip()],
+        min_keep_alive=float(os.environ.get("GPT_OSS_KEEP_ALIVE_MIN", DEFAULT_MIN_KEEP_ALIVE)),
+        max_keep_alive=float(os.environ.get("GPT_OSS_KEEP_ALIVE_MAX", DEFAULT_MAX_KEEP_ALIVE)),
+        warm_at=parse_warm_times(os.environ.get("GPT_OSS_WARM_AT", "")),
+    )
@@ -0,0 +1,125 @@
+"""Pooled, retrying Ollama client shared by every session in the process."""
+import asyncio
+import os
+import random
+import time
+
+import httpx
+from ollama import AsyncClient, Client
+
+DEFAULT_MAX_CONNECTIONS = 32
+DEFAULT_MAX_KEEPALIVE = 16
+DEFAULT_KEEPALIVE_EXPIRY = 120.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+# Reads wait for the next token, which can take a while during long prefills
+DEFAULT_READ_TIMEOUT = 300.0
+
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_BASE_DELAY = 0.25
+DEFAULT_RETRY_MAX_DELAY = 4.0
+
+# Failures that happen before the server has started generating and are safe to retry
+RETRYABLE_ERRORS = (ConnectionError, httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+def _client_kwargs(max_connections, max_keepalive, keepalive_expiry, connect_timeout, read_timeout):
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        "timeout": httpx.Timeout(read_timeout, connect=connect_timeout, pool=connect_timeout),
+    }
+
+
+def create_client(host=None, max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive=DEFAULT_MAX_KEEPALIVE,
+                  keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                  read_timeout=DEFAULT_READ_TIMEOUT):
+    """Create an ``ollama.Client`` with an explicit connection pool and timeouts.
+
+    ``host`` defaults to ``OLLAMA_HOST`` like the library's own client.
+    """
+    return Client(host=host, **_client_kwargs(max_connections, max_keepalive, keepalive_expiry,
+                                               connect_timeout, read_timeout))
+
+
+def create_async_client(host=None, max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive=DEFAULT_MAX_KEEPALIVE,
+                        keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                        read_timeout=DEFAULT_READ_TIMEOUT):
+    """Async counterpart of ``create_client``; bind it to a single event loop."""
+    return AsyncClient(host=host, **_client_kwargs(max_connections, max_keepalive, keepalive_expiry,
+                                                   connect_timeout, read_timeout))
+
+
+def client_settings_from_env():
+    """Pool and timeout settings from ``GPT_OSS_*`` environment variables."""
+    return {
+        "max_connections": int(os.environ.get("GPT_OSS_POOL_SIZE", DEFAULT_MAX_CONNECTIONS)),
+        "max_keepalive": int(os.environ.get("GPT_OSS_POOL_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+        "connect_timeout": float(os.environ.get("GPT_OSS_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+        "read_timeout": float(os.environ.get("GPT_OSS_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+    }
+
+
+def client_from_env(host=None):
+    """Create a client for ``host`` (default ``OLLAMA_HOST``) with the configured pool."""
+    return create_client(host=host or os.environ.get("OLLAMA_HOST"), **client_settings_from_env())
+
+
+def backoff_delay(attempt, base_delay=DEFAULT_RETRY_BASE_DELAY, max_delay=DEFAULT_RETRY_MAX_DELAY):
+    """Full-jitter exponential backoff for the given (zero-based) retry attempt."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def stream_chat(client, retries=DEFAULT_RETRIES, base_delay=DEFAULT_RETRY_BASE_DELAY,
+                max_delay=DEFAULT_RETRY_MAX_DELAY, **kwargs):
+    """Stream a chat response, retrying connection failures before the first chunk.
+
+    Once a chunk has arrived the request is never replayed, so a retry can't
+    duplicate output. Closing the returned generator closes the HTTP response.
+    """
+    attempt = 0
+    while True:
+        stream = client.chat(stream=True, **kwargs)
+        try:
+            first = next(stream)
+        except StopIteration:
+            return
+        except RETRYABLE_ERRORS:
+            if attempt >= retries:
+                raise
+            time.sleep(backoff_delay(attempt, base_delay, max_delay))
+            attempt += 1
+            continue
+        break
+    yield first
+    yield from stream
+
+
+async def astream_chat(client, retries=DEFAULT_RETRIES, base_delay=DEFAULT_RETRY_BASE_DELAY,
+                       max_delay=DEFAULT_RETRY_MAX_DELAY, **kwargs):
+    """Async counterpart of ``stream_chat`` for an ``AsyncClient``.
+
+    Closing (or cancelling) the returned generator closes the HTTP response.
+    """
+    attempt = 0
+    while True:
+        stream = await client.chat(stream=True, **kwargs)
+        try:
+            first = await anext(stream)
+        except StopAsyncIteration:
+            return
+        except RETRYABLE_ERRORS:
+            if attempt >= retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt, base_delay, max_delay))
+            attempt += 1
+            continue
+        break
+    try:
+        yield first
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()
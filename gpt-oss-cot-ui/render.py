@@ -0,0 +1,80 @@
+import time
+
+# Flush budget for streamed output: whichever limit is hit first triggers a redraw
+DEFAULT_FLUSH_INTERVAL = 0.075
+DEFAULT_FLUSH_CHUNKS = 32
+
+
+def thinking_block(thinking_content, thinking_steps):
+    """Build the live chain-of-thought HTML block."""
+    return f"""
+                <div class="thinking-container">
+                    <div class="thinking-header thinking-animation">
+                        🧠 Chain-of-Thought Reasoning (Step {thinking_steps})
+                    </div>
+                    <div class="thinking-content">
+                        {thinking_content}
+                    </div>
+                </div>
+                """
+
+
+def history_thinking_html(thinking_content):
+    """Build the reasoning HTML for a finished message.
+
+    The markup is flush-left so Streamlit's dedent leaves it as an HTML block and the
+    output is byte-identical across reruns. It isn't cached: a cache keyed by the text
+    would keep plaintext reasoning alive outside the compressed thinking archive.
+    """
+    return f'<div class="thinking-content">\n\n{thinking_content}\n\n</div>'
+
+
+class RenderScheduler:
+    """Collect streamed chunks and push them to a Streamlit placeholder on a time/size budget.
+
+    Chunks are appended to a list instead of a growing string, and the placeholder is
+    only redrawn every ``interval`` seconds or every ``max_chunks`` chunks, plus one
+    final flush once the stream ends.
+    """
+
+    def __init__(self, placeholder, formatter=None, interval=DEFAULT_FLUSH_INTERVAL,
+                 max_chunks=DEFAULT_FLUSH_CHUNKS, clock=time.monotonic, **markdown_kwargs):
+        self.placeholder = placeholder
+        self.formatter = formatter
+        self.interval = interval
+        self.max_chunks = max_chunks
+        self.clock = clock
+        self.markdown_kwargs = markdown_kwargs
+        self._parts = []
+        self._pending = 0
+        self._last_flush = clock()
+        self.render_calls = 0
+        self.bytes_pushed = 0
+
+    @property
+    def text(self):
+        """Return everything appended so far."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def append(self, chunk):
+        """Buffer a chunk and flush if the time or size budget is exhausted."""
+        if not chunk:
+            return
+        self._parts.append(chunk)
+        self._pending += 1
+        if self._pending >= self.max_chunks or self.clock() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self, force=False):
+        """Redraw the placeholder with the buffered text."""
+        if not self._pending and not force:
+            return
+        body = self.formatter(self.text) if self.formatter else self.text
+        if body:
+            self.placeholder.markdown(body, **self.markdown_kwargs)
+            self.render_calls += 1
+            self.bytes_pushed += len(body.encode("utf-8"))
+        self._pending = 0
+        self._last_flush = self.clock()
@@ -0,0 +1,62 @@
+"""Build the exact payload sent to Ollama for a chat turn."""
+
+# Fields the chat endpoint understands; UI bookkeeping such as thinking, timings
+# and token estimates stays in session state and never reaches the model
+REQUEST_FIELDS = ("role", "content", "images", "tool_calls", "tool_name")
+
+# One system prompt for every turn and effort level, so every request shares a
+# byte-identical prefix and Ollama can reuse the KV cache for it. The effort level
+# goes in the request's ``think`` option, which sets the model's reasoning depth.
+SYSTEM_PROMPT = (
+    "You are GPT-OSS, an advanced open-weight reasoning model. "
+    "Show your thinking process clearly and be thorough in your analysis."
+)
+
+# Model families whose ``think`` option takes an effort level; others only turn thinking on
+EFFORT_LEVEL_MODELS = ("gpt-oss",)
+
+# Sent after cutting off reasoning that ran past the thinking budget
+FINISH_REASONING_PROMPT = (
+    "Your reasoning budget is used up. Here is your reasoning so far:\n\n{thinking}\n\n"
+    "Give your final answer to my previous message now, without further deliberation."
+)
+
+
+def system_message():
+    return {"role": "system", "content": SYSTEM_PROMPT}
+
+
+def think_option(model, reasoning_effort):
+    """``think`` value for a request: the effort level where the model supports one."""
+    family = model.split(":")[0].split("/")[-1]
+    return reasoning_effort if family in EFFORT_LEVEL_MODELS else True
+
+
+def generation_options(num_ctx=None, num_predict=None):
+    """Ollama ``options`` for a request; unset (or zero) values keep the model's defaults."""
+    options = {}
+    if num_ctx:
+        options["num_ctx"] = int(num_ctx)
+    if num_predict:
+        options["num_predict"] = int(num_predict)
+    return options or None
+
+
+def finish_reasoning_messages(messages, thinking):
+    """Request messages asking for the answer once reasoning has been cut off."""
+    return messages + [{"role": "user", "content": FINISH_REASONING_PROMPT.format(thinking=thinking)}]
+
+
+def request_message(message):
+    """Copy only the fields the model needs from a stored message."""
+    request = {"role": message["role"], "content": message.get("content", "")}
+    for key in REQUEST_FIELDS[2:]:
+        if message.get(key):
+            request[key] = message[key]
+    return request
+
+
+def build_request_messages(messages):
+    """Strip stored chain-of-thought and UI metadata from the history to send."""
+    return [request_message(message) for message in messages]
+
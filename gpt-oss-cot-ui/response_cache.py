@@ -0,0 +1,166 @@
+"""Opt-in cache of complete responses, replayed through the normal streaming path."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from streaming import recorded_stream
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Cached chunks are stored as (offset, field, text) so replays can reproduce the pacing
+THINKING, CONTENT = "thinking", "content"
+
+
+def normalize_messages(messages):
+    """Reduce a request history to what determines the answer."""
+    return [[message["role"], " ".join((message.get("content") or "").split())] for message in messages]
+
+
+def cache_key(model, reasoning_effort, options, messages):
+    """Hash the model, effort, options and normalized history into a cache key."""
+    payload = json.dumps(
+        [model, reasoning_effort, options or {}, normalize_messages(messages)],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier response cache: an in-memory LRU in front of an optional SQLite file.
+
+    Entries are dicts with ``thinking``, ``content``, ``chunks`` and ``metrics``. The
+    disk tier evicts entries older than ``ttl`` seconds and the least recently used
+    ones once the stored payloads exceed ``max_disk_bytes``. Safe to share between
+    sessions and stream worker threads.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MEMORY_ENTRIES, db_path=None,
+                 max_disk_bytes=DEFAULT_DISK_BYTES, ttl=DEFAULT_TTL, clock=time.time):
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, created REAL, accessed REAL, size INTEGER, payload BLOB)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.commit()
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached entry for ``key`` or ``None``."""
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry["created"] > self.ttl:
+                del self._memory[key]
+                entry = None
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload FROM responses WHERE key = ? AND created >= ?", (key, now - self.ttl)
+                ).fetchone()
+                if row:
+                    entry = json.loads(row[0])
+                    self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        now = self.clock()
+        entry = dict(entry, created=now)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                payload = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, created, accessed, size, payload) VALUES (?, ?, ?, ?, ?)",
+                    (key, now, now, len(payload), payload),
+                )
+                self._evict(now)
+                self._db.commit()
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+
+def record_stream(stream, cache, key, clock=time.monotonic):
+    """Pass a chat stream through, storing the response once it completes.
+
+    Runs wherever the stream is consumed (the stream worker thread), so recording
+    adds nothing to the render loop. Cancelled or failed streams are not cached.
+    """
+    chunks, thinking, content, final = [], [], [], {}
+
+    def observe(offset, chunk):
+        message = chunk["message"]
+        offset = round(offset, 4)
+        if message.get("thinking"):
+            thinking.append(message["thinking"])
+            chunks.append((offset, THINKING, message["thinking"]))
+        if message.get("content"):
+            content.append(message["content"])
+            chunks.append((offset, CONTENT, message["content"]))
+        if chunk.get("done"):
+            final.update({field: chunk.get(field) for field in ("eval_count", "eval_duration") if chunk.get(field)})
+
+    def complete():
+        cache.put(key, {"thinking": "".join(thinking), "content": "".join(content), "chunks": chunks, "metrics": final})
+
+    return recorded_stream(stream, observe, complete, clock)
+
+
+def replay_stream(entry, speed=None):
+    """Yield a cached response as Ollama-style chunks.
+
+    ``speed`` of ``None`` replays instantly; otherwise the recorded pacing is
+    reproduced ``speed`` times faster.
+    """
+    start = time.monotonic()
+    for offset, field, text in entry["chunks"]:
+        if speed:
+            delay = offset / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        yield {"message": {"role": "assistant", field: text}, "done": False}
+    yield {"message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "cache"}
@@ -0,0 +1,241 @@
+"""Route chat requests across several Ollama hosts.
+
+Each request goes to the healthy backend with the lowest expected wait, estimated
+from its in-flight streams and recent decode speed. A conversation stays on the
+backend that served its first turn so that backend's KV cache keeps paying off.
+Backends that fail to connect are ejected and probed in the background until they
+answer again.
+
+Configure with a comma-separated ``OLLAMA_HOSTS``; ``OLLAMA_HOST`` (or the library
+default) is used when it is not set.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+from ollama_client import DEFAULT_RETRIES, RETRYABLE_ERRORS, astream_chat, backoff_delay, client_from_env, stream_chat
+
+DEFAULT_EJECT_AFTER = 2
+DEFAULT_EJECT_SECONDS = 15.0
+DEFAULT_HEALTH_INTERVAL = 5.0
+MAX_AFFINITY_ENTRIES = 10000
+
+# Weight of the newest sample in the per-backend tokens/sec average
+RATE_SMOOTHING = 0.3
+
+
+class Backend:
+    """One Ollama host and its load/health bookkeeping."""
+
+    def __init__(self, host, client):
+        self.host = host
+        self.client = client
+        self.in_flight = 0
+        self.tokens_per_second = None
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.ejected_at = None
+        self.requests = 0
+
+    def expected_wait(self, default_rate):
+        """Relative cost of adding one more stream to this backend."""
+        rate = self.tokens_per_second or default_rate or 1.0
+        return (self.in_flight + 1) / rate
+
+    def snapshot(self):
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "tokens_per_second": self.tokens_per_second,
+            "requests": self.requests,
+        }
+
+
+class BackendRouter:
+    """Least-loaded, conversation-sticky router over a list of Ollama hosts."""
+
+    def __init__(self, hosts, client_factory=client_from_env, eject_after=DEFAULT_EJECT_AFTER,
+                 eject_seconds=DEFAULT_EJECT_SECONDS, health_interval=DEFAULT_HEALTH_INTERVAL,
+                 retries=DEFAULT_RETRIES, clock=time.monotonic):
+        if not hosts:
+            raise ValueError("BackendRouter needs at least one host")
+        self.backends = [Backend(host, client_factory(host)) for host in hosts]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.retries = retries
+        self.clock = clock
+        self._affinity = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if len(self.backends) > 1:
+            threading.Thread(target=self._probe_loop, args=(health_interval,), name="ollama-health", daemon=True).start()
+
+    def _default_rate(self):
+        rates = [b.tokens_per_second for b in self.backends if b.tokens_per_second]
+        return sum(rates) / len(rates) if rates else None
+
+    def _pick(self, conversation_id, exclude):
+        with self._lock:
+            candidates = [b for b in self.backends if b.healthy and b not in exclude]
+            if not candidates:
+                # Everything is ejected: try whatever has been out the longest rather than fail outright
+                candidates = sorted((b for b in self.backends if b not in exclude), key=lambda b: b.ejected_at or 0)[:1]
+            if not candidates:
+                return None
+            backend = self._affinity.get(conversation_id) if conversation_id else None
+            if backend not in candidates:
+                default_rate = self._default_rate()
+                backend = min(candidates, key=lambda b: b.expected_wait(default_rate))
+            if conversation_id:
+                self._affinity[conversation_id] = backend
+                self._affinity.move_to_end(conversation_id)
+                while len(self._affinity) > MAX_AFFINITY_ENTRIES:
+                    self._affinity.popitem(last=False)
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+
+    def _release(self, backend, tokens=0, elapsed=0.0, failed=False):
+        with self._lock:
+            backend.in_flight -= 1
+            if failed:
+                backend.consecutive_failures += 1
+                if backend.consecutive_failures >= self.eject_after and backend.healthy:
+                    backend.healthy = False
+                    backend.ejected_at = self.clock()
+                return
+            backend.consecutive_failures = 0
+            backend.healthy = True
+            backend.ejected_at = None
+            if tokens and elapsed > 0:
+                rate = tokens / elapsed
+                previous = backend.tokens_per_second
+                backend.tokens_per_second = rate if previous is None else (
+                    RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * previous
+                )
+
+    def stream_chat(self, conversation_id=None, **kwargs):
+        """Stream a chat from the best backend, failing over until the first chunk arrives.
+
+        When every backend has failed, the round is retried with jittered backoff.
+        """
+        tried, attempt, last_error = set(), 0, None
+        while True:
+            backend = self._pick(conversation_id, tried)
+            if backend is None:
+                if attempt >= self.retries:
+                    raise last_error or ConnectionError("No Ollama backend is reachable")
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                tried.clear()
+                continue
+            tried.add(backend)
+
+            stream = stream_chat(backend.client, retries=0, **kwargs)
+            tokens, first_at, failed = 0, None, False
+            try:
+                try:
+                    first = next(stream)
+                except StopIteration:
+                    return
+                except RETRYABLE_ERRORS as e:
+                    failed, last_error = True, e
+                    continue
+                first_at = self.clock()
+                yield first
+                for chunk in stream:
+                    tokens += 1
+                    yield chunk
+                return
+            except (ConnectionError, httpx.TransportError):
+                # The backend dropped mid-stream; model errors don't count against its health
+                failed = True
+                raise
+            finally:
+                stream.close()
+                # Decode speed is measured from the first chunk so prefill does not skew it
+                self._release(backend, tokens, self.clock() - first_at if first_at else 0.0, failed)
+
+    async def astream_chat(self, clients, conversation_id=None, **kwargs):
+        """Async counterpart of ``stream_chat``; ``clients`` maps each host to its ``AsyncClient``.
+
+        Backends are picked and released exactly as for ``stream_chat``, so async
+        streams count toward their load and health too.
+        """
+        tried, attempt, last_error = set(), 0, None
+        while True:
+            backend = self._pick(conversation_id, tried)
+            if backend is None:
+                if attempt >= self.retries:
+                    raise last_error or ConnectionError("No Ollama backend is reachable")
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+                tried.clear()
+                continue
+            tried.add(backend)
+
+            stream = astream_chat(clients[backend.host], retries=0, **kwargs)
+            tokens, first_at, failed = 0, None, False
+            try:
+                try:
+                    first = await anext(stream)
+                except StopAsyncIteration:
+                    return
+                except RETRYABLE_ERRORS as e:
+                    failed, last_error = True, e
+                    continue
+                first_at = self.clock()
+                yield first
+                async for chunk in stream:
+                    tokens += 1
+                    yield chunk
+                return
+            except (ConnectionError, httpx.TransportError):
+                failed = True
+                raise
+            finally:
+                await stream.aclose()
+                self._release(backend, tokens, self.clock() - first_at if first_at else 0.0, failed)
+
+    def _probe_loop(self, interval):
+        while not self._stop.wait(interval):
+            for backend in self.backends:
+                if backend.healthy or self.clock() - backend.ejected_at < self.eject_seconds:
+                    continue
+                try:
+                    backend.client.ps()
+                except Exception:
+                    with self._lock:
+                        backend.ejected_at = self.clock()
+                    continue
+                with self._lock:
+                    backend.healthy = True
+                    backend.consecutive_failures = 0
+                    backend.ejected_at = None
+
+    def backend_for(self, conversation_id):
+        """Host a conversation is pinned to, if any."""
+        with self._lock:
+            backend = self._affinity.get(conversation_id)
+            return backend.host if backend else None
+
+    def snapshot(self):
+        with self._lock:
+            return [backend.snapshot() for backend in self.backends]
+
+    def close(self):
+        self._stop.set()
+
+
+def hosts_from_env():
+    hosts = [host.strip() for host in os.environ.get("OLLAMA_HOSTS", "").split(",") if host.strip()]
+    return hosts or [os.environ.get("OLLAMA_HOST")]
+
+
+def router_from_env():
+    return BackendRouter(hosts_from_env())
@@ -0,0 +1,401 @@
+"""Opt-in cache that answers reworded questions from earlier answers to similar ones.
+
+The last user turn is embedded through Ollama's ``/api/embed``. An earlier answer is
+reused when its question's embedding is at least ``threshold`` cosine-similar and
+everything else that shapes the answer matches exactly: model, effort, options and
+the rest of the conversation (the *scope*, hashed like the response cache key).
+
+Vectors are unit-normalized float32 rows of one contiguous matrix, memory-mapped from
+``vectors.f32`` so the cache survives restarts without being loaded into the heap.
+Questions, answers and timestamps live in ``semantic.sqlite3`` next to it. A lookup is
+one matrix-vector product over every row, masked to live rows of the query's scope.
+Past ``ivf_threshold`` rows an inverted-file index is built in the background: rows
+are clustered around ``sqrt(n)`` k-means centroids and a lookup only scans the rows of
+the ``nprobe`` closest clusters, plus rows written since the index was built.
+
+Entries expire after ``ttl`` seconds and the least recently used go once there are
+``max_entries``; their rows are reused by later inserts.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from response_cache import cache_key
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "semantic")
+DEFAULT_MODEL = "nomic-embed-text"
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_TTL = 7 * 24 * 3600
+# Row count above which lookups go through the coarse index
+DEFAULT_IVF_THRESHOLD = 100_000
+DEFAULT_NPROBE = 16
+# Rebuild the index once this fraction of rows has been written since the last build
+REINDEX_FRACTION = 0.2
+KMEANS_SAMPLE = 20_000
+KMEANS_ITERATIONS = 8
+INITIAL_CAPACITY = 1024
+# Rows scored per block when assigning rows to clusters, to bound temporary memory
+ASSIGN_BLOCK = 16_384
+
+
+def scope_key(model, reasoning_effort, options, messages):
+    """Everything but the last user turn, which is compared by similarity instead."""
+    return cache_key(model, reasoning_effort, options, messages[:-1])
+
+
+def _scope_id(scope):
+    return int(scope[:15], 16)
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def ollama_embedder(client, model=DEFAULT_MODEL):
+    """``embed(texts) -> (len(texts), dim) array`` using an Ollama client."""
+    def embed(texts):
+        return np.asarray(client.embed(model=model, input=list(texts))["embeddings"], dtype=np.float32)
+    return embed
+
+
+def kmeans(vectors, clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    """Spherical k-means centroids of unit ``vectors``."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = ~sums.any(axis=1)
+        # Restart empty clusters on random points
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Rows grouped by nearest centroid, stored CSR-style for gathering."""
+
+    def __init__(self, vectors, rows, clusters, seed=0):
+        sample = rows if len(rows) <= KMEANS_SAMPLE else np.random.default_rng(seed).choice(rows, KMEANS_SAMPLE, replace=False)
+        self.centroids = kmeans(np.asarray(vectors[np.sort(sample)]), clusters, seed=seed)
+        assignment = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), ASSIGN_BLOCK):
+            block = rows[start:start + ASSIGN_BLOCK]
+            assignment[start:start + len(block)] = np.argmax(vectors[block] @ self.centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        self.rows = rows[order]
+        self.offsets = np.searchsorted(assignment[order], np.arange(clusters + 1))
+
+    def candidates(self, query, nprobe):
+        nearest = np.argpartition(-(self.centroids @ query), min(nprobe, len(self.centroids) - 1))[:nprobe]
+        return np.concatenate([self.rows[self.offsets[c]:self.offsets[c + 1]] for c in nearest])
+
+
+class SemanticCache:
+    """Embedding-similarity answer cache persisted in ``directory``.
+
+    ``embed(texts)`` returns one vector per text. Safe to share between sessions.
+    """
+
+    def __init__(self, directory, embed, model=DEFAULT_MODEL, threshold=DEFAULT_THRESHOLD,
+                 max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, ivf_threshold=DEFAULT_IVF_THRESHOLD,
+                 nprobe=DEFAULT_NPROBE, clock=time.time):
+        self.directory = directory
+        self.embed = embed
+        self.model = model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._dim = None
+        self._index = None
+        self._indexing = False
+        self._unindexed = set()
+        self._pending = set()
+        os.makedirs(directory, exist_ok=True)
+        self._path = os.path.join(directory, "vectors.f32")
+        self._db = sqlite3.connect(os.path.join(directory, "semantic.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (row INTEGER PRIMARY KEY, scope INTEGER, created REAL, "
+            "accessed REAL, prompt TEXT, payload BLOB)"
+        )
+        self._db.commit()
+        self._load()
+
+    # Storage
+
+    def _load(self):
+        meta = dict(self._db.execute("SELECT name, value FROM meta").fetchall())
+        if meta.get("model") != self.model or not os.path.exists(self._path):
+            # Vectors from another embedding model aren't comparable
+            self._reset()
+            return
+        self._dim = int(meta["dim"])
+        entries = self._db.execute("SELECT row, scope, created, accessed FROM entries").fetchall()
+        capacity = max(os.path.getsize(self._path) // (4 * self._dim), INITIAL_CAPACITY)
+        self._open(capacity)
+        self._size = max((row for row, *_ in entries), default=-1) + 1
+        if entries:
+            rows, scopes, created, accessed = (np.array(column) for column in zip(*entries))
+            self._alive[rows] = True
+            self._scopes[rows] = scopes
+            self._created[rows] = created
+            self._accessed[rows] = accessed
+        self._free = np.flatnonzero(~self._alive[:self._size]).tolist()
+
+    def _reset(self):
+        self._db.execute("DELETE FROM entries")
+        self._db.execute("DELETE FROM meta")
+        self._db.execute("INSERT INTO meta VALUES ('model', ?)", (self.model,))
+        self._db.commit()
+        if os.path.exists(self._path):
+            os.remove(self._path)
+        self._dim = None
+        self._vectors = None
+        self._index = None
+        self._unindexed = set()
+        self._pending = set()
+        self._size = 0
+        self._free = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._scopes = np.zeros(0, dtype=np.int64)
+        self._created = np.zeros(0)
+        self._accessed = np.zeros(0)
+
+    def _open(self, capacity):
+        """Map ``capacity`` rows of the vector file, growing the file and the row arrays as needed."""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        size = capacity * self._dim * 4
+        with open(self._path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._vectors = np.memmap(self._path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+        old = len(getattr(self, "_alive", ()))
+        for name, dtype in (("_alive", bool), ("_scopes", np.int64), ("_created", float), ("_accessed", float)):
+            grown = np.zeros(capacity, dtype=dtype)
+            if old:
+                grown[:old] = getattr(self, name)[:old]
+            setattr(self, name, grown)
+
+    def _allocate(self):
+        if self._free:
+            return self._free.pop()
+        if self._size >= len(self._vectors):
+            self._open(len(self._vectors) * 2)
+        self._size += 1
+        return self._size - 1
+
+    # Lookup
+
+    def search(self, queries, scopes):
+        """Best ``(row, similarity)`` for each unit query among live rows of its scope, or ``(None, -1)``."""
+        queries = normalize(np.atleast_2d(queries))
+        with self._lock:
+            n = self._size
+            if not n or self._vectors is None or queries.shape[1] != self._dim:
+                return [(None, -1.0)] * len(queries)
+            live = self._alive[:n]
+            scope_ids = self._scopes[:n]
+            if self._index is None:
+                # One batched product over the whole matrix
+                scores = np.asarray(queries @ self._vectors[:n].T)
+                results = []
+                for query_scores, scope in zip(scores, scopes):
+                    query_scores[~(live & (scope_ids == _scope_id(scope)))] = -np.inf
+                    best = int(np.argmax(query_scores))
+                    results.append((best, float(query_scores[best])) if np.isfinite(query_scores[best]) else (None, -1.0))
+                return results
+            results = []
+            direct = self._unindexed | self._pending
+            unindexed = np.fromiter(direct, dtype=np.int64, count=len(direct))
+            for query, scope in zip(queries, scopes):
+                rows = np.unique(np.concatenate([self._index.candidates(query, self.nprobe), unindexed]))
+                rows = rows[live[rows] & (scope_ids[rows] == _scope_id(scope))]
+                if not len(rows):
+                    results.append((None, -1.0))
+                    continue
+                scores = self._vectors[rows] @ query
+                best = int(np.argmax(scores))
+                results.append((int(rows[best]), float(scores[best])))
+            return results
+
+    def lookup(self, vector, scope, threshold=None):
+        """The stored entry most similar to ``vector`` in ``scope`` if it clears the threshold.
+
+        Returns ``(entry, similarity)``; ``entry`` is ``None`` on a miss. The stored
+        prompt isn't returned: it may be another user's question.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        row, similarity = self.search(vector, [scope])[0]
+        if row is not None and similarity >= threshold:
+            now = self.clock()
+            with self._lock:
+                found = self._db.execute("SELECT payload FROM entries WHERE row = ? AND created >= ?",
+                                         (row, now - self.ttl)).fetchone()
+                if found:
+                    self._accessed[row] = now
+                    self._db.execute("UPDATE entries SET accessed = ? WHERE row = ?", (now, row))
+                    self._db.commit()
+                    self.hits += 1
+                    return json.loads(found[0]), similarity
+        with self._lock:
+            self.misses += 1
+        return None, similarity
+
+    # Insertion and eviction
+
+    def add(self, vector, scope, prompt, entry):
+        self.add_many([vector], [scope], [prompt], [entry])
+
+    def add_many(self, vectors, scopes, prompts, entries):
+        """Store several answers with one flush and one commit."""
+        vectors = normalize(np.atleast_2d(vectors))
+        now = self.clock()
+        payloads = [json.dumps(entry, ensure_ascii=False).encode("utf-8") for entry in entries]
+        scope_ids = [_scope_id(scope) for scope in scopes]
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self._dim),))
+                self._open(INITIAL_CAPACITY)
+            if vectors.shape[1] != self._dim:
+                return
+            self._evict(now, len(vectors))
+            rows = np.array([self._allocate() for _ in range(len(vectors))], dtype=np.int64)
+            self._vectors[rows] = vectors
+            # Vectors on disk before the rows are recorded, so a crash can't leave a row pointing at garbage
+            self._vectors.flush()
+            self._alive[rows] = True
+            self._scopes[rows] = scope_ids
+            self._created[rows] = self._accessed[rows] = now
+            if self._index is not None or self._indexing:
+                self._unindexed.update(rows.tolist())
+            self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", [
+                (int(row), scope_id, now, now, prompt, payload)
+                for row, scope_id, prompt, payload in zip(rows, scope_ids, prompts, payloads)
+            ])
+            self._db.commit()
+            self._maybe_reindex()
+
+    def _evict(self, now, incoming):
+        n = self._size
+        live = self._alive[:n]
+        expired = np.flatnonzero(live & (self._created[:n] < now - self.ttl))
+        excess = int(live.sum()) - len(expired) - self.max_entries + incoming
+        if excess > 0:
+            candidates = np.flatnonzero(live & (self._created[:n] >= now - self.ttl))
+            oldest = candidates[np.argsort(self._accessed[candidates])[:excess]]
+            expired = np.concatenate([expired, oldest])
+        if len(expired):
+            self._alive[expired] = False
+            self._free.extend(int(row) for row in expired)
+            self._db.executemany("DELETE FROM entries WHERE row = ?", [(int(row),) for row in expired])
+
+    def _maybe_reindex(self):
+        if self._indexing:
+            return
+        live = int(self._alive[:self._size].sum())
+        if live <= self.ivf_threshold:
+            self._index = None
+            self._unindexed = set()
+            return
+        if self._index is not None and len(self._unindexed) < REINDEX_FRACTION * live:
+            return
+        self._indexing = True
+        # Still scanned directly until the new index replaces the old one
+        self._pending = self._unindexed
+        self._unindexed = set()
+        rows = np.flatnonzero(self._alive[:self._size])
+        threading.Thread(target=self._build_index, args=(rows,), name="semantic-index", daemon=True).start()
+
+    def _build_index(self, rows):
+        index = None
+        try:
+            index = IVFIndex(self._vectors, rows, max(int(np.sqrt(len(rows))), 1))
+        finally:
+            with self._lock:
+                self._indexing = False
+                if index is not None:
+                    # Rows written while building stay in _unindexed until the next build
+                    self._index = index
+                    self._pending = set()
+                else:
+                    self._unindexed |= self._pending
+
+    def build_index(self):
+        """Build the coarse index now, whatever the row count (e.g. for benchmarks)."""
+        rows = np.flatnonzero(self._alive[:self._size])
+        index = IVFIndex(self._vectors, rows, max(int(np.sqrt(len(rows))), 1))
+        with self._lock:
+            self._index = index
+            self._unindexed = set()
+            self._pending = set()
+
+    def recorder(self, vector, scope, prompt):
+        """Object with ``put(key, entry)`` for ``record_stream`` that stores the answer under ``vector``."""
+        return _Recorder(self, vector, scope, prompt)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "entries": int(self._alive[:self._size].sum()),
+                "dim": self._dim,
+                "indexed": self._index is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._db.close()
+
+
+class _Recorder:
+    def __init__(self, cache, vector, scope, prompt):
+        self.cache = cache
+        self.vector = vector
+        self.scope = scope
+        self.prompt = prompt
+
+    def put(self, key, entry):
+        self.cache.add(self.vector, self.scope, self.prompt, entry)
+
+
+def semantic_cache_from_env(client_for):
+    """Cache configured by ``GPT_OSS_SEMANTIC_*`` and ``GPT_OSS_EMBED_MODEL``.
+
+    ``client_for()`` returns the Ollama client to embed with. An empty
+    ``GPT_OSS_SEMANTIC_DIR`` keeps the cache in a temporary directory.
+    """
+    model = os.environ.get("GPT_OSS_EMBED_MODEL", DEFAULT_MODEL)
+    directory = os.environ.get("GPT_OSS_SEMANTIC_DIR", DEFAULT_DIRECTORY) or tempfile.mkdtemp(prefix="gpt-oss-semantic-")
+
+    def embed(texts):
+        return ollama_embedder(client_for(), model)(texts)
+
+    return SemanticCache(
+        directory, embed, model,
+        threshold=float(os.environ.get("GPT_OSS_SEMANTIC_THRESHOLD", DEFAULT_THRESHOLD)),
+        max_entries=int(os.environ.get("GPT_OSS_SEMANTIC_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
@@ -0,0 +1,123 @@
+"""Share one generation between identical requests that overlap in time.
+
+When several sessions send the same request (model, effort, options and normalized
+history) while its answer is still streaming, e.g. everyone clicking the same
+example button during a demo, only the first one reaches the GPU. The others
+subscribe to it and get every chunk produced so far, then the rest as it arrives.
+
+A producer thread drives the generation and keeps its chunks, so each subscriber
+reads at its own pace and stopping one doesn't affect the others. The generation
+itself is closed, which makes Ollama stop, only once every subscriber has left.
+"""
+import threading
+
+
+class Flight:
+    """One running generation and the chunks it has produced so far."""
+
+    def __init__(self, key):
+        self.key = key
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.subscribers = 1
+        self.abandoned = False
+        self.cond = threading.Condition()
+
+
+class SingleFlight:
+    """Process-wide table of running generations, keyed like the response cache."""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.joined = 0
+
+    def subscribe(self, key, start=None):
+        """Return ``(stream, leading)`` for the generation identified by ``key``.
+
+        Joins the running generation when there is one. Otherwise ``start()`` is
+        called for the chunk iterator of a new one and ``leading`` is true; without
+        ``start`` the result is ``(None, False)``.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.subscribers += 1
+                self.joined += 1
+                return self._follow(flight), False
+            if start is None:
+                return None, False
+            flight = self._flights[key] = Flight(key)
+            self.started += 1
+        try:
+            stream = start()
+        except BaseException as e:
+            self._finish(flight, e)
+            raise
+        threading.Thread(target=self._produce, args=(flight, stream), name="single-flight", daemon=True).start()
+        return self._follow(flight), True
+
+    def _produce(self, flight, stream):
+        error = None
+        try:
+            for chunk in stream:
+                with flight.cond:
+                    if flight.abandoned:
+                        break
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except Exception as e:
+            error = e
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            self._finish(flight, error)
+
+    def _finish(self, flight, error=None):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        with flight.cond:
+            flight.error = error
+            flight.done = True
+            flight.cond.notify_all()
+
+    def _follow(self, flight):
+        index = 0
+        try:
+            while True:
+                with flight.cond:
+                    flight.cond.wait_for(lambda: index < len(flight.chunks) or flight.done)
+                    chunks = flight.chunks[index:]
+                    done = flight.done
+                index += len(chunks)
+                yield from chunks
+                if done:
+                    break
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            self._leave(flight)
+
+    def _leave(self, flight):
+        with self._lock:
+            flight.subscribers -= 1
+            if flight.subscribers or flight.done:
+                return
+            # Nobody is reading any more: stop generating, and don't let new requests join
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        with flight.cond:
+            flight.abandoned = True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "subscribers": sum(flight.subscribers for flight in self._flights.values()),
+                "started": self.started,
+                "joined": self.joined,
+            }
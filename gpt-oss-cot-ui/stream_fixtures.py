@@ -0,0 +1,133 @@
+"""Record real chat streams to fixture files and replay them at a chosen speed.
+
+A fixture is one JSON chunk per line, the payload Ollama streams from /api/chat,
+with an extra ``t`` field holding the arrival offset in seconds. Record one from a
+running Ollama server:
+
+    python stream_fixtures.py --prompt "Explain quicksort" --effort high -o fixtures/quicksort.jsonl
+
+The app records every live stream when ``GPT_OSS_RECORD_DIR`` is set, and
+``mock_ollama.py --fixture`` serves fixtures back over the Ollama protocol.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+
+from streaming import recorded_stream
+
+# Replay speeds besides a numeric multiple of the recorded pace
+BURST = "burst"  # no delays at all: the most chunks per second the UI can be hit with
+STALL = "stall"  # every gap as long as the longest recorded one: worst-case token latency
+SPEEDS = ("recorded", BURST, STALL)
+
+
+def chunk_payload(chunk):
+    """Plain dict for an Ollama chunk (library response object or dict)."""
+    if hasattr(chunk, "model_dump"):
+        return chunk.model_dump(exclude_none=True)
+    return dict(chunk)
+
+
+def record_fixture(stream, path, clock=time.monotonic):
+    """Pass a chat stream through, writing it to ``path`` as a fixture when it completes."""
+    records = []
+
+    def observe(offset, chunk):
+        records.append(dict(chunk_payload(chunk), t=round(offset, 6)))
+
+    return recorded_stream(stream, observe, lambda: save_fixture(path, records), clock)
+
+
+def save_fixture(path, records):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_fixture(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def parse_speed(value):
+    """``recorded``, ``burst``, ``stall`` or a number (a multiple of the recorded pace)."""
+    if value == "recorded":
+        return 1.0
+    if value in (BURST, STALL):
+        return value
+    speed = float(value)
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    return speed
+
+
+def replay_delays(fixture, speed=1.0):
+    """Yield ``(delay_seconds, chunk)`` pairs for a fixture replayed at ``speed``."""
+    offsets = [record.get("t", 0.0) for record in fixture]
+    gaps = [max(b - a, 0.0) for a, b in zip([0.0] + offsets, offsets)]
+    longest = max(gaps[1:], default=0.0)
+    for gap, record in zip(gaps, fixture):
+        chunk = {key: value for key, value in record.items() if key != "t"}
+        if speed == BURST:
+            delay = 0.0
+        elif speed == STALL:
+            delay = max(gap, longest)
+        else:
+            delay = gap / speed
+        yield delay, chunk
+
+
+class FixtureResponder:
+    """Mock server responder that answers every request with a recorded stream.
+
+    Fixtures are used in turn; the ``model`` of each chunk is set to the one requested.
+    The mock server calls it from a thread per request.
+    """
+
+    def __init__(self, fixtures, speed=1.0):
+        self.fixtures = fixtures
+        self.speed = speed
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        with self._lock:
+            fixture = self.fixtures[self._next % len(self.fixtures)]
+            self._next += 1
+        model = request.get("model")
+        for delay, chunk in replay_delays(fixture, self.speed):
+            if model:
+                chunk["model"] = model
+            yield delay, chunk
+
+
+def fixture_path(directory, label="stream"):
+    return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}.jsonl")
+
+
+def main():
+    from ollama_client import client_from_env, stream_chat
+    from request_builder import system_message, think_option
+
+    parser = argparse.ArgumentParser(description="Record an Ollama chat stream as a replay fixture.")
+    parser.add_argument("--prompt", required=True)
+    parser.add_argument("--model", default="gpt-oss:20b")
+    parser.add_argument("--effort", default="medium", choices=["low", "medium", "high"])
+    parser.add_argument("--host", help="Ollama host (default OLLAMA_HOST)")
+    parser.add_argument("-o", "--output", help="fixture path (default fixtures/<timestamp>.jsonl)")
+    args = parser.parse_args()
+
+    path = args.output or fixture_path("fixtures", args.effort)
+    messages = [system_message(), {"role": "user", "content": args.prompt}]
+    stream = stream_chat(client_from_env(args.host), model=args.model, messages=messages,
+                         think=think_option(args.model, args.effort))
+    chunks = sum(1 for _ in record_fixture(stream, path))
+    print(f"Recorded {chunks} chunks to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import queue
+import threading
+import time
+
+# Upper bound on chunks buffered between the HTTP reader and the renderer
+DEFAULT_QUEUE_SIZE = 512
+DEFAULT_BATCH_SIZE = 64
+
+_DONE = object()
+
+# Shown in the reasoning where a thinking budget cut it off
+BUDGET_MARKER = "\n\n*[Thinking budget reached: answering now]*\n\n"
+
+
+class CancelToken(threading.Event):
+    """Flag shared between the UI and the stream worker to abort a generation."""
+
+    def cancel(self):
+        self.set()
+
+    @property
+    def cancelled(self):
+        return self.is_set()
+
+
+class StreamConsumer:
+    """Drain an Ollama chat stream on a worker thread into a bounded queue.
+
+    The Streamlit script thread reads the queue in batches, so a slow ``markdown()``
+    call never stalls the HTTP read. A full queue blocks the worker (backpressure) and
+    cancelling the token stops it between chunks and closes the HTTP response, which
+    makes Ollama abort the request.
+    """
+
+    def __init__(self, stream, maxsize=DEFAULT_QUEUE_SIZE, cancel_token=None, clock=time.monotonic):
+        self.stream = stream
+        self.clock = clock
+        self.queue = queue.Queue(maxsize)
+        self.cancel_token = cancel_token or CancelToken()
+        self.finished = False
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="ollama-stream", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _put(self, item):
+        # Wait for room, but give up as soon as the consumer cancels
+        while not self.cancel_token.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            for chunk in self.stream:
+                if self.cancel_token.is_set() or not self._put((self.clock(), chunk)):
+                    break
+            else:
+                self.finished = True
+        except Exception as e:
+            self.error = e
+        finally:
+            if not self.finished:
+                # Closing the generator closes the underlying httpx response
+                close = getattr(self.stream, "close", None)
+                if close:
+                    close()
+            self._put(_DONE)
+
+    def batches(self, max_batch=DEFAULT_BATCH_SIZE, poll_interval=0.1):
+        """Yield lists of ``(received_at, chunk)`` pairs until the stream ends."""
+        while not self.cancel_token.is_set():
+            try:
+                item = self.queue.get(timeout=poll_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while item is not _DONE:
+                batch.append(item)
+                if len(batch) >= max_batch:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                yield batch
+            if item is _DONE:
+                return
+
+    def cancel(self):
+        """Stop the worker and drop anything still queued."""
+        self.cancel_token.set()
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+
+def budgeted_stream(stream, budget, finish):
+    """Cut reasoning off after ``budget`` thinking tokens and get the answer instead.
+
+    Chunks pass through until the budget is spent. Then ``stream`` is closed, which
+    stops Ollama generating, a marker chunk notes the cut in the reasoning, and the
+    chunks of ``finish(thinking_so_far)`` follow: a second request that answers from
+    the truncated reasoning.
+    """
+    thinking = []
+    try:
+        for chunk in stream:
+            if chunk["message"].get("thinking"):
+                if len(thinking) >= budget:
+                    break
+                thinking.append(chunk["message"]["thinking"])
+            yield chunk
+        else:
+            return
+    finally:
+        stream.close()
+    yield {"message": {"role": "assistant", "content": "", "thinking": BUDGET_MARKER}, "done": False}
+    yield from finish("".join(thinking))
+
+
+def recorded_stream(stream, on_chunk, on_complete, clock=time.monotonic):
+    """Pass a chat stream through to whoever records it.
+
+    ``on_chunk(offset, chunk)`` sees every chunk with its arrival time in seconds since
+    the stream was first read, and ``on_complete()`` runs only if the stream ends
+    normally. A consumer that stops early closes ``stream``, so Ollama stops generating.
+    """
+    start = clock()
+    completed = False
+    try:
+        for chunk in stream:
+            on_chunk(clock() - start, chunk)
+            yield chunk
+        completed = True
+    finally:
+        if not completed:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+    on_complete()
+
+
+def cancellation_savings(tokens_generated, elapsed, expected_tokens):
+    """Estimate the tokens and decode seconds skipped by stopping a generation early.
+
+    ``expected_tokens`` is the typical length of a completed answer; the remaining
+    tokens are converted to seconds at the rate observed before the stop.
+    """
+    tokens_saved = max(expected_tokens - tokens_generated, 0)
+    rate = tokens_generated / elapsed if elapsed > 0 else 0.0
+    return tokens_saved, tokens_saved / rate if rate else 0.0
+
+
+class LatencyTracker:
+    """Measure how long chunks wait between arriving from Ollama and being shown."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.lags = []
+        self.last_received = None
+        self.last_displayed = None
+        self._pending = []
+
+    def received(self, received_at):
+        self._pending.append(received_at)
+        self.last_received = received_at
+
+    def displayed(self):
+        """Mark every pending chunk as visible in the UI."""
+        now = self.clock()
+        self.lags.extend(now - received_at for received_at in self._pending)
+        self._pending.clear()
+        self.last_displayed = now
+
+    @property
+    def mean_lag(self):
+        return sum(self.lags) / len(self.lags) if self.lags else 0.0
+
+    @property
+    def max_lag(self):
+        return max(self.lags, default=0.0)
+
+    @property
+    def tail_lag(self):
+        """Delay between the last generated chunk and the last UI update."""
+        if self.last_received is None or self.last_displayed is None:
+            return 0.0
+        return max(self.last_displayed - self.last_received, 0.0)
@@ -0,0 +1,165 @@
+"""Compact in-memory storage for chain-of-thought text.
+
+Finished reasoning is kept zlib-compressed and only decompressed when someone opens
+it. All sessions in the process share one archive with a memory cap: once the
+compressed text held in memory exceeds it, the least recently used entries, usually
+those of old or idle sessions, are spilled to a temporary file. Space in the file
+left by dropped entries is reclaimed by rewriting it once more of it is dead than
+live.
+"""
+import itertools
+import os
+import tempfile
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+# Shorter text isn't worth the per-entry overhead
+MIN_COMPRESS_CHARS = 512
+ZLIB_LEVEL = 6
+# The spill file is rewritten once it holds this much dead space, and more dead than live
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+class CompressedText:
+    """Reasoning text stored by a ``ThinkingArchive``; ``str()`` decompresses it."""
+
+    __slots__ = ("length", "_archive", "_key", "_blob", "_spilled", "__weakref__")
+
+    def __init__(self, archive, key, blob, length):
+        self.length = length
+        self._archive = archive
+        # Not id(): a dropped entry's id can be reused before its key is collected
+        self._key = key
+        self._blob = blob
+        self._spilled = None
+
+    def __str__(self):
+        return self._archive.read(self)
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __reduce__(self):
+        # Pickled copies (e.g. exported session state) carry the plain text
+        return str, (str(self),)
+
+
+class ThinkingArchive:
+    """Compress reasoning text and keep at most ``max_memory_bytes`` of it in memory."""
+
+    def __init__(self, max_memory_bytes=DEFAULT_MEMORY_BYTES, spill_dir=None, compact_min_bytes=COMPACT_MIN_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_dir = spill_dir
+        self.compact_min_bytes = compact_min_bytes
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self.dead_bytes = 0
+        self.compactions = 0
+        self._resident = OrderedDict()
+        self._spilled = {}
+        # Keys of dropped entries, settled under the lock by ``_collect``
+        self._dropped = []
+        self._keys = itertools.count()
+        self._spill_file = None
+        # Re-entrant: garbage collection can run the release callback while the lock is held
+        self._lock = threading.RLock()
+
+    def compress(self, text):
+        """Return a compact stand-in for ``text``, or ``text`` itself when it is short."""
+        if not isinstance(text, str) or len(text) < MIN_COMPRESS_CHARS:
+            return text
+        blob = zlib.compress(text.encode("utf-8"), ZLIB_LEVEL)
+        item = CompressedText(self, next(self._keys), blob, len(text))
+        with self._lock:
+            self._collect()
+            key = item._key
+            self._resident[key] = (weakref.ref(item, lambda _, key=key: self._dropped.append(key)), len(blob))
+            self.memory_bytes += len(blob)
+            self._spill_over_cap()
+            if self.dead_bytes >= self.compact_min_bytes and self.dead_bytes > self.spilled_bytes:
+                self._compact()
+        return item
+
+    def read(self, item):
+        with self._lock:
+            blob = item._blob
+            if blob is None:
+                offset, size = item._spilled
+                blob = os.pread(self._spill_file.fileno(), size, offset)
+            else:
+                self._resident.move_to_end(item._key)
+        return zlib.decompress(blob).decode("utf-8")
+
+    def _collect(self):
+        # Called with the lock held: account for messages that were dropped (e.g. their session
+        # ended). Weakref callbacks only queue the key, since they can run on this thread in the
+        # middle of any of these methods.
+        while self._dropped:
+            key = self._dropped.pop()
+            entry = self._resident.pop(key, None)
+            if entry is not None:
+                self.memory_bytes -= entry[1]
+                continue
+            entry = self._spilled.pop(key, None)
+            if entry is not None:
+                self.spilled_bytes -= entry[1]
+                self.dead_bytes += entry[1]
+
+    def _compact(self):
+        # Called with the lock held: copy the live entries to a new spill file
+        spill_file = tempfile.TemporaryFile(prefix="gpt-oss-thinking-", dir=self.spill_dir)
+        spilled, offset = {}, 0
+        for key, (ref, size) in list(self._spilled.items()):
+            item = ref()
+            if item is None:
+                # Dropped but not collected yet: leave it out, and _collect will find nothing to do
+                self.spilled_bytes -= size
+                continue
+            spill_file.write(os.pread(self._spill_file.fileno(), size, item._spilled[0]))
+            item._spilled = (offset, size)
+            spilled[key] = (ref, size)
+            offset += size
+        spill_file.flush()
+        self._spill_file.close()
+        self._spill_file, self._spilled = spill_file, spilled
+        self.dead_bytes = 0
+        self.compactions += 1
+
+    def _spill_over_cap(self):
+        # Called with the lock held
+        while self.memory_bytes > self.max_memory_bytes and self._resident:
+            _, (ref, size) = self._resident.popitem(last=False)
+            self.memory_bytes -= size
+            item = ref()
+            if item is None:
+                continue
+            if self._spill_file is None:
+                self._spill_file = tempfile.TemporaryFile(prefix="gpt-oss-thinking-", dir=self.spill_dir)
+            offset = self._spill_file.seek(0, os.SEEK_END)
+            self._spill_file.write(item._blob)
+            self._spill_file.flush()
+            item._spilled, item._blob = (offset, size), None
+            self._spilled[item._key] = (ref, size)
+            self.spilled_bytes += size
+
+    def stats(self):
+        with self._lock:
+            self._collect()
+            return {
+                "entries": len(self._resident),
+                "memory_bytes": self.memory_bytes,
+                "spilled_bytes": self.spilled_bytes,
+                "spill_file_bytes": self.spilled_bytes + self.dead_bytes,
+                "compactions": self.compactions,
+            }
+
+
+def archive_from_env():
+    megabytes = float(os.environ.get("GPT_OSS_THINKING_MEMORY_MB", DEFAULT_MEMORY_BYTES / (1024 * 1024)))
+    return ThinkingArchive(int(megabytes * 1024 * 1024), os.environ.get("GPT_OSS_THINKING_SPILL_DIR") or None)
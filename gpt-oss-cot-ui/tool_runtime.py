@@ -0,0 +1,458 @@
+"""Run the model's tool calls concurrently and feed the results back to it.
+
+- ``ToolRegistry`` holds the tools and their JSON-schema parameters, which are sent
+  to Ollama as ``tools=``
+- ``tool_calls_from_chunk`` reads the calls out of a streamed ``message.tool_calls``
+- ``ToolExecutor`` runs one round of calls at once, so a round costs about as much as
+  its slowest call. I/O-bound tools run in a thread pool. CPU-bound ones run in a
+  pool of worker processes that are reused across calls, each call under a wall-time
+  limit (a timer in the worker) and an address-space limit. A worker that doesn't
+  stop even so is killed along with its pool, which is then recreated.
+- ``tool_loop`` streams a chat, runs the calls the model asks for, and continues the
+  chat with their results until it answers
+
+The worker processes start clean, work in the tool workspace and can't write large
+files. That contains runaway code; it is not a security boundary. Each conversation
+(the ``scope`` of a round) gets its own subdirectory of the workspace, which is what
+``current_workspace()`` returns while its calls run.
+"""
+import contextvars
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from instrumentation import percentile
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the time limits apply
+    resource = None
+
+IO = "io"
+CPU = "cpu"
+
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_IO_WORKERS = 8
+DEFAULT_CPU_WORKERS = 2
+DEFAULT_MEMORY_MB = 256
+DEFAULT_MAX_FILE_MB = 16
+DEFAULT_MAX_ROUNDS = 4
+DEFAULT_WORKSPACE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tool_workspace")
+# A worker that overruns its time limit by this much is killed
+KILL_GRACE = 2.0
+# Longest tool result passed back to the model
+MAX_RESULT_CHARS = 8000
+LATENCY_SAMPLES = 200
+# Environment variables the worker processes keep
+WORKER_ENV = ("PATH", "HOME", "LANG", "LC_ALL", "TMPDIR", "PYTHONPATH")
+
+_workspace = contextvars.ContextVar("tool_workspace", default=None)
+
+
+def workspace_for(root, scope):
+    """The subdirectory of ``root`` that holds one conversation's files."""
+    return os.path.join(root, "scopes", hashlib.sha256(str(scope or "default").encode("utf-8")).hexdigest()[:32])
+
+
+def current_workspace():
+    """Directory the running tool call may use for files."""
+    return _workspace.get() or workspace_for(os.environ.get("GPT_OSS_TOOL_WORKSPACE", DEFAULT_WORKSPACE), None)
+
+
+def _in_workspace(directory, func, arguments):
+    token = _workspace.set(directory)
+    try:
+        return func(**arguments)
+    finally:
+        _workspace.reset(token)
+
+
+class ToolTimeout(BaseException):
+    """Raised in a worker when a call runs out of time; tool code catching Exception can't swallow it."""
+
+
+class Tool:
+    """A function the model may call.
+
+    ``kind`` picks the pool: ``IO`` tools run on threads, ``CPU`` tools in the
+    worker processes, under ``timeout`` seconds and ``memory_mb`` of extra memory.
+    """
+
+    def __init__(self, name, func, description, parameters=None, kind=IO, timeout=DEFAULT_TIMEOUT,
+                 memory_mb=DEFAULT_MEMORY_MB):
+        self.name = name
+        self.func = func
+        self.description = description
+        self.parameters = parameters or {"type": "object", "properties": {}}
+        self.kind = kind
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+
+    def schema(self):
+        return {"type": "function",
+                "function": {"name": self.name, "description": self.description, "parameters": self.parameters}}
+
+
+class ToolRegistry:
+    """Tools by name."""
+
+    def __init__(self, tools=()):
+        self._tools = {}
+        for tool in tools:
+            self.register(tool)
+
+    def register(self, tool):
+        self._tools[tool.name] = tool
+        return tool
+
+    def get(self, name):
+        return self._tools.get(name)
+
+    def names(self):
+        return list(self._tools)
+
+    def schemas(self):
+        return [tool.schema() for tool in self._tools.values()]
+
+
+def tool_calls_from_chunk(chunk):
+    """The ``[{"name", "arguments"}]`` calls in a chat chunk, if any.
+
+    This is model output: a call without a name, or whose arguments aren't an object,
+    comes back with an ``error`` that is reported to the model instead of run.
+    """
+    calls = []
+    for call in chunk["message"].get("tool_calls") or []:
+        try:
+            function = call["function"]
+            name = function["name"]
+            arguments = function.get("arguments") or {}
+        except (KeyError, TypeError, AttributeError):
+            calls.append({"name": "", "arguments": {}, "error": "malformed tool call without a function name"})
+            continue
+        if isinstance(arguments, str):
+            # Some models send the arguments as a JSON string
+            try:
+                arguments = json.loads(arguments)
+            except ValueError:
+                arguments = {"input": arguments}
+        if not isinstance(arguments, Mapping):
+            calls.append({"name": str(name), "arguments": {},
+                          "error": f"arguments must be a JSON object, not {json.dumps(arguments, default=str)}"})
+            continue
+        calls.append({"name": str(name), "arguments": dict(arguments)})
+    return calls
+
+
+def _address_space():
+    """Bytes of virtual memory this process uses now (Linux), else 0."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _alarm(signum, frame):
+    raise ToolTimeout()
+
+
+def _init_worker(workspace, max_file_mb):
+    """Start a tool worker process with a trimmed environment in the workspace."""
+    for name in list(os.environ):
+        if name not in WORKER_ENV:
+            del os.environ[name]
+    os.makedirs(workspace, exist_ok=True)
+    os.chdir(workspace)
+    if resource:
+        limit = max_file_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limit, limit))
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _alarm)
+
+
+def _run_limited(func, arguments, timeout, memory_mb, directory):
+    """Worker side of a CPU tool call: run ``func`` in ``directory`` under the time and memory limits."""
+    os.makedirs(directory, exist_ok=True)
+    os.chdir(directory)
+    previous = None
+    if resource and memory_mb:
+        previous = resource.getrlimit(resource.RLIMIT_AS)
+        limit = _address_space() + memory_mb * 1024 * 1024
+        if previous[1] != resource.RLIM_INFINITY:
+            limit = min(limit, previous[1])
+        resource.setrlimit(resource.RLIMIT_AS, (limit, previous[1]))
+    if hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _in_workspace(directory, func, arguments)
+    finally:
+        if hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if previous:
+            resource.setrlimit(resource.RLIMIT_AS, previous)
+
+
+class ToolStats:
+    """Calls, failures and recent latencies of one tool."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "p50": percentile(self.latencies, 50) if self.latencies else None,
+            "p95": percentile(self.latencies, 95) if self.latencies else None,
+        }
+
+
+class ToolExecutor:
+    """Thread and process pools that run rounds of tool calls concurrently.
+
+    ``on_result(tool, seconds, outcome)`` is called after every call, e.g. to export
+    metrics.
+    """
+
+    def __init__(self, registry, io_workers=DEFAULT_IO_WORKERS, cpu_workers=DEFAULT_CPU_WORKERS,
+                 workspace=DEFAULT_WORKSPACE, max_file_mb=DEFAULT_MAX_FILE_MB, max_rounds=DEFAULT_MAX_ROUNDS,
+                 on_result=None, clock=time.monotonic):
+        self.registry = registry
+        self.workers = {IO: io_workers, CPU: cpu_workers}
+        self.workspace = os.path.abspath(workspace)
+        self.max_file_mb = max_file_mb
+        self.max_rounds = max_rounds
+        self.on_result = on_result
+        self.clock = clock
+        self._threads = ThreadPoolExecutor(io_workers, thread_name_prefix="tool-io")
+        self._processes = None
+        self._lock = threading.Lock()
+        self._in_flight = {IO: 0, CPU: 0}
+        self._peak = {IO: 0, CPU: 0}
+        self._stats = {}
+        self.rounds = 0
+        self.restarts = 0
+
+    def _process_pool(self):
+        with self._lock:
+            if self._processes is None:
+                # Spawned, not forked: the app process has threads and Streamlit state
+                self._processes = ProcessPoolExecutor(
+                    self.workers[CPU], mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker, initargs=(self.workspace, self.max_file_mb),
+                )
+            return self._processes
+
+    def warm(self):
+        """Start the worker processes ahead of the first CPU-bound call."""
+        pool = self._process_pool()
+        for _ in range(self.workers[CPU]):
+            pool.submit(os.getpid)
+        return self
+
+    def _restart_process_pool(self, pool):
+        """Kill a pool whose worker won't stop; the next CPU call starts a fresh one."""
+        with self._lock:
+            if self._processes is not pool:
+                return
+            self._processes = None
+            self.restarts += 1
+        # The executor has no public way to stop a running call
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, tool, arguments, directory):
+        if tool.kind == CPU:
+            pool = self._process_pool()
+            future = pool.submit(_run_limited, tool.func, arguments, tool.timeout, tool.memory_mb, directory)
+        else:
+            pool = self._threads
+            future = pool.submit(_in_workspace, directory, tool.func, arguments)
+        with self._lock:
+            self._in_flight[tool.kind] += 1
+            self._peak[tool.kind] = max(self._peak[tool.kind], self._in_flight[tool.kind])
+        return pool, future
+
+    def _finish(self, call, tool, seconds, outcome, content):
+        with self._lock:
+            stats = self._stats.setdefault(call["name"], ToolStats())
+            stats.calls += 1
+            stats.errors += outcome != "ok"
+            stats.timeouts += outcome == "timeout"
+            stats.latencies.append(seconds)
+        if self.on_result:
+            self.on_result(call["name"], seconds, outcome)
+        return {
+            "name": call["name"],
+            "arguments": call["arguments"],
+            "content": content if len(content) <= MAX_RESULT_CHARS else content[:MAX_RESULT_CHARS] + "\n[truncated]",
+            "error": outcome != "ok",
+            "outcome": outcome,
+            "seconds": seconds,
+            "kind": tool.kind if tool else None,
+        }
+
+    def run(self, calls, scope=None):
+        """Run ``calls`` concurrently in ``scope``'s workspace; results come back in the same order."""
+        self.rounds += 1
+        directory = workspace_for(self.workspace, scope)
+        pending = []
+        for call in calls:
+            started = self.clock()
+            tool = self.registry.get(call["name"])
+            if call.get("error") or tool is None:
+                pending.append((call, None, started, None, call.get("error") or f"unknown tool {call['name']!r}"))
+                continue
+            try:
+                pool, future = self._submit(tool, call["arguments"], directory)
+            except Exception as e:
+                pending.append((call, tool, started, None, e))
+                continue
+            finished = [None]
+            future.add_done_callback(lambda _, finished=finished: finished.__setitem__(0, self.clock()))
+            pending.append((call, tool, started, (pool, future, finished), None))
+
+        results = []
+        for call, tool, started, submitted, error in pending:
+            if submitted is None:
+                results.append(self._finish(call, tool, 0.0, "error", f"Error: {error}"))
+                continue
+            pool, future, finished = submitted
+            outcome, content = self._result(tool, pool, future, started)
+            with self._lock:
+                self._in_flight[tool.kind] -= 1
+            # Calls are collected in order, so use when this one finished, not when it was collected
+            ended = finished[0] if finished[0] is not None else self.clock()
+            if outcome == "timeout":
+                ended = min(ended, started + tool.timeout)
+            results.append(self._finish(call, tool, ended - started, outcome, content))
+        return results
+
+    def _result(self, tool, pool, future, started):
+        """``(outcome, content)`` for a submitted call, waiting at most its time limit."""
+        limit = tool.timeout + (KILL_GRACE if tool.kind == CPU else 0)
+        try:
+            value = future.result(timeout=max(started + limit - self.clock(), 0))
+        except FutureTimeout:
+            if tool.kind == CPU:
+                self._restart_process_pool(pool)
+            # A thread can't be stopped; it finishes in the background
+            return "timeout", f"Error: {tool.name} timed out after {tool.timeout:g}s"
+        except ToolTimeout:
+            return "timeout", f"Error: {tool.name} timed out after {tool.timeout:g}s"
+        except MemoryError:
+            return "error", f"Error: {tool.name} exceeded its {tool.memory_mb} MB memory limit"
+        except TypeError as e:
+            return "error", f"Error: bad arguments for {tool.name}: {e}"
+        except Exception as e:
+            return "error", f"Error: {type(e).__name__}: {e}"
+        return "ok", value if isinstance(value, str) else json.dumps(value, default=str)
+
+    def pool_usage(self):
+        """Calls running and queued in each pool, and the most in flight at once."""
+        with self._lock:
+            return {
+                kind: {
+                    "workers": self.workers[kind],
+                    "running": min(self._in_flight[kind], self.workers[kind]),
+                    "queued": max(self._in_flight[kind] - self.workers[kind], 0),
+                    "peak": self._peak[kind],
+                }
+                for kind in (IO, CPU)
+            }
+
+    def snapshot(self):
+        with self._lock:
+            tools = {name: stats.snapshot() for name, stats in self._stats.items()}
+        return {"tools": tools, "pools": self.pool_usage(), "rounds": self.rounds, "restarts": self.restarts}
+
+    def close(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            processes, self._processes = self._processes, None
+        if processes:
+            processes.shutdown(wait=False, cancel_futures=True)
+
+
+def format_call(call):
+    arguments = ", ".join(f"{name}={value!r}" for name, value in call["arguments"].items())
+    return f"{call['name']}({arguments})"
+
+
+def tool_report(results, elapsed):
+    """Reasoning text noting a round of tool calls and what they returned."""
+    lines = [f"\n\n🔧 Ran {len(results)} tool call{'s' if len(results) != 1 else ''} in {elapsed:.2f}s"]
+    for result in results:
+        preview = " ".join(result["content"].split())
+        if len(preview) > 160:
+            preview = preview[:160] + "…"
+        lines.append(f"- `{format_call(result)}` ({result['seconds']:.2f}s): {preview}")
+    return "\n".join(lines) + "\n\n"
+
+
+def tool_loop(chat, messages, executor, scope=None):
+    """Stream ``chat(messages, tools)`` and keep answering the model's tool calls.
+
+    Chunks pass through. When a reply asks for tools, its calls run concurrently, a
+    note of them and their results is added to the reasoning, and the chat continues
+    with the calls and results appended. After ``executor.max_rounds`` rounds of calls
+    the chat is sent without tools so the model has to answer. File tools work in
+    ``scope``'s own workspace, e.g. one per conversation.
+    """
+    messages = list(messages)
+    for round_number in range(executor.max_rounds + 1):
+        tools = executor.registry.schemas() if round_number < executor.max_rounds else None
+        stream = chat(messages, tools)
+        calls, thinking, content = [], [], []
+        try:
+            for chunk in stream:
+                calls.extend(tool_calls_from_chunk(chunk))
+                if calls and chunk.get("done"):
+                    # Not the end of the turn: the answer comes after the tool results
+                    continue
+                message = chunk["message"]
+                thinking.append(message.get("thinking") or "")
+                content.append(message.get("content") or "")
+                yield chunk
+        finally:
+            stream.close()
+        if not calls:
+            return
+
+        started = executor.clock()
+        results = executor.run(calls, scope)
+        yield {"message": {"role": "assistant", "content": "",
+                           "thinking": tool_report(results, executor.clock() - started)}, "done": False}
+        messages.append({
+            "role": "assistant",
+            "content": "".join(content),
+            "thinking": "".join(thinking),
+            "tool_calls": [{"function": {"name": call["name"], "arguments": call["arguments"]}} for call in calls],
+        })
+        messages.extend({"role": "tool", "tool_name": result["name"], "content": result["content"]}
+                        for result in results)
+
+
+def executor_from_env(registry, on_result=None):
+    return ToolExecutor(
+        registry,
+        io_workers=int(os.environ.get("GPT_OSS_TOOL_THREADS", DEFAULT_IO_WORKERS)),
+        cpu_workers=int(os.environ.get("GPT_OSS_TOOL_PROCESSES", DEFAULT_CPU_WORKERS)),
+        workspace=os.environ.get("GPT_OSS_TOOL_WORKSPACE", DEFAULT_WORKSPACE),
+        max_rounds=int(os.environ.get("GPT_OSS_TOOL_ROUNDS", DEFAULT_MAX_ROUNDS)),
+        on_result=on_result,
+    )
@@ -0,0 +1,212 @@
+"""Built-in tools behind the "Tool Use" examples.
+
+Web search and page fetching run on the I/O thread pool. The calculator and Python
+execution run in the sandboxed worker processes (see ``tool_runtime.py``). The file
+tools read and write only inside the calling conversation's directory of the tool
+workspace (``GPT_OSS_TOOL_WORKSPACE``, default ``.cache/tool_workspace``).
+
+``run_python`` executes whatever the model (or a page it read) asks for with the
+app's file access, so it is only offered when the operator sets
+``GPT_OSS_TOOLS_UNSAFE_PYTHON=1``. ``fetch_url`` only fetches http(s) URLs whose host
+resolves to public addresses, checked again at every redirect, so pages can't steer
+it at the Ollama API, the local network or cloud metadata endpoints.
+"""
+import ast
+import contextlib
+import io
+import ipaddress
+import math
+import operator
+import os
+import re
+import socket
+import traceback
+import urllib.parse
+
+import httpx
+
+from tool_runtime import CPU, IO, Tool, ToolRegistry, current_workspace
+
+SEARCH_URL = "https://api.duckduckgo.com/"
+HTTP_TIMEOUT = 10.0
+MAX_PAGE_CHARS = 6000
+MAX_SEARCH_RESULTS = 5
+MAX_REDIRECTS = 5
+
+_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.USub: operator.neg, ast.UAdd: operator.pos,
+}
+_NAMES = {"pi": math.pi, "e": math.e, "tau": math.tau}
+_FUNCTIONS = {name: getattr(math, name) for name in (
+    "sqrt", "exp", "log", "log10", "log2", "sin", "cos", "tan", "asin", "acos", "atan",
+    "floor", "ceil", "factorial", "comb", "perm",
+)} | {"abs": abs, "round": round, "min": min, "max": max}
+
+
+def _evaluate(node):
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_evaluate(node.left), _evaluate(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_evaluate(node.operand))
+    if isinstance(node, ast.Name) and node.id in _NAMES:
+        return _NAMES[node.id]
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS:
+        return _FUNCTIONS[node.func.id](*[_evaluate(arg) for arg in node.args])
+    raise ValueError(f"unsupported expression: {ast.unparse(node)}")
+
+
+def calculator(expression):
+    """Evaluate an arithmetic expression."""
+    return str(_evaluate(ast.parse(expression.replace("^", "**"), mode="eval")))
+
+
+def run_python(code):
+    """Run Python code and return what it printed, or the error."""
+    output = io.StringIO()
+    namespace = {"__name__": "__tool__"}
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            exec(compile(code, "<tool>", "exec"), namespace)
+        except MemoryError:
+            # Reported as the sandbox's memory limit rather than program output
+            raise
+        except Exception:
+            traceback.print_exc(limit=-1)
+    return output.getvalue() or "(no output)"
+
+
+def web_search(query, max_results=MAX_SEARCH_RESULTS):
+    """Instant answers and related topics for ``query`` from DuckDuckGo."""
+    response = httpx.get(os.environ.get("GPT_OSS_SEARCH_URL", SEARCH_URL), timeout=HTTP_TIMEOUT,
+                         params={"q": query, "format": "json", "no_html": 1, "skip_disambig": 1})
+    response.raise_for_status()
+    data = response.json()
+    lines = []
+    if data.get("AbstractText"):
+        lines.append(f"{data.get('Heading', query)}: {data['AbstractText']} ({data.get('AbstractURL', '')})")
+    topics = []
+    for topic in data.get("RelatedTopics", []):
+        # Disambiguation groups nest their topics one level down
+        topics.extend(topic.get("Topics", [topic]))
+    for topic in topics[:int(max_results)]:
+        if topic.get("Text"):
+            lines.append(f"- {topic['Text']} ({topic.get('FirstURL', '')})")
+    return "\n".join(lines) or f"No results for {query!r}."
+
+
+def unsafe_python_enabled():
+    return os.environ.get("GPT_OSS_TOOLS_UNSAFE_PYTHON", "").lower() in ("1", "true", "yes", "on")
+
+
+def check_public_url(url):
+    """Raise ``ValueError`` unless ``url`` is http(s) on a host with only public addresses."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"only http(s) URLs can be fetched, not {url!r}")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, ValueError) as e:
+        raise ValueError(f"can't resolve {parts.hostname!r}: {e}") from None
+    for text in addresses:
+        address = ipaddress.ip_address(text.split("%")[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        # Covers loopback, private, link-local (cloud metadata), carrier NAT and reserved ranges
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"{parts.hostname!r} resolves to a non-public address ({address})")
+
+
+def fetch_url(url):
+    """The text of a web page, without markup."""
+    for _ in range(MAX_REDIRECTS + 1):
+        check_public_url(url)
+        # Redirects are followed here so every hop gets the same check
+        response = httpx.get(url, timeout=HTTP_TIMEOUT, follow_redirects=False)
+        if not response.is_redirect:
+            break
+        url = urllib.parse.urljoin(url, response.headers["location"])
+    else:
+        raise ValueError(f"more than {MAX_REDIRECTS} redirects")
+    response.raise_for_status()
+    text = response.text
+    if "html" in response.headers.get("content-type", ""):
+        text = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", text)
+        text = re.sub(r"<[^>]+>", " ", text)
+    text = " ".join(text.split())
+    return text[:MAX_PAGE_CHARS]
+
+
+def workspace_root():
+    """This conversation's directory in the workspace."""
+    root = os.path.abspath(current_workspace())
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def _workspace_path(path):
+    root = workspace_root()
+    full = os.path.abspath(os.path.join(root, path))
+    if os.path.commonpath([root, full]) != root:
+        raise ValueError(f"{path!r} is outside the workspace")
+    return full
+
+
+def write_file(path, content):
+    """Write a text file in the workspace."""
+    full = _workspace_path(path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w", encoding="utf-8") as f:
+        f.write(content)
+    return f"Wrote {len(content)} characters to {path}"
+
+
+def read_file(path):
+    """Read a text file from the workspace."""
+    with open(_workspace_path(path), encoding="utf-8") as f:
+        return f.read()
+
+
+def list_files():
+    """Files in the workspace."""
+    root = workspace_root()
+    files = [os.path.relpath(os.path.join(directory, name), root)
+             for directory, _, names in os.walk(root) for name in names]
+    return "\n".join(sorted(files)) or "(empty)"
+
+
+def _string_parameters(**descriptions):
+    return {
+        "type": "object",
+        "properties": {name: {"type": "string", "description": text} for name, text in descriptions.items()},
+        "required": list(descriptions),
+    }
+
+
+def default_registry():
+    registry = ToolRegistry([
+        Tool("web_search", web_search, "Search the web and return short results with links.",
+             _string_parameters(query="What to search for"), kind=IO),
+        Tool("fetch_url", fetch_url, "Fetch a web page and return its text.",
+             _string_parameters(url="Absolute http(s) URL"), kind=IO),
+        Tool("calculator", calculator,
+             "Evaluate an arithmetic expression exactly, e.g. 10000 * (1 + 0.07/12) ** (12*15). "
+             "Supports + - * / // % **, pi, e and math functions such as sqrt, log and sin.",
+             _string_parameters(expression="The expression"), kind=CPU, timeout=5.0),
+        Tool("write_file", write_file, "Write a text file in the scratch workspace.",
+             _string_parameters(path="Relative path", content="File contents"), kind=IO),
+        Tool("read_file", read_file, "Read a text file from the scratch workspace.",
+             _string_parameters(path="Relative path"), kind=IO),
+        Tool("list_files", list_files, "List the files in the scratch workspace.", kind=IO),
+    ])
+    if unsafe_python_enabled():
+        registry.register(Tool("run_python", run_python, "Run Python 3 code and return everything it prints.",
+                               _string_parameters(code="The program; print the results you need"),
+                               kind=CPU, timeout=15.0))
+    return registry
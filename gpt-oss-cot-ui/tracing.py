@@ -0,0 +1,396 @@
+"""Opt-in timing spans for script reruns and streaming turns.
+
+Each rerun of ``chat_ui.py`` becomes a *trace*: a root span with a child span per
+phase of ``main()`` (CSS, header, sidebar, history, the new turn) and, for a
+streaming turn, children for queueing, prefill, thinking and answer, with the time
+spent rendering added up as an attribute. A session keeps its last
+``TRACE_HISTORY`` traces for the debug panel. On demand they are written to disk
+as OTLP/JSON, which OpenTelemetry collectors and Jaeger import, and the next rerun
+or streaming turn is profiled with cProfile (or pyinstrument, if installed).
+
+With tracing off, ``span()`` is one context variable read returning a shared no-op.
+Spans only cover the script thread; the stream reader and tool pools report their
+own timings through ``metrics_export``.
+"""
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import uuid
+from collections import deque
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:
+    PyinstrumentProfiler = None
+
+TRACE_HISTORY = 50
+DEFAULT_TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "traces")
+SERVICE_NAME = "gpt-oss-cot-ui"
+# Functions listed in the profile summary
+PROFILE_TOP = 25
+# Exported trace and profile files kept; any visitor can write them, so older ones are deleted
+DEFAULT_MAX_TRACE_FILES = 20
+
+_current = contextvars.ContextVar("gpt_oss_span", default=None)
+
+
+def enabled_from_env():
+    return os.environ.get("GPT_OSS_TRACING", "").lower() in ("1", "true", "yes", "on")
+
+
+def trace_dir():
+    return os.environ.get("GPT_OSS_TRACE_DIR") or DEFAULT_TRACE_DIR
+
+
+def max_trace_files():
+    return int(os.environ.get("GPT_OSS_TRACE_MAX_FILES", DEFAULT_MAX_TRACE_FILES))
+
+
+def prune_trace_files(directory, keep=None):
+    """Delete all but the newest ``keep`` exported traces and profiles in ``directory``."""
+    keep = max_trace_files() if keep is None else keep
+    files = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.startswith(("traces-", "profile-")):
+            try:
+                files.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass
+    for _, path in sorted(files, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            # Another session pruned it first
+            pass
+
+
+def available_profilers():
+    return ["cProfile"] + (["pyinstrument"] if PyinstrumentProfiler else [])
+
+
+class _NullSpan:
+    """Stands in for every span while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def accumulate(self, name, seconds):
+        pass
+
+    def record(self, name, start, end, **attributes):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed phase; times are ``perf_counter_ns`` values."""
+
+    def __init__(self, trace, name, parent=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.parent = parent
+        self.span_id = os.urandom(8).hex()
+        self.attributes = dict(attributes or {})
+        self.start = None
+        self.end = None
+        self.error = None
+        self._token = None
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        self.trace.spans.append(self)
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter_ns()
+        _current.reset(self._token)
+        if exc_type is not None:
+            if issubclass(exc_type, Exception):
+                self.error = f"{exc_type.__name__}: {exc}"
+            else:
+                # Streamlit's rerun and stop requests end the script this way
+                self.attributes["interrupted_by"] = exc_type.__name__
+        return False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def accumulate(self, name, seconds):
+        """Add to a running total, e.g. time spent rendering across many batches."""
+        self.attributes[name] = self.attributes.get(name, 0.0) + seconds
+
+    def record(self, name, start, end, **attributes):
+        """Add a finished child for an interval measured elsewhere, in seconds from this span's start."""
+        child = Span(self.trace, name, self, attributes)
+        child.start = self.start + int(start * 1e9)
+        child.end = self.start + int(end * 1e9)
+        self.trace.spans.append(child)
+
+    @property
+    def duration(self):
+        end = self.end if self.end is not None else time.perf_counter_ns()
+        return (end - self.start) / 1e9
+
+    @property
+    def depth(self):
+        depth, parent = 0, self.parent
+        while parent is not None:
+            depth, parent = depth + 1, parent.parent
+        return depth
+
+
+class Trace:
+    """The spans of one rerun."""
+
+    def __init__(self, name, attributes=None, tracer=None):
+        self.trace_id = uuid.uuid4().hex
+        self.tracer = tracer
+        # Anchors perf_counter times to the wall clock for export
+        self.wall_ns = time.time_ns()
+        self.perf_ns = time.perf_counter_ns()
+        self.spans = []
+        self.root = Span(self, name, attributes=attributes)
+
+    def unix_ns(self, perf_ns):
+        return self.wall_ns + (perf_ns - self.perf_ns)
+
+    @property
+    def duration(self):
+        return self.root.duration
+
+
+class _TraceContext:
+    def __init__(self, trace):
+        self.trace = trace
+
+    def __enter__(self):
+        return self.trace.root.__enter__()
+
+    def __exit__(self, *exc_info):
+        try:
+            return self.trace.root.__exit__(*exc_info)
+        finally:
+            self.trace.tracer.traces.append(self.trace)
+
+
+class _ProfileContext:
+    def __init__(self, tracer, kind, trace):
+        self.tracer = tracer
+        self.kind = kind
+        self.trace = trace
+        self.profiler = None
+
+    def __enter__(self):
+        try:
+            self.profiler = _start_profiler(self.kind)
+        except (RuntimeError, ValueError) as e:
+            # Only one profiler can run at a time, e.g. another session is being profiled
+            self.tracer.last_profile = {"path": None, "summary": f"Profiler unavailable: {e}"}
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler:
+            self.tracer.last_profile = _finish_profiler(self.profiler, self.trace)
+        return False
+
+
+class SessionTracer:
+    """Ring buffer of one browser session's recent traces."""
+
+    def __init__(self, history=TRACE_HISTORY):
+        self.traces = deque(maxlen=history)
+        # (profiler, "rerun" or "turn") requested from the debug panel
+        self.profile_next = None
+        self.last_profile = None
+
+    def trace(self, name, **attributes):
+        return _TraceContext(Trace(name, attributes, self))
+
+    def export(self, directory=None):
+        """Write the buffered traces as OTLP/JSON; returns the file path."""
+        directory = directory or trace_dir()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"traces-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(otlp_json(self.traces), f)
+        prune_trace_files(directory)
+        return path
+
+
+def trace(tracer, name, **attributes):
+    """Context manager tracing one rerun into ``tracer``; a no-op when it is ``None``."""
+    return tracer.trace(name, **attributes) if tracer else NULL_SPAN
+
+
+def span(name, **attributes):
+    """A child of the current span, or the no-op span outside a trace."""
+    parent = _current.get()
+    if parent is None:
+        return NULL_SPAN
+    return Span(parent.trace, name, parent, attributes)
+
+
+def current_span():
+    return _current.get() or NULL_SPAN
+
+
+def active():
+    """Whether this thread is inside a trace, to skip work only a span would use."""
+    return _current.get() is not None
+
+
+def profiled(scope):
+    """Profile the block if the debug panel asked for the next ``scope`` ("rerun" or "turn")."""
+    parent = _current.get()
+    if parent is None:
+        return NULL_SPAN
+    tracer = parent.trace.tracer
+    if tracer is None or not tracer.profile_next or tracer.profile_next[1] != scope:
+        return NULL_SPAN
+    kind, tracer.profile_next = tracer.profile_next[0], None
+    return _ProfileContext(tracer, kind, parent.trace)
+
+
+def record_turn_phases(stream_span, timings, elapsed):
+    """Prefill, thinking and answer children from a turn's ``TurnMetrics``."""
+    first_thinking = timings.get("ttft_thinking")
+    first_answer = timings.get("ttft_answer")
+    first_token = min((t for t in (first_thinking, first_answer) if t is not None), default=None)
+    if first_token is None:
+        return
+    prefill = {key: timings[key] / 1e9 for key in ("prompt_eval_duration", "load_duration") if timings.get(key)}
+    stream_span.record("prefill", 0.0, first_token, prompt_tokens=timings.get("prompt_eval_count"),
+                       **{f"server_{key}_s": value for key, value in prefill.items()})
+    if first_thinking is not None:
+        stream_span.record("thinking", first_thinking, first_answer if first_answer is not None else elapsed,
+                           tokens=timings.get("thinking_tokens"))
+    if first_answer is not None:
+        stream_span.record("answer", first_answer, elapsed)
+    stream_span.set(tokens=timings.get("tokens"), tokens_per_second=timings.get("tokens_per_second"))
+
+
+# Debug panel tables
+
+def rerun_rows(traces):
+    """One row per trace, newest first, with the time of each top-level phase."""
+    rows = []
+    for trace in reversed(traces):
+        row = {
+            "started": time.strftime("%H:%M:%S", time.localtime(trace.wall_ns / 1e9)),
+            "total ms": round(trace.duration * 1000, 1),
+        }
+        for child in trace.spans:
+            if child.parent is trace.root:
+                row[f"{child.name} ms"] = round(row.get(f"{child.name} ms", 0) + child.duration * 1000, 1)
+        if trace.root.attributes.get("interrupted_by"):
+            row["ended by"] = trace.root.attributes["interrupted_by"]
+        rows.append(row)
+    return rows
+
+
+def breakdown_rows(trace):
+    """Every span of a trace as an indented tree with its share of the rerun."""
+    total = trace.duration or 1e-9
+    order = sorted(trace.spans, key=lambda s: (s.start, -s.duration))
+    children = {}
+    for s in order:
+        children.setdefault(s.parent, []).append(s)
+    rows = []
+
+    def visit(s):
+        attributes = {k: v for k, v in s.attributes.items() if v is not None}
+        rows.append({
+            "span": "  " * s.depth + s.name,
+            "ms": round(s.duration * 1000, 2),
+            "share": f"{s.duration / total:.0%}",
+            "details": ", ".join(f"{k}={round(v, 4) if isinstance(v, float) else v}" for k, v in attributes.items())
+                       + (f" error={s.error}" if s.error else ""),
+        })
+        for child in children.get(s, ()):
+            visit(child)
+
+    visit(trace.root)
+    return rows
+
+
+# Export
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_json(traces):
+    """Traces in the OTLP/JSON ``ExportTraceServiceRequest`` shape."""
+    spans = []
+    for trace in traces:
+        for s in trace.spans:
+            if s.end is None:
+                continue
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent.span_id if s.parent else "",
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(trace.unix_ns(s.start)),
+                "endTimeUnixNano": str(trace.unix_ns(s.end)),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items() if v is not None],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            })
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+    }]}
+
+
+# Profiling
+
+def _start_profiler(kind):
+    if kind == "pyinstrument" and PyinstrumentProfiler:
+        profiler = PyinstrumentProfiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def _finish_profiler(profiler, trace):
+    """Stop profiling and save the result; returns ``{"path", "summary"}``."""
+    directory = trace_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{trace.trace_id[:6]}")
+    if PyinstrumentProfiler and isinstance(profiler, PyinstrumentProfiler):
+        profiler.stop()
+        path = base + ".html"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        prune_trace_files(directory)
+        return {"path": path, "summary": profiler.output_text()}
+    profiler.disable()
+    path = base + ".prof"
+    # Loads with pstats, snakeviz or gprof2dot
+    profiler.dump_stats(path)
+    prune_trace_files(directory)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    return {"path": path, "summary": summary.getvalue()}